@@ -0,0 +1,349 @@
+import numpy as np
+import logging
+import warnings
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('day', 'week', 'month')
+
+# Widest bucket range a series may span; rows further out are dropped as outliers
+DEFAULT_MAX_BUCKETS = 520
+
+class TrendAnalyzer:
+    def __init__(self, default_period='week', default_window=4, max_buckets=DEFAULT_MAX_BUCKETS):
+        """
+        Initialize columnar trend analytics
+
+        Args:
+            default_period (str): Bucket size, one of 'day', 'week', 'month'
+            default_window (int): Rolling window length in buckets
+            max_buckets (int): Widest series returned; timestamps far from the
+                bulk of the data (e.g. epoch 0) are dropped instead of expanding
+                the dense bucket range
+        """
+        try:
+            if default_period not in PERIODS:
+                raise ValueError(f'Unsupported period: {default_period}')
+            self.default_period = default_period
+            self.default_window = default_window
+            self.max_buckets = max_buckets
+            logger.info("Trend analyzer initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize trend analyzer: {str(e)}")
+            raise
+
+    def to_columns(self, records):
+        """
+        Convert analysis records into columnar arrays
+
+        Args:
+            records (list): Dicts with a timestamp plus either an 'emotion' analysis,
+                or 'primary_emotion'/'sentiment' at the top level, and optionally
+                a 'classification' with 'category'
+
+        Returns:
+            dict: 'timestamps', 'emotions', 'sentiment' and optional 'categories' lists
+        """
+        timestamps, emotions, sentiment, categories = [], [], [], []
+        has_categories = False
+
+        for record in records:
+            if not isinstance(record, dict):
+                raise ValueError('Each item must be an object')
+            emotion = record.get('emotion')
+            if not isinstance(emotion, dict):
+                emotion = record
+            timestamp = None
+            for key in ('timestamp', 'created_at', 'createdAt'):
+                timestamp = record.get(key)
+                if timestamp is not None:
+                    break
+            if timestamp is None:
+                raise ValueError('Each item needs a timestamp')
+            timestamps.append(timestamp)
+            emotions.append(
+                emotion.get('primary_emotion') or emotion.get('dominant_emotion') or 'neutral'
+            )
+
+            scores = emotion.get('sentiment')
+            if scores is None:
+                scores = record.get('sentiment')
+            sentiment.append(self._sentiment_value(scores))
+
+            classification = record.get('classification')
+            if not isinstance(classification, dict):
+                classification = {}
+            category = classification.get('category', record.get('category'))
+            has_categories = has_categories or category is not None
+            categories.append(category or 'other')
+
+        columns = {
+            'timestamps': timestamps,
+            'emotions': emotions,
+            'sentiment': sentiment
+        }
+        if has_categories:
+            columns['categories'] = categories
+        return columns
+
+    def _sentiment_value(self, scores):
+        """
+        Compound sentiment from a score dict or a bare number; None counts as neutral
+
+        Raises:
+            ValueError: For anything else
+        """
+        if isinstance(scores, dict):
+            scores = scores.get('compound', scores.get('polarity'))
+        if scores is None:
+            return 0.0
+        if isinstance(scores, bool) or not isinstance(scores, (int, float)):
+            raise ValueError(f'Sentiment must be a number or a score object, got {type(scores).__name__}')
+        return float(scores)
+
+    def compute_trends(self, columns, period=None, window=None):
+        """
+        Compute bucketed emotion/category distributions and rolling sentiment
+
+        Args:
+            columns (dict): Output of to_columns, or equivalent arrays supplied by the caller
+            period (str): 'day', 'week' or 'month'
+            window (int): Rolling window length in buckets
+
+        Returns:
+            dict: Per-bucket series plus an overall summary
+        """
+        period = period or self.default_period
+        window = max(1, int(window or self.default_window))
+        if period not in PERIODS:
+            raise ValueError(f'Unsupported period: {period}')
+
+        timestamps = self._parse_timestamps(columns.get('timestamps', []))
+        count = len(timestamps)
+        if count == 0:
+            return {'period': period, 'buckets': [], 'summary': 'No data available'}
+
+        sentiment = columns.get('sentiment')
+        if sentiment is None:
+            sentiment = np.zeros(count)
+        elif not (isinstance(sentiment, np.ndarray) and np.issubdtype(sentiment.dtype, np.number)):
+            sentiment = [self._sentiment_value(value) for value in sentiment]
+        sentiment = np.asarray(sentiment, dtype=np.float64)
+        emotions = columns.get('emotions')
+        if emotions is None:
+            emotions = ['neutral'] * count
+        categories = columns.get('categories')
+        if len(sentiment) != count or len(emotions) != count or (categories is not None and len(categories) != count):
+            raise ValueError('Columns must all have one value per timestamp')
+
+        keys, bucket_starts = self._bucket_keys(timestamps, period)
+        keep = self._in_range(keys)
+        dropped = int(count - keep.sum())
+        if dropped:
+            keys, sentiment = keys[keep], sentiment[keep]
+            emotions = [value for value, kept in zip(emotions, keep.tolist()) if kept]
+            if categories is not None:
+                categories = [value for value, kept in zip(categories, keep.tolist()) if kept]
+            count -= dropped
+        if count == 0:
+            return {'period': period, 'buckets': [], 'summary': 'No data available', 'dropped_outliers': dropped}
+        emotion_labels, emotion_codes = self._encode_labels(emotions)
+
+        # Dense bucket index so empty periods show up as gaps in the series
+        key_min = int(keys.min())
+        bucket_index = keys - key_min
+        n_buckets = int(bucket_index.max()) + 1
+
+        counts = np.bincount(bucket_index, minlength=n_buckets).astype(np.float64)
+        emotion_counts = self._grouped_counts(bucket_index, emotion_codes, n_buckets, len(emotion_labels))
+
+        sums = np.bincount(bucket_index, weights=sentiment, minlength=n_buckets)
+        squares = np.bincount(bucket_index, weights=sentiment * sentiment, minlength=n_buckets)
+        mean, volatility = self._mean_std(sums, squares, counts)
+
+        # Rolling statistics over the last `window` buckets via prefix sums
+        rolling_mean, rolling_volatility = self._mean_std(
+            self._rolling_sum(sums, window),
+            self._rolling_sum(squares, window),
+            self._rolling_sum(counts, window)
+        )
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            emotion_share = emotion_counts / counts[:, None]
+        dominant = np.where(counts > 0, emotion_labels[emotion_counts.argmax(axis=1)], None)
+
+        bucket_labels = bucket_starts(np.arange(key_min, key_min + n_buckets))
+        overall_counts = emotion_counts.sum(axis=0)
+
+        trends = {
+            'period': period,
+            'window': window,
+            'buckets': bucket_labels,
+            'counts': counts.astype(np.int64).tolist(),
+            'emotion_distribution': {
+                str(label): self._to_list(emotion_share[:, i])
+                for i, label in enumerate(emotion_labels)
+            },
+            'dominant_emotion': dominant.tolist(),
+            'sentiment_mean': self._to_list(mean),
+            'sentiment_volatility': self._to_list(volatility),
+            'rolling_sentiment_mean': self._to_list(rolling_mean),
+            'rolling_sentiment_volatility': self._to_list(rolling_volatility),
+            'summary': {
+                'total_items': count,
+                'dropped_outliers': dropped,
+                'dominant_emotion': str(emotion_labels[overall_counts.argmax()]),
+                'sentiment_average': float(sentiment.mean()),
+                'sentiment_volatility': float(sentiment.std())
+            }
+        }
+
+        if categories is not None:
+            category_labels, category_codes = self._encode_labels(categories)
+            category_counts = self._grouped_counts(
+                bucket_index, category_codes, n_buckets, len(category_labels)
+            )
+            with np.errstate(invalid='ignore', divide='ignore'):
+                category_share = category_counts / counts[:, None]
+            trends['category_distribution'] = {
+                str(label): self._to_list(category_share[:, i])
+                for i, label in enumerate(category_labels)
+            }
+
+        return trends
+
+    def analyze(self, records, period=None, window=None):
+        """Convenience wrapper: to_columns followed by compute_trends"""
+        try:
+            return self.compute_trends(self.to_columns(records), period, window)
+        except Exception as e:
+            logger.error(f"Trend computation failed: {str(e)}")
+            return {'period': period or self.default_period, 'buckets': [], 'error': str(e)}
+
+    def _in_range(self, keys):
+        """
+        Mask of rows inside a span of at most max_buckets around the data's median
+
+        The span is centred on the median so one stray timestamp, early or late,
+        cannot drag the series out to cover decades of empty buckets.
+        """
+        # Upper median: an actual key, so at least that row is always kept
+        median = int(np.sort(keys)[len(keys) // 2])
+        half = self.max_buckets // 2
+        lo, hi = median - half, median + (self.max_buckets - half) - 1
+        inside = (keys >= lo) & (keys <= hi)
+        # Shift the span towards the data when it is all on one side of the median
+        if inside.any():
+            kept = keys[inside]
+            lo = max(int(kept.min()), int(kept.max()) - self.max_buckets + 1)
+            inside &= keys >= lo
+        return inside
+
+    def _encode_labels(self, values):
+        """Dictionary-encode labels into small integer codes (first-seen order)"""
+        vocabulary = {}
+        codes = np.fromiter(
+            (vocabulary.setdefault(value, len(vocabulary)) for value in values),
+            dtype=np.int32
+        )
+        return np.array([str(label) for label in vocabulary], dtype=object), codes
+
+    def _grouped_counts(self, bucket_index, codes, n_buckets, n_labels):
+        """Count label occurrences per bucket with a single flat bincount"""
+        flat = bucket_index * n_labels + codes
+        return np.bincount(flat, minlength=n_buckets * n_labels).reshape(n_buckets, n_labels).astype(np.float64)
+
+    def _rolling_sum(self, values, window):
+        prefix = np.concatenate(([0.0], np.cumsum(values)))
+        start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+        return prefix[1:] - prefix[start]
+
+    def _mean_std(self, sums, squares, counts):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / counts
+            variance = np.maximum(squares / counts - mean * mean, 0.0)
+        return mean, np.sqrt(variance)
+
+    def _bucket_keys(self, timestamps, period):
+        """Integer bucket keys plus a function mapping keys back to ISO dates"""
+        if period == 'month':
+            keys = timestamps.astype('datetime64[M]').astype(np.int64)
+            return keys, lambda k: np.datetime_as_string(k.astype('datetime64[M]'), unit='D').tolist()
+
+        days = timestamps.astype('datetime64[D]').astype(np.int64)
+        if period == 'day':
+            return days, lambda k: np.datetime_as_string(k.astype('datetime64[D]'), unit='D').tolist()
+
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        keys = (days + 3) // 7
+        return keys, lambda k: np.datetime_as_string((k * 7 - 3).astype('datetime64[D]'), unit='D').tolist()
+
+    def _parse_timestamps(self, values):
+        """
+        Parse ISO strings or epoch seconds/milliseconds into datetime64[s]
+
+        Homogeneous input is converted in one vectorized step; a mix of numbers
+        and strings is parsed value by value.
+
+        Raises:
+            ValueError: For values that are neither strings nor numbers
+        """
+        if isinstance(values, np.ndarray):
+            if np.issubdtype(values.dtype, np.datetime64):
+                return values.astype('datetime64[s]')
+            if values.dtype.kind in 'iuf':
+                return self._parse_epochs(values)
+            if values.dtype.kind in 'US':
+                return self._parse_strings(values)
+            values = values.tolist()
+        if not isinstance(values, (list, tuple)):
+            raise ValueError('timestamps must be a list')
+
+        if not values:
+            return np.array([], dtype='datetime64[s]')
+        if all(isinstance(value, str) for value in values):
+            return self._parse_strings(np.array(values))
+        if all(self._is_number(value) for value in values):
+            return self._parse_epochs(np.array(values, dtype=np.float64))
+        return np.concatenate([self._parse_value(value) for value in values])
+
+    def _parse_value(self, value):
+        """One timestamp as a length-1 datetime64[s] array"""
+        if isinstance(value, str):
+            return self._parse_strings(np.array([value]))
+        if self._is_number(value):
+            return self._parse_epochs(np.array([value], dtype=np.float64))
+        raise ValueError(f'Timestamps must be ISO strings or epoch numbers, got {type(value).__name__}')
+
+    def _is_number(self, value):
+        return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+    def _parse_epochs(self, seconds):
+        seconds = seconds.astype(np.float64)
+        if not np.isfinite(seconds).all():
+            raise ValueError('Epoch timestamps must be finite')
+        seconds = np.where(seconds > 1e11, seconds / 1000.0, seconds)
+        return seconds.astype(np.int64).astype('datetime64[s]')
+
+    def _parse_strings(self, values):
+        strings = np.char.rstrip(values.astype(str), 'Z')
+        try:
+            with warnings.catch_warnings():
+                # NumPy deprecates (and will reject) timezone offsets
+                warnings.simplefilter('error', DeprecationWarning)
+                return strings.astype('datetime64[s]')
+        except (ValueError, DeprecationWarning):
+            # Normalize timezone offsets to UTC ourselves
+            return np.array([self._parse_iso(value) for value in strings], dtype='datetime64[s]')
+
+    def _parse_iso(self, value):
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    def _to_list(self, values):
+        """Convert a float array to a JSON-safe list with NaN as None"""
+        values = np.round(values, 4)
+        return np.where(np.isnan(values), None, values).tolist()
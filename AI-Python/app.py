@@ -1,8 +1,10 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 import os
+import json
 from dotenv import load_dotenv
 import logging
+import time
 from datetime import datetime
 
 # Load environment variables from .env file
@@ -12,13 +14,36 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Thread policy must be exported before numpy/sklearn/torch load their thread pools
+from utils.runtime_config import configure_process, configure_worker, get_runtime_info
+configure_process()
+
+# Started before the AI imports so their memory is attributed per component
+from utils.memory_monitor import MemoryMonitor
+memory_monitor = MemoryMonitor()
+
 # Import AI modules - Production mode, all modules required
 try:
-    from emotion_detection.fallback_emotion import EmotionAnalyzer  # Use fallback for stability
+    from emotion_detection.tiered_service import TieredEmotionService
+    from emotion_detection.fallback_emotion import sentiment_fields
     from content_analysis.content_classifier import ContentClassifier
+    from content_analysis.online_learner import OnlineLearner
+    from content_analysis.topic_engine import create_topic_engine
+    from content_analysis.near_duplicate_index import NearDuplicateIndex
     from recommendations.recommendation_engine import RecommendationEngine
+    from recommendations.similarity_index import SimilarityIndex
     from utils.text_processor import TextProcessor
+    from utils.language_detector import LanguageDetector, UNDETERMINED
     from utils.file_processor import FileProcessor
+    from utils.analysis_cache import AnalysisCache
+    from utils.sentiment_engine import SentimentEngine
+    from utils.serialization import respond, dumps_ndjson
+    from utils.columnar_results import ColumnarResults, PYARROW_AVAILABLE
+    from utils.profiler import RequestProfiler
+    from utils.analysis_version import content_fingerprint, composite_version
+    from jobs.job_store import JobStore, FINISHED_STATES
+    from jobs.job_worker import JobWorker
+    from analytics.trend_analyzer import TrendAnalyzer
     logger.info('✓ All AI modules loaded successfully - Production Mode Active')
 except ImportError as e:
     logger.error(f'✗ CRITICAL: Failed to load required AI modules in production: {e}')
@@ -32,12 +57,92 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-# Initialize AI components
-emotion_analyzer = EmotionAnalyzer()
-content_classifier = ContentClassifier()
-recommendation_engine = RecommendationEngine()
-text_processor = TextProcessor()
-file_processor = FileProcessor()
+# Initialize AI components, recording the memory each one takes
+# Transformer model when loaded and fast enough, heuristic fallback otherwise
+with memory_monitor.track('emotion_analyzer'):
+    emotion_analyzer = TieredEmotionService(memory_monitor=memory_monitor)
+with memory_monitor.track('content_classifier'):
+    content_classifier = ContentClassifier()
+with memory_monitor.track('recommendation_engine'):
+    recommendation_engine = RecommendationEngine()
+with memory_monitor.track('text_processor'):
+    text_processor = TextProcessor()
+language_detector = LanguageDetector()
+# OpenCV and librosa load on first media request, within the memory budget
+file_processor = FileProcessor(memory_monitor=memory_monitor)
+with memory_monitor.track('online_learner'):
+    online_learner = OnlineLearner(content_classifier)
+with memory_monitor.track('topic_engine'):
+    topic_engine = create_topic_engine(emotion_analyzer=emotion_analyzer)
+similarity_index = SimilarityIndex(dim=content_classifier.embedding_dim)
+trend_analyzer = TrendAnalyzer()
+analysis_cache = AnalysisCache(max_entries=int(os.environ.get('ANALYSIS_CACHE_SIZE', 10000)))
+near_duplicates = NearDuplicateIndex()
+# Opt-in: borrow the emotion inference of a cached near-identical text instead of
+# running the emotion model again (everything else is recomputed for the new text)
+NEAR_DUPLICATE_REUSE = os.environ.get('NEAR_DUPLICATE_REUSE', '0') == '1'
+job_store = JobStore()
+
+# Opt-in request profiling (X-Profile header or 1-in-N sampling), summarized per component
+request_profiler = RequestProfiler(components={
+    'TextProcessor': ['utils.text_processor', 'utils.sentiment_engine'],
+    'ContentClassifier': ['content_analysis.content_classifier', 'content_analysis.fused_heads'],
+    'EmotionAnalyzer': ['emotion_detection.tiered_service', 'emotion_detection.emotion_analyzer',
+                        'emotion_detection.inference_engine', 'emotion_detection.fallback_emotion'],
+    'FileProcessor': ['utils.file_processor']
+})
+# Debug endpoints, and streams whose work runs after the response starts, are never profiled
+UNPROFILED_PREFIXES = ('/debug', '/stream', '/health', '/metrics')
+
+# Languages the (English) models can read; other confidently detected languages
+# skip model inference and get the basic analysis instead of garbage output
+ANALYSIS_LANGUAGES = set(os.environ.get('ANALYSIS_LANGUAGES', 'en').split(','))
+LANGUAGE_ROUTE_CONFIDENCE = float(os.environ.get('LANGUAGE_ROUTE_CONFIDENCE', 0.8))
+
+# Seconds a job result stream waits without new results before it ends
+JOB_STREAM_IDLE_TIMEOUT = float(os.environ.get('JOB_STREAM_IDLE_TIMEOUT', 120))
+
+# Job results read from the store per page when exporting, and items analyzed
+# per chunk when a batch endpoint builds a columnar download
+EXPORT_PAGE_SIZE = int(os.environ.get('EXPORT_PAGE_SIZE', 1000))
+EXPORT_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'ndjson': ('application/x-ndjson', 'ndjson')
+}
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+# Items per micro-batch on the streaming ingestion endpoint
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 32))
+# WSGI environ flag set by asgi.py: the request body was read in full before the app ran
+BUFFERED_INPUT_KEY = 'ai_python.buffered_input'
+
+# Resize thread pools now that the models (and torch, if used) are loaded
+# A preloaded gunicorn master configures each worker in post_fork instead
+if os.environ.get('GUNICORN_PRELOAD') != '1':
+    configure_worker(int(os.environ.get('WORKER_INDEX', 0)))
+
+@app.before_request
+def start_request_profile():
+    if request.path.startswith(UNPROFILED_PREFIXES):
+        return
+    mode = request_profiler.select_mode(request.headers.get('X-Profile'))
+    if mode:
+        g.profile_session = request_profiler.start(mode, f'{request.method} {request.path}')
+
+@app.after_request
+def finish_request_profile(response):
+    session = g.pop('profile_session', None)
+    if session is not None:
+        response.headers['X-Profile-Id'] = request_profiler.stop(session, response.status_code)
+    return response
+
+@app.teardown_request
+def abandon_request_profile(error=None):
+    # Unhandled errors skip after_request; stop the session so cProfile is released
+    session = g.pop('profile_session', None)
+    if session is not None:
+        request_profiler.stop(session, 500)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -61,10 +166,14 @@ def analyze_emotion():
         # Process text
         processed_text = text_processor.preprocess(text)
         
-        # Analyze emotion
-        emotion_result = emotion_analyzer.analyze(processed_text)
+        # Analyze emotion, reusing the lexicon sentiment pass
+        sentiment_result = text_processor.analyze_sentiment(processed_text)
+        emotion_result = emotion_analyzer.analyze(
+            processed_text,
+            SentimentEngine.vader_scores(sentiment_result)
+        )
         
-        return jsonify({
+        return respond({
             'success': True,
             'emotion': emotion_result,
             'processed_text': processed_text
@@ -90,26 +199,11 @@ def analyze_content():
             'timestamp': datetime.utcnow().isoformat()
         }
         
+        content_item = {'type': content_type, 'data': content}
+        
         if content_type == 'text':
-            # Text analysis
-            processed_text = text_processor.preprocess(content)
-            
-            # Emotion analysis
-            emotion_result = emotion_analyzer.analyze(processed_text)
-            
-            # Content classification
-            classification_result = content_classifier.classify(processed_text)
-            
-            # Sentiment analysis
-            sentiment_result = text_processor.analyze_sentiment(processed_text)
-            
-            result.update({
-                'emotion': emotion_result,
-                'classification': classification_result,
-                'sentiment': sentiment_result,
-                'keywords': text_processor.extract_keywords(processed_text),
-                'topics': text_processor.extract_topics(processed_text)
-            })
+            # Text analysis, routed by detected language (or reused from a near duplicate)
+            result.update(analyze_content_internal(content_item))
             
         elif content_type in ['image', 'video']:
             # Visual content analysis
@@ -121,10 +215,14 @@ def analyze_content():
             audio_result = file_processor.analyze_audio_content(content)
             result.update(audio_result)
         
-        return jsonify({
+        stamp_analysis(content_item, result)
+        analysis_id = cache_analysis(content_item, result)
+        
+        return respond({
             'success': True,
+            'analysis_id': analysis_id,
             'analysis': result
-        })
+        }, root='analysis')
         
     except Exception as e:
         logger.error(f"Content analysis error: {str(e)}")
@@ -159,44 +257,235 @@ def generate_insights(capsule_id):
         data = request.get_json()
         capsule_data = data.get('capsule', {})
         
-        insights = {
-            'capsule_id': capsule_id,
-            'timestamp': datetime.utcnow().isoformat(),
-            'insights': []
-        }
+        error = validate_insights_item(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Analyze capsule content
-        if 'content' in capsule_data:
+        # Reuse precomputed or cached analysis before analyzing again
+        content_analysis = resolve_cached_analysis(data, capsule_data, composite_version(analyzer_versions()))
+        if content_analysis is None and 'content' in capsule_data:
             content_analysis = analyze_content_internal(capsule_data['content'])
-            insights['content_analysis'] = content_analysis
+            cache_analysis(capsule_data['content'], content_analysis)
+        if 'content' in capsule_data:
+            register_near_duplicate(capsule_data['content'], key=capsule_id, owner=capsule_data.get('user_id'))
         
-        # Generate unlocking recommendations
+        unlock_recommendations = None
         if 'unlock_conditions' in capsule_data:
             unlock_recommendations = recommendation_engine.suggest_unlock_timing(
                 capsule_data['unlock_conditions'],
-                content_analysis
+                content_analysis or {}
+            )
+        
+        related_capsules = find_related_capsules(capsule_id, capsule_data)
+        
+        return respond({
+            'success': True,
+            'insights': build_insights(
+                capsule_id,
+                capsule_data,
+                content_analysis,
+                unlock_recommendations,
+                related_capsules
             )
-            insights['unlock_recommendations'] = unlock_recommendations
+        }, root='insights')
+        
+    except Exception as e:
+        logger.error(f"Insights generation error: {str(e)}")
+        return jsonify({'error': 'Failed to generate insights'}), 500
+
+@app.route('/batch/insights', methods=['POST'])
+def batch_insights():
+    """Generate insights for many capsules, analyzing only what is not already known"""
+    try:
+        data = request.get_json()
+        items = data.get('items', [])
+        locale = data.get('locale')
+        
+        if not items:
+            return jsonify({'error': 'No items provided'}), 400
+        
+        # Malformed items get an error result instead of failing the batch
+        errors = [validate_insights_item(item) for item in items]
+        valid = [i for i, error in enumerate(errors) if error is None]
+        capsules = [items[i].get('capsule', {}) for i in valid]
         
-        # Generate sharing suggestions
-        sharing_suggestions = recommendation_engine.suggest_sharing(
-            capsule_data,
-            content_analysis
+        # Resolve precomputed or cached analyses; batch-analyze the rest
+        current_version = composite_version(analyzer_versions())
+        analyses = [resolve_cached_analysis(items[i], capsule, current_version) for i, capsule in zip(valid, capsules)]
+        pending = [
+            j for j, capsule in enumerate(capsules)
+            if analyses[j] is None and 'content' in capsule
+        ]
+        if pending:
+            pending_contents = [capsules[j]['content'] for j in pending]
+            for j, content, analysis in zip(pending, pending_contents, analyze_content_batch_internal(pending_contents)):
+                analyses[j] = analysis
+                cache_analysis(content, analysis)
+        
+        # Unlock timing for the whole set with calendars resolved once per locale
+        unlock_indices = [j for j, capsule in enumerate(capsules) if 'unlock_conditions' in capsule]
+        unlock_results = recommendation_engine.suggest_unlock_timing_batch(
+            [(capsules[j]['unlock_conditions'], analyses[j] or {}) for j in unlock_indices],
+            locale=locale
         )
-        insights['sharing_suggestions'] = sharing_suggestions
+        unlock_by_index = dict(zip(unlock_indices, unlock_results))
+        
+        capsule_ids = [items[i].get('id', capsule.get('id')) for i, capsule in zip(valid, capsules)]
+        related = find_related_capsules_batch(capsule_ids, capsules)
+        for capsule_id, capsule in zip(capsule_ids, capsules):
+            if capsule_id is not None and 'content' in capsule:
+                register_near_duplicate(capsule['content'], key=capsule_id, owner=capsule.get('user_id'))
+        
+        # Unlock conditions that are not an object fail their item
+        for j, unlock in unlock_by_index.items():
+            if isinstance(unlock, dict) and 'error' in unlock:
+                errors[valid[j]] = unlock['error']
+        
+        results = [None] * len(items)
+        for i, error in enumerate(errors):
+            if error is not None:
+                item = items[i]
+                results[i] = {
+                    'id': item.get('id') if isinstance(item, dict) else None,
+                    'success': False,
+                    'error': error
+                }
+        for j, (i, capsule_id) in enumerate(zip(valid, capsule_ids)):
+            if errors[i] is not None:
+                continue
+            results[i] = {
+                'id': capsule_id,
+                'success': True,
+                'insights': build_insights(
+                    capsule_id,
+                    capsules[j],
+                    analyses[j],
+                    unlock_by_index.get(j),
+                    related[j]
+                )
+            }
+        
+        return respond({
+            'success': True,
+            'results': results
+        }, root='results.insights')
         
+    except Exception as e:
+        logger.error(f"Batch insights error: {str(e)}")
+        return jsonify({'error': 'Batch insights failed'}), 500
+
+@app.route('/metrics/classifier', methods=['GET'])
+def classifier_metrics():
+    """Per-head classifier model and latency statistics"""
+    return jsonify({
+        'success': True,
+        'heads': content_classifier.get_head_latency()
+    })
+
+@app.route('/metrics/emotion', methods=['GET'])
+def emotion_metrics():
+    """Which emotion tier is answering, breaker state and per-tier latency"""
+    return jsonify({
+        'success': True,
+        'emotion': emotion_analyzer.get_metrics()
+    })
+
+@app.route('/metrics/runtime', methods=['GET'])
+def runtime_metrics():
+    """Thread policy and CPU pinning applied in this worker"""
+    return jsonify({
+        'success': True,
+        'runtime': get_runtime_info()
+    })
+
+@app.route('/debug/memory', methods=['GET'])
+def debug_memory():
+    """Resident memory per loaded component and the worker's memory budget"""
+    try:
+        top = request.args.get('top', 0, type=int)
         return jsonify({
             'success': True,
-            'insights': insights
+            'memory': memory_monitor.get_report(top=min(max(top, 0), 50))
+        })
+
+    except Exception as e:
+        logger.error(f"Memory report failed: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/debug/profiles', methods=['GET'])
+def list_profiles():
+    """Recently captured request profiles with per-component timings"""
+    return jsonify({
+        'success': True,
+        'profiler': request_profiler.get_stats(),
+        'profiles': request_profiler.list_profiles()
+    })
+
+@app.route('/debug/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """Download a profile as pstats (cProfile mode) or speedscope JSON (sample mode)"""
+    try:
+        record = request_profiler.get_profile(profile_id)
+        if record is None:
+            return jsonify({'error': 'Profile not found'}), 404
+
+        default_format = 'pstats' if record['mode'] == 'cprofile' else 'speedscope'
+        export_format = request.args.get('format', default_format)
+        if export_format == 'pstats':
+            data = request_profiler.export_pstats(record)
+            mimetype, extension = 'application/octet-stream', 'prof'
+        elif export_format == 'speedscope':
+            data = request_profiler.export_speedscope(record)
+            data = json.dumps(data) if data is not None else None
+            mimetype, extension = 'application/json', 'speedscope.json'
+        else:
+            return jsonify({'error': 'format must be pstats or speedscope'}), 400
+
+        if data is None:
+            return jsonify({'error': f"{export_format} export is not available for {record['mode']} profiles"}), 409
+
+        return Response(data, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename={profile_id}.{extension}'
         })
+
+    except Exception as e:
+        logger.error(f"Profile download failed: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/feedback', methods=['POST'])
+def submit_feedback():
+    """Queue corrected classification labels for online training"""
+    try:
+        data = request.get_json()
+        items = data.get('items', [])
+        
+        if not items:
+            return jsonify({'error': 'No items provided'}), 400
+        
+        result = online_learner.submit(items)
+        
+        return jsonify({
+            'success': True,
+            'accepted': result['accepted'],
+            'invalid': result['invalid'],
+            'status': online_learner.get_status()
+        }), 202
         
     except Exception as e:
-        logger.error(f"Insights generation error: {str(e)}")
-        return jsonify({'error': 'Failed to generate insights'}), 500
+        logger.error(f"Feedback submission error: {str(e)}")
+        return jsonify({'error': 'Feedback submission failed'}), 500
 
-@app.route('/batch/analyze', methods=['POST'])
-def batch_analyze():
-    """Batch analyze multiple content items"""
+@app.route('/feedback/status', methods=['GET'])
+def feedback_status():
+    """Online training queue and model generation"""
+    return jsonify({
+        'success': True,
+        'status': online_learner.get_status()
+    })
+
+@app.route('/similarity/index', methods=['POST'])
+def index_capsules():
+    """Add or update capsule embeddings in the similarity index"""
     try:
         data = request.get_json()
         items = data.get('items', [])
@@ -204,46 +493,786 @@ def batch_analyze():
         if not items:
             return jsonify({'error': 'No items provided'}), 400
         
-        results = []
+        capsule_ids, owners, texts = [], [], []
         for item in items:
-            try:
-                analysis = analyze_content_internal(item)
-                results.append({
-                    'id': item.get('id'),
-                    'success': True,
-                    'analysis': analysis
-                })
-            except Exception as e:
-                results.append({
-                    'id': item.get('id'),
-                    'success': False,
-                    'error': str(e)
-                })
+            text = get_content_text(item.get('content', {}))
+            if item.get('id') is None or not text:
+                continue
+            capsule_ids.append(item['id'])
+            owners.append(item.get('user_id'))
+            texts.append(text)
+        
+        if capsule_ids:
+            similarity_index.add(capsule_ids, content_classifier.embed(texts), owners)
+            for item in items:
+                if item.get('id') is not None:
+                    register_near_duplicate(item.get('content', {}), key=item['id'], owner=item.get('user_id'))
         
         return jsonify({
             'success': True,
-            'results': results
+            'indexed': len(capsule_ids),
+            'skipped': len(items) - len(capsule_ids),
+            'index': similarity_index.get_stats()
+        })
+        
+    except Exception as e:
+        logger.error(f"Similarity indexing error: {str(e)}")
+        return jsonify({'error': 'Similarity indexing failed'}), 500
+
+@app.route('/dedupe/<user_id>', methods=['GET'])
+def dedupe_report(user_id):
+    """Groups of near-identical capsules for one user"""
+    try:
+        threshold = request.args.get('threshold', type=float)
+        return jsonify({
+            'success': True,
+            'report': near_duplicates.duplicate_report(user_id, threshold=threshold),
+            'index': near_duplicates.get_stats()
         })
         
+    except Exception as e:
+        logger.error(f"Dedupe report error: {str(e)}")
+        return jsonify({'error': 'Dedupe report failed'}), 500
+
+@app.route('/similarity/<capsule_id>', methods=['GET'])
+def get_similar_capsules(capsule_id):
+    """Get capsules related to an indexed capsule"""
+    try:
+        k = min(int(request.args.get('k', 5)), 100)
+        user_id = request.args.get('user_id')
+        
+        if capsule_id not in similarity_index:
+            return jsonify({'error': 'Capsule not indexed'}), 404
+        
+        return jsonify({
+            'success': True,
+            'capsule_id': capsule_id,
+            'related_capsules': similarity_index.query_id(capsule_id, k=k, owner=user_id)
+        })
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid k parameter'}), 400
+    except Exception as e:
+        logger.error(f"Similarity lookup error: {str(e)}")
+        return jsonify({'error': 'Similarity lookup failed'}), 500
+
+@app.route('/batch/analyze', methods=['POST'])
+def batch_analyze():
+    """
+    Batch analyze multiple content items
+    
+    With ?format=parquet or ?format=arrow the results are downloaded as a
+    columnar file; items are then analyzed a chunk at a time and each chunk's
+    results are encoded into a ColumnarResults before the next chunk starts.
+    """
+    try:
+        export_format, error = requested_columnar_format()
+        if error:
+            return error
+        
+        data = request.get_json()
+        items = data.get('items', [])
+        
+        if not items or not isinstance(items, list):
+            return jsonify({'error': 'No items provided'}), 400
+        
+        if export_format:
+            results = ColumnarResults()
+            for start in range(0, len(items), EXPORT_PAGE_SIZE):
+                results.extend(analyze_items(items[start:start + EXPORT_PAGE_SIZE]))
+            return columnar_response(results, export_format, 'batch')
+        
+        results = analyze_items(items)
+        
+        return respond({
+            'success': True,
+            'results': results
+        }, root='results.analysis')
+        
     except Exception as e:
         logger.error(f"Batch analysis error: {str(e)}")
         return jsonify({'error': 'Batch analysis failed'}), 500
 
+@app.route('/analyze/diff', methods=['POST'])
+def analyze_diff():
+    """
+    Incremental re-analysis: recompute only items whose content or analyzer version changed
+    
+    Items carry the id, fingerprint and analyzer_version from their last analysis,
+    plus the current content. Content may be omitted for items the caller believes
+    unchanged; they are reported as content_required if the analyzers changed.
+    ?format=parquet or ?format=arrow downloads the results as a columnar file,
+    analyzing and encoding them a chunk at a time.
+    """
+    try:
+        export_format, error = requested_columnar_format()
+        if error:
+            return error
+        
+        data = request.get_json()
+        items = data.get('items', [])
+        
+        if not items or not isinstance(items, list):
+            return jsonify({'error': 'No items provided'}), 400
+        for i, item in enumerate(items):
+            if not isinstance(item, dict):
+                return jsonify({'error': f'Item {i} must be an object'}), 400
+            error = validate_content_item(item['content']) if item.get('content') else None
+            if error:
+                return jsonify({'error': f'Item {i}: {error}'}), 400
+        
+        current_version = composite_version(analyzer_versions())
+        
+        if export_format:
+            results = ColumnarResults()
+            for start in range(0, len(items), EXPORT_PAGE_SIZE):
+                results.extend(diff_items(items[start:start + EXPORT_PAGE_SIZE], current_version))
+            return columnar_response(results, export_format, 'diff', {'X-Analyzer-Version': current_version})
+        
+        results = diff_items(items, current_version)
+        
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        
+        return respond({
+            'success': True,
+            'analyzer_version': current_version,
+            'summary': summary,
+            'results': results
+        }, root='results.analysis')
+        
+    except Exception as e:
+        logger.error(f"Incremental analysis error: {str(e)}")
+        return jsonify({'error': 'Incremental analysis failed'}), 500
+
+def diff_items(items, current_version):
+    """Diff results for validated /analyze/diff items, batch-analyzing the changed ones"""
+    results = [None] * len(items)
+    pending = []
+    
+    for i, item in enumerate(items):
+        content = item.get('content')
+        fingerprint = content_fingerprint(content) if content else item.get('fingerprint')
+        result = {'id': item.get('id'), 'fingerprint': fingerprint}
+        results[i] = result
+        
+        if fingerprint and fingerprint == item.get('fingerprint') and item.get('analyzer_version') == current_version:
+            result.update({'status': 'unchanged', 'analyzer_version': current_version})
+            continue
+        if not content:
+            result['status'] = 'content_required'
+            continue
+        
+        cached = analysis_cache.get(fingerprint)
+        if cached is not None and cached.get('analyzer_version') == current_version:
+            result.update({'status': 'analyzed', 'analyzer_version': current_version, 'cached': True, 'analysis': cached})
+            continue
+        pending.append(i)
+    
+    if pending:
+        contents = [items[i]['content'] for i in pending]
+        for i, content, analysis in zip(pending, contents, analyze_content_batch_internal(contents)):
+            cache_analysis(content, analysis)
+            results[i].update({
+                'status': 'analyzed',
+                'analyzer_version': analysis['analyzer_version'],
+                'cached': False,
+                'analysis': analysis
+            })
+    
+    return results
+
+def requested_columnar_format():
+    """
+    Columnar download format a batch endpoint was asked for with ?format=
+    
+    Returns:
+        tuple: ('parquet' or 'arrow', None), (None, None) for the default JSON
+            response, or (None, error response)
+    """
+    export_format = request.args.get('format', 'json')
+    if export_format == 'json':
+        return None, None
+    if export_format not in COLUMNAR_FORMATS:
+        return None, (jsonify({'error': f"format must be one of json, {', '.join(COLUMNAR_FORMATS)}"}), 400)
+    if not PYARROW_AVAILABLE:
+        return None, (jsonify({'error': f'{export_format} export requires pyarrow'}), 501)
+    return export_format, None
+
+def columnar_response(results, export_format, name, headers=None):
+    """Download response with a ColumnarResults written as Parquet or an Arrow IPC stream"""
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    body = results.to_ipc() if export_format == 'arrow' else results.to_parquet()
+    headers = dict(headers or {}, **{'Content-Disposition': f'attachment; filename={name}.{extension}'})
+    return Response(body, mimetype=mimetype, headers=headers)
+
+@app.route('/stream/analyze', methods=['POST'])
+def stream_analyze():
+    """
+    Persistent-connection ingestion: NDJSON items in, NDJSON results out, in order
+    
+    The request body is read incrementally, one JSON item per line; items are
+    analyzed in micro-batches of batch_size and each batch's results are written
+    as soon as it finishes. An empty line flushes a partial batch, so a client
+    keeping the connection open can get replies without waiting for more input.
+    The stream ends with a {"done": true} summary line.
+    
+    Incremental reads need a WSGI worker class (SERVER_MODE sync or gthread).
+    Under SERVER_MODE=asgi the adapter buffers the whole request body
+    before the app runs, so results only start once the client has finished
+    sending; such responses carry X-Stream-Input: buffered.
+    """
+    try:
+        batch_size = max(1, min(int(request.args.get('batch_size', STREAM_BATCH_SIZE)), 256))
+    except ValueError:
+        return jsonify({'error': 'Invalid batch_size parameter'}), 400
+    
+    stream = request.stream
+    
+    def process(batch):
+        valid = [item for item in batch if 'error' not in item]
+        analyses = iter(analyze_content_batch_internal([item['content'] for item in valid]) if valid else ())
+        for item in batch:
+            if 'error' in item:
+                yield dumps_ndjson({'id': item.get('id'), 'success': False, 'error': item['error']})
+            else:
+                analysis = next(analyses)
+                yield dumps_ndjson({'id': item['id'], 'success': 'error' not in analysis, 'analysis': analysis})
+    
+    def generate():
+        batch, processed = [], 0
+        for raw in stream:
+            line = raw.strip()
+            if line:
+                batch.append(parse_stream_item(line))
+            if batch and (not line or len(batch) >= batch_size):
+                yield from process(batch)
+                processed += len(batch)
+                batch = []
+        if batch:
+            yield from process(batch)
+            processed += len(batch)
+        yield dumps_ndjson({'done': True, 'processed': processed})
+    
+    headers = {'X-Stream-Input': 'buffered' if request.environ.get(BUFFERED_INPUT_KEY) else 'incremental'}
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers=headers)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a large batch for background analysis and return its job id"""
+    try:
+        data = request.get_json()
+        items = data.get('items', [])
+        kind = data.get('kind', 'analyze')
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        
+        if not items or not isinstance(items, list):
+            return jsonify({'error': 'No items provided'}), 400
+        for i, item in enumerate(items):
+            error = validate_content_item(item)
+            if error:
+                return jsonify({'error': f'Item {i}: {error}'}), 400
+        if kind not in job_worker.processors:
+            return jsonify({'error': f'Unknown job kind: {kind}'}), 400
+        
+        job, created = job_store.create(items, kind=kind, idempotency_key=idempotency_key)
+        job_worker.notify()
+        
+        return jsonify({
+            'success': True,
+            'created': created,
+            'job': job
+        }), 202 if created else 200
+        
+    except Exception as e:
+        logger.error(f"Job submission error: {str(e)}")
+        return jsonify({'error': 'Job submission failed'}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job progress plus finished results after the given item index"""
+    try:
+        job = job_store.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        after = int(request.args.get('after', -1))
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        results = [dict(result, index=idx) for idx, result in job_store.results(job_id, after, limit)]
+        
+        return respond({
+            'success': True,
+            'job': job,
+            'results': results,
+            'next_after': results[-1]['index'] if results else after
+        }, root='results.analysis')
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid after/limit parameter'}), 400
+    except Exception as e:
+        logger.error(f"Job lookup error: {str(e)}")
+        return jsonify({'error': 'Job lookup failed'}), 500
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def stream_job_results(job_id):
+    """
+    Stream results as NDJSON while the job runs, ending with the job status
+    
+    The stream also ends, with 'timed_out': true, when no new result arrives for
+    idle_timeout seconds (e.g. the worker died and nobody re-claimed the job);
+    the client can reconnect with ?after= to continue.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    try:
+        poll_interval = max(0.05, float(request.args.get('poll', 0.5)))
+        idle_timeout = float(request.args.get('idle_timeout', JOB_STREAM_IDLE_TIMEOUT))
+        after = int(request.args.get('after', -1))
+    except ValueError:
+        return jsonify({'error': 'Invalid poll/idle_timeout/after parameter'}), 400
+    
+    def generate(after):
+        last_progress = time.monotonic()
+        while True:
+            job = job_store.get(job_id)
+            for idx, result in job_store.results(job_id, after):
+                after = idx
+                last_progress = time.monotonic()
+                yield dumps_ndjson(dict(result, index=idx))
+            if job['status'] in FINISHED_STATES:
+                # Results written before the status flipped were read above
+                yield dumps_ndjson({'job': job})
+                return
+            if time.monotonic() - last_progress >= idle_timeout:
+                yield dumps_ndjson({'job': job, 'timed_out': True, 'next_after': after})
+                return
+            time.sleep(poll_interval)
+    
+    return Response(stream_with_context(generate(after)), mimetype='application/x-ndjson')
+
+@app.route('/jobs/<job_id>/export', methods=['GET'])
+def export_job_results(job_id):
+    """
+    Download a job's finished results as Parquet, an Arrow IPC stream or NDJSON
+    
+    For Parquet and Arrow, results are read from the store a page at a time into
+    a ColumnarResults, so a 100k-item job never exists as 100k nested dicts in
+    memory. NDJSON is streamed page by page straight from the stored JSON, so it
+    keeps full float precision.
+    """
+    try:
+        job = job_store.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        export_format = request.args.get('format', 'parquet')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+        if export_format != 'ndjson' and not PYARROW_AVAILABLE:
+            return jsonify({'error': f'{export_format} export requires pyarrow'}), 501
+        
+        headers = {'X-Job-Status': job['status']}
+        if export_format == 'ndjson':
+            mimetype, extension = EXPORT_FORMATS[export_format]
+            headers['Content-Disposition'] = f'attachment; filename={job_id}.{extension}'
+            body = stream_with_context(
+                dumps_ndjson(dict(result, index=idx)) for idx, result in stored_job_results(job_id)
+            )
+            return Response(body, mimetype=mimetype, headers=headers)
+        
+        results = ColumnarResults()
+        results.extend(dict(result, index=idx) for idx, result in stored_job_results(job_id))
+        return columnar_response(results, export_format, job_id, headers)
+        
+    except Exception as e:
+        logger.error(f"Job export error: {str(e)}")
+        return jsonify({'error': 'Job export failed'}), 500
+
+def stored_job_results(job_id):
+    """Yield a job's (idx, result) pairs, reading the store a page at a time"""
+    after = -1
+    while True:
+        page = job_store.results(job_id, after, EXPORT_PAGE_SIZE)
+        for idx, result in page:
+            yield idx, result
+        if len(page) < EXPORT_PAGE_SIZE:
+            return
+        after = page[-1][0]
+
+@app.route('/analytics/trends', methods=['POST'])
+def analytics_trends():
+    """Bucketed emotion, category and sentiment trends over a history of analyses"""
+    try:
+        data = request.get_json()
+        period = data.get('period', trend_analyzer.default_period)
+        window = data.get('window', trend_analyzer.default_window)
+        
+        # Callers may send columns directly to skip per-record conversion
+        columns = data.get('columns')
+        if columns is None:
+            items = data.get('items', [])
+            if not items:
+                return jsonify({'error': 'No items provided'}), 400
+            if not isinstance(items, list):
+                return jsonify({'error': 'items must be a list'}), 400
+            columns = trend_analyzer.to_columns(items)
+        elif not isinstance(columns, dict):
+            return jsonify({'error': 'columns must be an object'}), 400
+        
+        return respond({
+            'success': True,
+            'trends': trend_analyzer.compute_trends(columns, period, window)
+        }, root='trends')
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Trend analytics error: {str(e)}")
+        return jsonify({'error': 'Trend analytics failed'}), 500
+
+def parse_stream_item(line):
+    """Decode one NDJSON request line into {'id', 'content'} or {'id', 'error'}"""
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return {'id': None, 'error': 'Invalid JSON'}
+    if not isinstance(item, dict):
+        return {'id': None, 'error': 'Item must be an object'}
+    if not item.get('data'):
+        return {'id': item.get('id'), 'error': 'No content provided'}
+    return {'id': item.get('id'), 'content': {'type': item.get('type', 'text'), 'data': item['data']}}
+
+def analyze_items(items, cache=False):
+    """
+    Batch-analyze content items into per-item result envelopes
+    
+    Malformed items get an error result instead of failing the batch.
+    
+    Args:
+        items (list): Content items with 'type', 'data' and an optional 'id'
+        cache (bool): Cache each successful analysis and return its analysis_id
+        
+    Returns:
+        list: {'id', 'success', 'analysis'} or {'id', 'success', 'error'} per item
+    """
+    errors = [validate_content_item(item) for item in items]
+    valid = [item for item, error in zip(items, errors) if error is None]
+    analyses = iter(analyze_content_batch_internal(valid) if valid else ())
+    results = []
+    for item, error in zip(items, errors):
+        if error is not None:
+            results.append({
+                'id': item.get('id') if isinstance(item, dict) else None,
+                'success': False,
+                'error': error
+            })
+            continue
+        analysis = next(analyses)
+        success = 'error' not in analysis
+        result = {'id': item.get('id'), 'success': success}
+        if cache:
+            result['analysis_id'] = cache_analysis(item, analysis) if success else None
+        result['analysis'] = analysis
+        results.append(result)
+    return results
+
+def process_analysis_job(items):
+    """Job processor: batch-analyze items and cache each analysis"""
+    # Jobs stored before submit-time validation may hold malformed items
+    return analyze_items(items, cache=True)
+
+job_worker = JobWorker(job_store, {'analyze': process_analysis_job})
+
+def start_background_workers():
+    """Start per-process background threads (called after fork when the app is preloaded)"""
+    job_worker.start()
+    online_learner.start()
+    emotion_analyzer.start_loading()
+
+if os.environ.get('GUNICORN_PRELOAD') != '1':
+    job_worker.start()
+    online_learner.start()
+
+def validate_content_item(content):
+    """Reason a content item cannot be analyzed, or None when it is well formed"""
+    if not isinstance(content, dict):
+        return 'content must be an object with type and data'
+    if not content.get('data'):
+        return 'content has no data'
+    if not isinstance(content.get('type', 'text'), str):
+        return 'content type must be a string'
+    return None
+
+def get_content_text(content):
+    """Return the text payload of a text content item, or an empty string"""
+    if not isinstance(content, dict) or content.get('type', 'text') != 'text':
+        return ''
+    return content.get('data') or content.get('text') or ''
+
+def validate_insights_item(item):
+    """Reason an insights item cannot be processed, or None when it is well formed"""
+    if not isinstance(item, dict):
+        return 'Item must be an object'
+    capsule_data = item.get('capsule', {})
+    if not isinstance(capsule_data, dict):
+        return 'capsule must be an object'
+    if 'content' in capsule_data:
+        return validate_content_item(capsule_data['content'])
+    return None
+
+def resolve_cached_analysis(item, capsule_data, current_version):
+    """
+    Return a precomputed analysis, or one referenced by handle or cached for the content
+    
+    Cached analyses are reused only when their analyzer_version matches
+    current_version, as in diff_items; older ones are analyzed again.
+    """
+    analysis = item.get('analysis') or capsule_data.get('analysis')
+    if analysis:
+        return analysis
+    
+    analysis_id = item.get('analysis_id') or capsule_data.get('analysis_id')
+    if analysis_id:
+        analysis = analysis_cache.get(analysis_id)
+        if analysis is not None and analysis.get('analyzer_version') == current_version:
+            return analysis
+    
+    if 'content' in capsule_data:
+        analysis = analysis_cache.get_for_content(capsule_data['content'])
+        if analysis is not None and analysis.get('analyzer_version') == current_version:
+            return analysis
+    return None
+
+def build_insights(capsule_id, capsule_data, content_analysis, unlock_recommendations, related_capsules):
+    """Assemble the insights payload for one capsule"""
+    insights = {
+        'capsule_id': capsule_id,
+        'timestamp': datetime.utcnow().isoformat(),
+        'insights': []
+    }
+    
+    if content_analysis is not None:
+        insights['content_analysis'] = content_analysis
+    
+    if unlock_recommendations is not None:
+        insights['unlock_recommendations'] = unlock_recommendations
+    
+    insights['related_capsules'] = related_capsules
+    insights['sharing_suggestions'] = recommendation_engine.suggest_sharing(
+        capsule_data,
+        content_analysis or {},
+        related_capsules
+    )
+    return insights
+
+def find_related_capsules_batch(capsule_ids, capsules, k=5):
+    """Related capsules for many capsules, embedding unindexed texts in one batch"""
+    related = [[] for _ in capsule_ids]
+    to_embed = []
+    for i, (capsule_id, capsule) in enumerate(zip(capsule_ids, capsules)):
+        if capsule_id is not None and capsule_id in similarity_index:
+            related[i] = similarity_index.query_id(capsule_id, k=k, owner=capsule.get('user_id'))
+        elif get_content_text(capsule.get('content', {})):
+            to_embed.append(i)
+    
+    if to_embed:
+        vectors = content_classifier.embed([get_content_text(capsules[i]['content']) for i in to_embed])
+        for i, vector in zip(to_embed, vectors):
+            related[i] = similarity_index.query(
+                vector,
+                k=k,
+                owner=capsules[i].get('user_id'),
+                exclude=capsule_ids[i]
+            )
+    return related
+
+def find_related_capsules(capsule_id, capsule_data, k=5):
+    """Look up related capsules by id, or by embedding the capsule text"""
+    owner = capsule_data.get('user_id')
+    if capsule_id in similarity_index:
+        return similarity_index.query_id(capsule_id, k=k, owner=owner)
+    
+    text = get_content_text(capsule_data.get('content', {}))
+    if not text:
+        return []
+    vector = content_classifier.embed([text])[0]
+    return similarity_index.query(vector, k=k, owner=owner, exclude=capsule_id)
+
+def analyzer_versions(emotion_tier=None):
+    """Versions of every analyzer contributing to a content analysis"""
+    return {
+        'emotion': emotion_analyzer.get_version(emotion_tier),
+        'classifier': content_classifier.get_version(),
+        'text_processor': TextProcessor.VERSION,
+        'language': LanguageDetector.VERSION,
+        'topics': topic_engine.get_version()
+    }
+
+def stamp_analysis(content, analysis):
+    """Record the input fingerprint and composite analyzer version on an analysis"""
+    emotion_tier = (analysis.get('emotion') or {}).get('tier')
+    analysis['fingerprint'] = content_fingerprint(content)
+    analysis['analyzer_version'] = composite_version(analyzer_versions(emotion_tier))
+    return analysis
+
+def route_language(detection):
+    """
+    Pick the analysis pipeline for a language detection
+    
+    Returns:
+        str: 'full' for languages the models read (and undetermined or low
+            confidence detections, as before), 'basic' otherwise
+    """
+    if detection['language'] in ANALYSIS_LANGUAGES or detection['language'] == UNDETERMINED:
+        return 'full'
+    if detection['confidence'] < LANGUAGE_ROUTE_CONFIDENCE:
+        return 'full'
+    return 'basic'
+
+def language_field(detection, pipeline):
+    return {
+        'code': detection['language'],
+        'confidence': detection['confidence'],
+        'script': detection['script'],
+        'pipeline': pipeline
+    }
+
+def analyze_text(text, emotion=None):
+    """
+    Analyze one text through the pipeline for its language
+    
+    Args:
+        text (str): Raw text
+        emotion (dict): Emotion result borrowed from a near-identical text; its
+            sentiment is replaced with this text's, the model is not run
+    """
+    detection = language_detector.detect(text)
+    pipeline = route_language(detection)
+    if pipeline == 'basic':
+        return analyze_text_basic(text, detection)
+    
+    processed_text = text_processor.preprocess(text)
+    # Sentiment computed once and shared with emotion analysis
+    sentiment = text_processor.analyze_sentiment(processed_text)
+    vader_scores = SentimentEngine.vader_scores(sentiment)
+    if emotion is None:
+        emotion = emotion_analyzer.analyze(processed_text, vader_scores)
+    else:
+        emotion = dict(emotion, sentiment=sentiment_fields(vader_scores))
+    
+    return {
+        'emotion': emotion,
+        'classification': content_classifier.classify(processed_text),
+        'sentiment': sentiment,
+        'keywords': text_processor.extract_keywords(processed_text),
+        'topics': topic_engine.extract_topics(processed_text),
+        'language': language_field(detection, pipeline)
+    }
+
+def analyze_text_basic(text, detection):
+    """
+    Model-free analysis for languages the models cannot read
+    
+    The English normalizer strips non-ASCII letters and the models are
+    English-only, so instead of paying for inference on garbage this returns
+    neutral emotion and sentiment with language-aware keywords.
+    """
+    keywords = language_detector.extract_keywords(text, detection)
+    emotion = emotion_analyzer.fallback.analyze('')
+    emotion['tier'] = 'fallback'
+    
+    return {
+        'emotion': emotion,
+        'classification': {
+            'category': 'other',
+            'topic': None,
+            'priority': 'medium',
+            'confidence': {'category': 0.0, 'topic': 0.0, 'priority': 0.0},
+            'keywords': keywords,
+            'tags': [f"language-{detection['language']}"],
+            'processed_text': ' '.join(language_detector.words(text))
+        },
+        'sentiment': text_processor.analyze_sentiment(''),
+        'keywords': keywords,
+        'topics': [],
+        'language': language_field(detection, 'basic')
+    }
+
+def cache_analysis(content, analysis):
+    """
+    Cache an analysis and index its text for near-duplicate reuse
+    
+    Analyses that borrowed a near duplicate's emotion are not cached: a later
+    exact lookup of this content must not be served a borrowed result.
+    
+    Returns:
+        str: Analysis id, or None when the analysis was not cached
+    """
+    if 'near_duplicate_of' in analysis:
+        return None
+    analysis_id = analysis_cache.put(content, analysis)
+    if 'error' not in analysis:
+        register_near_duplicate(content)
+    return analysis_id
+
+def register_near_duplicate(content, key=None, owner=None):
+    """Index a text content item's SimHash under a capsule id (or its fingerprint)"""
+    text = get_content_text(content)
+    signature = near_duplicates.signature(text) if text else None
+    if signature is not None:
+        fingerprint = content_fingerprint(content)
+        near_duplicates.add(key or fingerprint, signature, fingerprint, owner=owner)
+
+def reuse_near_duplicate(content):
+    """
+    Analysis of a text that borrows the emotion result of a near-identical text
+    
+    Only the emotion model's output is reused (from analyses produced by the
+    current analyzer versions); sentiment, keywords, classification and topics
+    are computed for this text, since one swapped word can flip them.
+    
+    Returns:
+        dict: Stamped analysis with a near_duplicate_of reference, or None
+    """
+    if not NEAR_DUPLICATE_REUSE:
+        return None
+    text = get_content_text(content)
+    if not text:
+        return None
+    
+    for match in near_duplicates.query(near_duplicates.signature(text), limit=3):
+        analysis = analysis_cache.get(match['ref'])
+        if analysis is None or 'error' in analysis:
+            continue
+        emotion_tier = (analysis.get('emotion') or {}).get('tier')
+        if analysis.get('analyzer_version') != composite_version(analyzer_versions(emotion_tier)):
+            continue
+        if (analysis.get('language') or {}).get('pipeline') != 'full':
+            continue
+        reused = stamp_analysis(content, analyze_text(text, emotion=analysis['emotion']))
+        if reused['language']['pipeline'] != 'full':
+            # Routed to the basic pipeline, nothing was borrowed
+            return reused
+        reused['near_duplicate_of'] = {'analysis_id': match['ref'], 'similarity': match['similarity']}
+        return reused
+    return None
+
 def analyze_content_internal(content):
-    """Internal function to analyze content"""
+    """Internal function to analyze content and stamp it with fingerprint and version"""
+    reused = reuse_near_duplicate(content)
+    if reused is not None:
+        return reused
+    return stamp_analysis(content, _analyze_content(content))
+
+def _analyze_content(content):
     content_type = content.get('type', 'text')
     content_data = content.get('data', '')
     
     if content_type == 'text':
-        processed_text = text_processor.preprocess(content_data)
-        
-        return {
-            'emotion': emotion_analyzer.analyze(processed_text),
-            'classification': content_classifier.classify(processed_text),
-            'sentiment': text_processor.analyze_sentiment(processed_text),
-            'keywords': text_processor.extract_keywords(processed_text),
-            'topics': text_processor.extract_topics(processed_text)
-        }
+        return analyze_text(content_data)
     
     elif content_type in ['image', 'video']:
         return file_processor.analyze_visual_content(content_data)
@@ -253,6 +1282,73 @@ def analyze_content_internal(content):
     
     return {'error': 'Unsupported content type'}
 
+def analyze_content_batch_internal(contents):
+    """
+    Analyze many content items, running the text analyzers once over all text items
+    
+    Args:
+        contents (list): Content items with 'type' and 'data'
+        
+    Returns:
+        list: One analysis per item, in input order
+    """
+    results = [None] * len(contents)
+    candidate_indices = []
+    for i, content in enumerate(contents):
+        if content.get('type', 'text') != 'text':
+            results[i] = analyze_content_internal(content)
+            continue
+        results[i] = reuse_near_duplicate(content)
+        if results[i] is None:
+            candidate_indices.append(i)
+    
+    # Group by language so the batched models only see text they can read
+    detections = language_detector.detect_batch([contents[i].get('data', '') for i in candidate_indices])
+    text_indices = []
+    for i, detection in zip(candidate_indices, detections):
+        if route_language(detection) == 'full':
+            text_indices.append(i)
+        else:
+            results[i] = stamp_analysis(contents[i], analyze_text_basic(contents[i].get('data', ''), detection))
+    languages = {i: detection for i, detection in zip(candidate_indices, detections)}
+    
+    if text_indices:
+        processed_texts = text_processor.preprocess_many(
+            [contents[i].get('data', '') for i in text_indices]
+        )
+        sentiments = text_processor.analyze_sentiment_batch(processed_texts)
+        vader_scores = [SentimentEngine.vader_scores(sentiment) for sentiment in sentiments]
+        
+        # The transformer analyzer returns pooled embeddings from the same forward
+        # pass; topic scoring reads them instead of encoding the texts again
+        embeddings = None
+        if getattr(emotion_analyzer, 'provides_embeddings', False):
+            emotions, embeddings = emotion_analyzer.analyze_batch(
+                processed_texts, vader_scores, return_embeddings=True
+            )
+        else:
+            emotions = emotion_analyzer.analyze_batch(processed_texts, vader_scores)
+        classifications = content_classifier.classify_batch(processed_texts)
+        
+        if embeddings is not None and topic_engine.encoder_name == 'emotion':
+            topics = topic_engine.extract_topics_batch(embeddings=embeddings)
+        else:
+            topics = topic_engine.extract_topics_batch(processed_texts)
+        
+        for i, processed_text, emotion, classification, sentiment, text_topics in zip(
+                text_indices, processed_texts, emotions, classifications, sentiments, topics):
+            results[i] = {
+                'emotion': emotion,
+                'classification': classification,
+                'sentiment': sentiment,
+                'keywords': text_processor.extract_keywords(processed_text),
+                'topics': text_topics,
+                'language': language_field(languages[i], 'full')
+            }
+            stamp_analysis(contents[i], results[i])
+    
+    return results
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('FLASK_ENV') == 'development'
@@ -0,0 +1,19 @@
+"""
+ASGI entry point: the Flask app behind an ASGI adapter
+
+Used by SERVER_MODE=asgi (gunicorn with uvicorn workers). Requires asgiref and uvicorn.
+
+WsgiToAsgi reads the whole request body before calling the app, so
+/stream/analyze cannot reply while the client is still sending; it still
+answers every item, and marks the response X-Stream-Input: buffered.
+Interactive streaming needs a WSGI mode (sync or gthread).
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from app import BUFFERED_INPUT_KEY, app as flask_app
+
+def wsgi_app(environ, start_response):
+    environ[BUFFERED_INPUT_KEY] = True
+    return flask_app(environ, start_response)
+
+app = WsgiToAsgi(wsgi_app)
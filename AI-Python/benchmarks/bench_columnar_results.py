@@ -0,0 +1,103 @@
+"""
+Memory benchmark: a list of result dicts vs. ColumnarResults
+
+Builds synthetic job results shaped like real text analyses and measures the
+Python heap each representation holds (tracemalloc), plus encode and
+per-row decode time.
+
+Usage:
+    python benchmarks/bench_columnar_results.py [--items 100000]
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.columnar_results import ColumnarResults
+
+EMOTIONS = ['joy', 'sadness', 'anger', 'fear', 'surprise', 'neutral', 'love', 'optimism']
+CATEGORIES = ['personal', 'family', 'work', 'travel', 'celebration', 'other']
+WORDS = ['family', 'trip', 'beach', 'birthday', 'love', 'today', 'happy', 'miss', 'school', 'friends',
+         'dinner', 'graduation', 'wedding', 'summer', 'memories', 'remember', 'proud', 'baby', 'home', 'dog']
+
+def make_result(i, rng):
+    emotions = rng.sample(EMOTIONS, 3)
+    scores = sorted((rng.random() for _ in emotions), reverse=True)
+    words = rng.sample(WORDS, rng.randint(3, 8))
+    compound = round(rng.uniform(-1, 1), 4)
+    return {
+        'index': i,
+        'id': f'capsule-{i}',
+        'success': True,
+        'analysis_id': hashlib.sha1(str(i).encode()).hexdigest(),
+        'analysis': {
+            'emotion': {
+                'primary_emotion': emotions[0],
+                'secondary_emotion': emotions[1],
+                'confidence': scores[0],
+                'emotions': dict(zip(emotions, scores)),
+                'sentiment': {'neg': 0.1, 'neu': 0.6, 'pos': 0.3, 'compound': compound},
+                'category': 'positive',
+                'intensity': 'medium',
+                'recommendedUnlock': {'days': 7, 'rationale': 'Positive emotion - unlock soon to share joy'},
+                'contextualTags': ['positive-memory'],
+                'tier': 'transformer'
+            },
+            'classification': {
+                'category': rng.choice(CATEGORIES),
+                'topic': rng.choice(CATEGORIES),
+                'priority': 'medium',
+                'confidence': {'category': rng.random(), 'topic': rng.random(), 'priority': rng.random()},
+                'keywords': words,
+                'tags': words[:3],
+                'processed_text': ' '.join(words)
+            },
+            'sentiment': {'polarity': compound, 'subjectivity': 0.5, 'sentiment': 'positive',
+                          'compound': compound, 'pos': 0.3, 'neg': 0.1, 'neu': 0.6},
+            'keywords': words,
+            'topics': words[:2],
+            'language': {'code': 'en', 'confidence': 1.0, 'script': 'Latin', 'pipeline': 'full'},
+            'fingerprint': hashlib.sha1(f'content-{i}'.encode()).hexdigest(),
+            'analyzer_version': '2072b2cf4afd'
+        }
+    }
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100_000)
+    args = parser.parse_args()
+
+    def records():
+        rng = random.Random(42)
+        return (make_result(i, rng) for i in range(args.items))
+
+    dicts, dict_bytes, dict_time = measure(lambda: list(records()))
+    del dicts
+    columnar, columnar_bytes, columnar_time = measure(lambda: ColumnarResults.from_records(records()))
+
+    print(f'{args.items:,} results')
+    print(f'  list of dicts       {dict_bytes / 2 ** 20:10.1f} MiB   built in {dict_time:.2f}s')
+    print(f'  ColumnarResults     {columnar_bytes / 2 ** 20:10.1f} MiB   built in {columnar_time:.2f}s')
+    print(f'  reduction           {dict_bytes / columnar_bytes:10.1f}x')
+
+    start = time.perf_counter()
+    for record in columnar:
+        pass
+    print(f'  decode every row    {(time.perf_counter() - start) / len(columnar) * 1e6:10.1f} us/row')
+
+if __name__ == '__main__':
+    main()
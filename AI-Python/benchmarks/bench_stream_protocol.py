@@ -0,0 +1,97 @@
+"""
+Benchmark: per-request JSON analysis vs. the streaming NDJSON ingestion endpoint
+
+Runs against a live service (python app.py, or gunicorn -c gunicorn.conf.py app:app):
+    new-conn     one POST /analyze/content per item on a fresh connection
+                 (what the gateway's per-capsule loop does)
+    keep-alive   one POST /analyze/content per item over a single persistent connection
+    stream       all items as NDJSON lines in one chunked POST /stream/analyze
+
+Usage:
+    python benchmarks/bench_stream_protocol.py [--url http://127.0.0.1:5001] [--items 500] [--batch-size 32]
+"""
+import argparse
+import http.client
+import json
+import random
+import time
+from urllib.parse import urlparse
+
+WORDS = ['we', 'went', 'to', 'the', 'beach', 'with', 'family', 'so', 'happy', 'miss', 'you',
+         'birthday', 'party', 'dog', 'trip', 'work', 'project', 'grateful', 'concert', 'love']
+
+def make_items(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        {'id': i, 'type': 'text', 'data': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 25)))}
+        for i in range(n)
+    ]
+
+def post_json(connection, path, payload):
+    body = json.dumps(payload)
+    connection.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f'{path} returned {response.status}: {data[:200]!r}')
+    return json.loads(data)
+
+def run_new_connection(url, items):
+    for item in items:
+        connection = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        post_json(connection, '/analyze/content', {'content': item['data'], 'type': item['type']})
+        connection.close()
+
+def run_keep_alive(url, items):
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+    for item in items:
+        post_json(connection, '/analyze/content', {'content': item['data'], 'type': item['type']})
+    connection.close()
+
+def run_stream(url, items, batch_size):
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=300)
+    lines = (json.dumps(item).encode('utf-8') + b'\n' for item in items)
+    connection.request(
+        'POST', f'/stream/analyze?batch_size={batch_size}', body=lines,
+        headers={'Content-Type': 'application/x-ndjson'}, encode_chunked=True
+    )
+    response = connection.getresponse()
+    received = 0
+    for line in response:
+        record = json.loads(line)
+        if record.get('done'):
+            break
+        if record['id'] != received:
+            raise RuntimeError(f"out-of-order result {record['id']}, expected {received}")
+        received += 1
+    connection.close()
+    if received != len(items):
+        raise RuntimeError(f'received {received} of {len(items)} results')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://127.0.0.1:5001')
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--modes', nargs='+', default=['new-conn', 'keep-alive', 'stream'])
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    items = make_items(args.items)
+    runners = {
+        'new-conn': lambda: run_new_connection(url, items),
+        'keep-alive': lambda: run_keep_alive(url, items),
+        'stream': lambda: run_stream(url, items, args.batch_size)
+    }
+
+    print(f'{args.items} items against {args.url}')
+    baseline = None
+    for mode in args.modes:
+        start = time.perf_counter()
+        runners[mode]()
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f'  {mode:<11} {elapsed:8.2f} s  {args.items / elapsed:9.1f} items/s  {baseline / elapsed:6.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Microbenchmark: regex-per-call preprocessing vs. the translate-table normalizer
+
+Usage:
+    python benchmarks/bench_text_normalizer.py [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_normalizer import TextNormalizer
+
+def legacy_preprocess(text):
+    """Previous TextProcessor.preprocess implementation"""
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+WORDS = ['we', 'went', 'to', 'the', 'beach', 'with', 'Family', 'on', 'July', '4th,', '2024!',
+         'it', 'was', 'AMAZING', ':)', 'love', 'you', 'all', '--', 'Mom', '&', 'Dad.']
+
+def make_text(n_chars, seed=42, accents=False):
+    rng = random.Random(seed)
+    words = WORDS + ['café', 'über', 'niño'] if accents else WORDS
+    parts, length = [], 0
+    while length < n_chars:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)[:n_chars]
+
+def bench(label, func, number, repeat):
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f'  {label:<28} {best * 1e6:12.1f} us/call')
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    normalizer = TextNormalizer()
+
+    cases = [(size, False) for size in (200, 10_000, 1_000_000)] + [(10_000, True)]
+    for size, accents in cases:
+        text = make_text(size, accents=accents)
+        assert legacy_preprocess(text) == normalizer.normalize(text)
+        number = max(1, 200_000 // size)
+
+        print(f"text of {size:,} chars{' (non-ASCII)' if accents else ''}")
+        legacy = bench('regex (legacy)', lambda: legacy_preprocess(text), number, args.repeat)
+        current = bench('translate + split/join', lambda: normalizer.normalize(text), number, args.repeat)
+        print(f'  speedup {legacy / current:.2f}x')
+
+    texts = [make_text(300, seed=i) for i in range(10_000)]
+    print('batch of 10,000 texts x 300 chars')
+    legacy = bench('regex loop (legacy)', lambda: [legacy_preprocess(t) for t in texts], 1, args.repeat)
+    current = bench('normalize_many', lambda: normalizer.normalize_many(texts), 1, args.repeat)
+    print(f'  speedup {legacy / current:.2f}x')
+
+if __name__ == '__main__':
+    main()
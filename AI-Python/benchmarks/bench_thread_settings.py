@@ -0,0 +1,110 @@
+"""
+Benchmark: inference throughput vs. worker count and per-worker thread settings
+
+Launches W concurrent worker processes, each with T intra-op threads set through
+utils.runtime_config, and runs a fixed inference-like workload (BLAS matmuls and,
+when torch is installed, a small transformer-sized linear stack). Oversubscription
+(W x T > cores) shows up as lower aggregate throughput and a wider p95.
+
+Usage:
+    python benchmarks/bench_thread_settings.py [--workers 1 2 4] [--threads 1 2 4] [--iterations 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.runtime_config import available_cpus
+
+def child(iterations, worker_index, workers):
+    from utils.runtime_config import configure_worker
+    import numpy as np
+
+    configure_worker(worker_index, workers)
+
+    rng = np.random.default_rng(worker_index)
+    # Roughly one distilroberta layer's feed-forward for a batch of 16 x 64 tokens
+    activations = rng.standard_normal((1024, 768), dtype=np.float32)
+    weights = rng.standard_normal((768, 3072), dtype=np.float32)
+    projection = rng.standard_normal((3072, 768), dtype=np.float32)
+
+    try:
+        import torch
+        torch_inputs = torch.from_numpy(activations)
+        torch_layer = torch.nn.Sequential(torch.nn.Linear(768, 3072), torch.nn.GELU(), torch.nn.Linear(3072, 768))
+    except ImportError:
+        torch = None
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        hidden = np.maximum(activations @ weights, 0.0) @ projection
+        if torch is not None:
+            with torch.inference_mode():
+                torch_layer(torch_inputs)
+        latencies.append(time.perf_counter() - start)
+        del hidden
+
+    print(json.dumps({'latencies': latencies}))
+
+def run(workers, threads, iterations, pin):
+    env = dict(os.environ)
+    for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS', 'TOKENIZERS_PARALLELISM'):
+        env.pop(name, None)
+    env.update({
+        'WEB_CONCURRENCY': str(workers),
+        'INFERENCE_THREADS': str(threads),
+        'CPU_AFFINITY': '1' if pin else '0'
+    })
+
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, __file__, '--child', str(index), '--iterations', str(iterations)],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        for index in range(workers)
+    ]
+    latencies = []
+    for process in processes:
+        output, _ = process.communicate()
+        latencies.extend(json.loads(output.strip().splitlines()[-1])['latencies'])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    return workers * iterations / elapsed, p50, p95
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--threads', type=int, nargs='+')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--pin', action='store_true', help='pin each worker to its own CPU slice')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.iterations, args.child, int(os.environ['WEB_CONCURRENCY']))
+        return
+
+    cpus = available_cpus()
+    threads = args.threads or sorted({1, max(1, cpus // 2), cpus, cpus * 2})
+    print(f'{cpus} CPUs available{" (pinned workers)" if args.pin else ""}')
+    print(f"  {'workers':>7} {'threads':>7} {'total':>6} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for workers in args.workers:
+        for thread_count in threads:
+            rate, p50, p95 = run(workers, thread_count, args.iterations, args.pin)
+            flag = '  oversubscribed' if workers * thread_count > cpus else ''
+            print(f'  {workers:>7} {thread_count:>7} {workers * thread_count:>6} '
+                  f'{rate:9.1f} {p50:9.2f} {p95:9.2f}{flag}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: vocabulary TF-IDF vs. hashing featurization for the classifier heads
+
+Reports, per corpus size and vectorizer mode:
+    fit      - seconds to fit (fit_transform) on the corpus
+    peak     - peak Python heap allocated during the fit (tracemalloc)
+    model    - pickled size of the fitted vectorizer (what every worker keeps resident)
+    docs/s   - transform throughput on a held-out batch
+
+Usage:
+    python benchmarks/bench_vectorizers.py [--sizes 10000 100000 1000000] [--no-trace]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_analysis.model_registry import VECTORIZER_MODES, create_vectorizer
+
+def make_corpus(n_docs, vocabulary_size=50_000, doc_length=30, seed=42):
+    """Zipf-distributed synthetic documents so the bigram vocabulary grows like real text"""
+    rng = np.random.default_rng(seed)
+    words = np.array([f'w{i}' for i in range(vocabulary_size)])
+    ranks = np.minimum(rng.zipf(1.2, size=(n_docs, doc_length)), vocabulary_size) - 1
+    return [' '.join(row) for row in words[ranks]]
+
+def fit(mode, corpus, trace):
+    vectorizer = create_vectorizer(mode)
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    vectorizer.fit_transform(corpus)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return vectorizer, elapsed, peak
+
+def throughput(vectorizer, texts, repeat=3):
+    best = min(_timed(vectorizer.transform, texts) for _ in range(repeat))
+    return len(texts) / best
+
+def _timed(func, arg):
+    start = time.perf_counter()
+    func(arg)
+    return time.perf_counter() - start
+
+def megabytes(n_bytes):
+    return n_bytes / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--modes', nargs='+', default=list(VECTORIZER_MODES), choices=VECTORIZER_MODES)
+    parser.add_argument('--no-trace', action='store_true',
+                        help='skip tracemalloc (it slows the fit down noticeably)')
+    args = parser.parse_args()
+
+    held_out = make_corpus(10_000, seed=7)
+
+    for size in args.sizes:
+        corpus = make_corpus(size)
+        print(f'corpus of {size:,} documents')
+        print(f"  {'mode':<15} {'fit s':>9} {'peak MB':>9} {'model MB':>9} {'docs/s':>10}")
+        for mode in args.modes:
+            vectorizer, elapsed, peak = fit(mode, corpus, not args.no_trace)
+            model_size = len(pickle.dumps(vectorizer, protocol=pickle.HIGHEST_PROTOCOL))
+            rate = throughput(vectorizer, held_out)
+            peak_text = f'{megabytes(peak):9.1f}' if peak else f"{'-':>9}"
+            print(f'  {mode:<15} {elapsed:9.2f} {peak_text} {megabytes(model_size):9.2f} {rate:10,.0f}')
+        del corpus
+
+if __name__ == '__main__':
+    main()
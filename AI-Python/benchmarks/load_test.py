@@ -0,0 +1,117 @@
+"""
+Load test: throughput and latency of each gunicorn server mode
+
+For every mode, starts `gunicorn -c gunicorn.conf.py` with SERVER_MODE set,
+waits for /health, then runs concurrent keep-alive clients posting to
+/analyze/content and reports requests/s and latency percentiles. Requires
+gunicorn (and uvicorn + asgiref for the asgi mode).
+
+Usage:
+    python benchmarks/load_test.py [--modes sync gthread asgi] [--clients 16] [--duration 20] [--port 5090]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ['we', 'went', 'to', 'the', 'beach', 'with', 'family', 'so', 'happy', 'miss', 'you',
+         'birthday', 'party', 'dog', 'trip', 'work', 'project', 'grateful', 'concert', 'love']
+
+def start_server(mode, port, extra_env):
+    env = dict(os.environ, SERVER_MODE=mode, PORT=str(port), **extra_env)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def wait_healthy(port, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(1)
+    return False
+
+def client(port, stop_at, seed, latencies, errors):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    while time.time() < stop_at:
+        # Distinct text per request so the analysis cache does not serve it
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))) + f' {rng.random()}'
+        body = json.dumps({'content': text, 'type': 'text'})
+        start = time.perf_counter()
+        try:
+            connection.request('POST', '/analyze/content', body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+def run_load(port, clients, duration):
+    latencies, errors = [], []
+    stop_at = time.time() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, stop_at, seed, latencies, errors))
+        for seed in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=['sync', 'gthread', 'asgi'])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--port', type=int, default=5090)
+    parser.add_argument('--env', nargs='*', default=[], help='Extra KEY=VALUE settings for the server')
+    args = parser.parse_args()
+
+    extra_env = dict(item.split('=', 1) for item in args.env)
+    print(f'{args.clients} clients x {args.duration:.0f}s against POST /analyze/content')
+    print(f"  {'mode':<8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    for mode in args.modes:
+        server = start_server(mode, args.port, extra_env)
+        try:
+            if not wait_healthy(args.port):
+                print(f'  {mode:<8} server did not become healthy')
+                continue
+            run_load(args.port, args.clients, args.warmup)
+            latencies, errors = run_load(args.port, args.clients, args.duration)
+            if not latencies:
+                print(f'  {mode:<8} no successful requests ({len(errors)} errors)')
+                continue
+            p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+            print(f'  {mode:<8} {len(latencies) / args.duration:8.1f} {p50:8.1f} {p95:8.1f} {p99:8.1f} {len(errors):7d}')
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,59 @@
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import HashingVectorizer
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
-import re
 import logging
+import os
+import time
 from collections import Counter
 
+from utils.text_normalizer import default_normalizer
+from utils.latency_tracker import LatencyTracker
+from content_analysis.model_registry import (
+    HEADS, ModelBundle, resolve_head_models, create_model,
+    resolve_vectorizer_mode, create_vectorizer
+)
+from content_analysis.fused_heads import FusedLinearHeads
+
 logger = logging.getLogger(__name__)
 
+# Sample training data (in production, this would come from a database)
+SAMPLE_TRAINING_DATA = [
+    ("I love spending time with my family", "family", "love", "high"),
+    ("Work presentation went great today", "work", "career", "medium"),
+    ("Beautiful sunset at the beach", "personal", "nature", "low"),
+    ("Graduation day was amazing", "memories", "celebration", "high"),
+    ("Learning to play guitar", "creative", "music", "medium"),
+    ("Doctor appointment tomorrow", "health", "health", "medium"),
+    ("Delicious dinner with friends", "relationships", "food", "low"),
+    ("Traveling to Paris next month", "travel", "travel", "high"),
+    ("Finished reading a great book", "education", "education", "low"),
+    ("Playing soccer with the team", "personal", "sports", "medium")
+]
+
 class ContentClassifier:
-    def __init__(self):
-        """Initialize content classification models"""
+    # Bump when preprocessing, keywords or tag generation change
+    VERSION = '1.2.0'
+
+    def __init__(self, head_models=None, fuse_heads=None, vectorizer_mode=None):
+        """
+        Initialize content classification models
+        
+        Args:
+            head_models (dict): Optional head -> registry model name overrides
+                for the 'category', 'topic' and 'priority' heads
+            fuse_heads (bool): Stack linear heads into one multi-output model;
+                defaults to the CLASSIFIER_FUSE_HEADS environment variable (on)
+            vectorizer_mode (str): 'tfidf', 'hashing' or 'hashing_tfidf'; defaults
+                to the CLASSIFIER_VECTORIZER environment variable (tfidf)
+        """
         try:
+            if fuse_heads is None:
+                fuse_heads = os.environ.get('CLASSIFIER_FUSE_HEADS', '1') != '0'
+            self.fuse_heads = fuse_heads
+            
             # Download required NLTK data
             try:
                 nltk.data.find('tokenizers/punkt')
@@ -31,19 +68,24 @@ class ContentClassifier:
             self.stop_words = set(stopwords.words('english'))
             self.lemmatizer = WordNetLemmatizer()
             
-            # Initialize vectorizer
-            self.vectorizer = TfidfVectorizer(
-                max_features=5000,
-                stop_words='english',
+            # Initialize vectorizer (tfidf vocabulary or fixed-size hashing)
+            self.vectorizer_mode = resolve_vectorizer_mode(vectorizer_mode)
+            vectorizer = create_vectorizer(self.vectorizer_mode)
+            
+            # Stateless hashed embedding used for similarity search; needs no fit
+            # so vectors stay comparable across restarts and vocabulary changes
+            self.embedding_dim = 256
+            self.embedding_vectorizer = HashingVectorizer(
+                n_features=self.embedding_dim,
                 ngram_range=(1, 2),
-                min_df=2,
-                max_df=0.95
+                alternate_sign=True,
+                norm='l2'
             )
             
-            # Initialize classifiers
-            self.category_classifier = None
-            self.topic_classifier = None
-            self.priority_classifier = None
+            # Initialize classifier heads from the model registry
+            self.head_models = resolve_head_models(head_models)
+            self.head_latency = LatencyTracker()
+            self._bundle = None
             
             # Define content categories
             self.categories = [
@@ -58,8 +100,11 @@ class ContentClassifier:
                 'technology', 'nature', 'pets', 'celebration', 'reflection'
             ]
             
+            # Define priorities
+            self.priorities = ['low', 'medium', 'high']
+            
             # Initialize with sample data for demonstration
-            self._initialize_with_sample_data()
+            self._initialize_with_sample_data(vectorizer)
             
             logger.info("Content classifier initialized successfully")
             
@@ -67,131 +112,211 @@ class ContentClassifier:
             logger.error(f"Failed to initialize content classifier: {str(e)}")
             raise
 
-    def _initialize_with_sample_data(self):
+    def _initialize_with_sample_data(self, vectorizer):
         """Initialize classifiers with sample training data"""
         try:
-            # Sample training data (in production, this would come from a database)
-            sample_data = [
-                ("I love spending time with my family", "family", "love", "high"),
-                ("Work presentation went great today", "work", "career", "medium"),
-                ("Beautiful sunset at the beach", "personal", "nature", "low"),
-                ("Graduation day was amazing", "memories", "celebration", "high"),
-                ("Learning to play guitar", "creative", "music", "medium"),
-                ("Doctor appointment tomorrow", "health", "health", "medium"),
-                ("Delicious dinner with friends", "relationships", "food", "low"),
-                ("Traveling to Paris next month", "travel", "travel", "high"),
-                ("Finished reading a great book", "education", "education", "low"),
-                ("Playing soccer with the team", "personal", "sports", "medium")
-            ]
-            
-            texts = [item[0] for item in sample_data]
-            categories = [item[1] for item in sample_data]
-            topics = [item[2] for item in sample_data]
-            priorities = [item[3] for item in sample_data]
+            texts = [item[0] for item in SAMPLE_TRAINING_DATA]
+            categories = [item[1] for item in SAMPLE_TRAINING_DATA]
+            topics = [item[2] for item in SAMPLE_TRAINING_DATA]
+            priorities = [item[3] for item in SAMPLE_TRAINING_DATA]
             
             # Vectorize texts
-            X = self.vectorizer.fit_transform(texts)
+            X = vectorizer.fit_transform(texts)
             
-            # Train category classifier
-            self.category_classifier = MultinomialNB()
-            self.category_classifier.fit(X, categories)
+            # Train one model per head
+            labels = {'category': categories, 'topic': topics, 'priority': priorities}
+            heads = {}
+            for head in HEADS:
+                model = create_model(self.head_models[head])
+                model.fit(X, labels[head])
+                heads[head] = model
             
-            # Train topic classifier
-            self.topic_classifier = LogisticRegression(random_state=42)
-            self.topic_classifier.fit(X, topics)
-            
-            # Train priority classifier
-            self.priority_classifier = RandomForestClassifier(random_state=42)
-            self.priority_classifier.fit(X, priorities)
-            
-            logger.info("Sample data training completed")
+            logger.info(f"Sample data training completed ({self.head_models})")
             
         except Exception as e:
             logger.error(f"Sample data training failed: {str(e)}")
             # Initialize with dummy classifiers
-            self.category_classifier = MultinomialNB()
-            self.topic_classifier = LogisticRegression(random_state=42)
-            self.priority_classifier = RandomForestClassifier(random_state=42)
+            heads = {head: create_model(self.head_models[head]) for head in HEADS}
+        
+        self.swap_models(vectorizer, heads, self.head_models)
 
-    def classify(self, text):
+    def swap_models(self, vectorizer, heads, model_names, online_generation=0):
         """
-        Classify content into categories, topics, and priority
+        Atomically replace the serving vectorizer and heads
+        
+        In-flight requests keep using the bundle they started with; new requests
+        pick up the replacement. No lock is needed on the read path because the
+        swap is a single reference assignment.
         
         Args:
-            text (str): Input text to classify
+            vectorizer: Fitted (or stateless) vectorizer producing the heads' features
+            heads (dict): head -> fitted classifier
+            model_names (dict): head -> registry model name, for reporting
+            online_generation (int): Generation of the shared online models being
+                served, 0 for the configured heads; part of get_version
             
         Returns:
-            dict: Classification results
+            int: Generation number of the new bundle
         """
-        try:
-            if not text or len(text.strip()) == 0:
-                return {
-                    'category': 'other',
-                    'topic': 'other',
-                    'priority': 'low',
-                    'confidence': 0.0,
-                    'keywords': [],
-                    'tags': []
-                }
-            
-            # Preprocess text
-            processed_text = self._preprocess_text(text)
-            
-            # Vectorize text
-            text_vector = self.vectorizer.transform([processed_text])
-            
-            # Get predictions
-            category = self.category_classifier.predict(text_vector)[0]
-            topic = self.topic_classifier.predict(text_vector)[0]
-            priority = self.priority_classifier.predict(text_vector)[0]
-            
-            # Get confidence scores
-            category_proba = self.category_classifier.predict_proba(text_vector)[0]
-            topic_proba = self.topic_classifier.predict_proba(text_vector)[0]
-            priority_proba = self.priority_classifier.predict_proba(text_vector)[0]
-            
-            category_confidence = max(category_proba)
-            topic_confidence = max(topic_proba)
-            priority_confidence = max(priority_proba)
+        fused = FusedLinearHeads.from_heads(heads) if self.fuse_heads else None
+        generation = self._bundle.generation + 1 if self._bundle else 1
+        self._bundle = ModelBundle(vectorizer, dict(heads), fused, dict(model_names), generation, online_generation)
+        logger.info(f"Classifier models swapped in (generation {generation})")
+        return generation
+
+    @property
+    def vectorizer(self):
+        return self._bundle.vectorizer
+
+    @property
+    def heads(self):
+        return self._bundle.heads
+
+    @property
+    def fused_heads(self):
+        return self._bundle.fused
+
+    @property
+    def model_generation(self):
+        return self._bundle.generation
+
+    @property
+    def online_generation(self):
+        return self._bundle.online_generation
+
+    @property
+    def category_classifier(self):
+        return self.heads.get('category')
+
+    @property
+    def topic_classifier(self):
+        return self.heads.get('topic')
+
+    @property
+    def priority_classifier(self):
+        return self.heads.get('priority')
+
+    def _predict_head(self, head, text_vector, bundle):
+        """
+        Run one classification head with a single predict_proba call
+        
+        Args:
+            head (str): Head name
+            text_vector: Vectorized input rows
+            bundle (ModelBundle): Model snapshot to evaluate
             
-            # Extract keywords and tags
-            keywords = self._extract_keywords(processed_text)
-            tags = self._generate_tags(text, category, topic)
+        Returns:
+            tuple: (labels array, confidence array)
+        """
+        model = bundle.heads[head]
+        start = time.perf_counter()
+        proba = model.predict_proba(text_vector)
+        best = proba.argmax(axis=1)
+        self.head_latency.record(head, time.perf_counter() - start)
+        return model.classes_[best], proba[np.arange(proba.shape[0]), best]
+
+    def _predict_heads(self, text_vectors, bundle):
+        """
+        Predict every head, evaluating fused linear heads as one sparse dot product
+        
+        Args:
+            text_vectors: Vectorized input rows
+            bundle (ModelBundle): Model snapshot to evaluate
             
-            return {
-                'category': category,
-                'topic': topic,
-                'priority': priority,
-                'confidence': {
-                    'category': float(category_confidence),
-                    'topic': float(topic_confidence),
-                    'priority': float(priority_confidence)
-                },
-                'keywords': keywords,
-                'tags': tags,
-                'processed_text': processed_text
+        Returns:
+            dict: head -> (labels array, confidence array)
+        """
+        predictions = {}
+        fused = bundle.fused
+        if fused is not None:
+            start = time.perf_counter()
+            predictions.update(fused.predict(text_vectors))
+            self.head_latency.record('fused', time.perf_counter() - start)
+        
+        for head in HEADS:
+            if head not in predictions:
+                predictions[head] = self._predict_head(head, text_vectors, bundle)
+        return predictions
+
+    def get_version(self):
+        """
+        Version string covering the code, feature mode and configured model of each head
+
+        Once online heads trained from feedback are served, their shared
+        generation is appended, so predictions that changed with feedback are
+        not reported as unchanged. Every worker loads the same generation from
+        the online model store, so workers agree once they have synced.
+        """
+        models = ','.join(f'{head}={self.head_models[head]}' for head in HEADS)
+        version = f'{self.VERSION}:{self.vectorizer_mode}:{models}'
+        online_generation = self.online_generation
+        if online_generation:
+            version += f':online-{online_generation}'
+        return version
+
+    def get_head_latency(self):
+        """
+        Get per-head model names and recent latency statistics
+        
+        Returns:
+            dict: head -> {'model', 'latency'}, plus 'fused' for the stacked heads
+        """
+        bundle = self._bundle
+        stats = {
+            head: {
+                'model': bundle.model_names[head],
+                'latency': self.head_latency.stats(head)
             }
+            for head in HEADS
+        }
+        stats['fused'] = {
+            'heads': sorted(bundle.fused.heads) if bundle.fused else [],
+            'latency': self.head_latency.stats('fused')
+        }
+        stats['generation'] = bundle.generation
+        return stats
+
+    def classify(self, text):
+        """
+        Classify content into categories, topics, and priority
+        
+        Args:
+            text (str): Input text to classify
             
-        except Exception as e:
-            logger.error(f"Content classification failed: {str(e)}")
-            return {
-                'category': 'other',
-                'topic': 'other',
-                'priority': 'low',
-                'confidence': {'category': 0.0, 'topic': 0.0, 'priority': 0.0},
-                'keywords': [],
-                'tags': [],
-                'error': str(e)
-            }
+        Returns:
+            dict: Classification results
+        """
+        return self.classify_batch([text])[0]
+
+    def _build_result(self, text, processed_text, predictions, row):
+        """Assemble one classification result from batched head predictions"""
+        category = predictions['category'][0][row]
+        topic = predictions['topic'][0][row]
+        priority = predictions['priority'][0][row]
+        
+        # Extract keywords and tags
+        keywords = self._extract_keywords(processed_text)
+        tags = self._generate_tags(text, category, topic)
+        
+        return {
+            'category': category,
+            'topic': topic,
+            'priority': priority,
+            'confidence': {
+                'category': float(predictions['category'][1][row]),
+                'topic': float(predictions['topic'][1][row]),
+                'priority': float(predictions['priority'][1][row])
+            },
+            'keywords': keywords,
+            'tags': tags,
+            'processed_text': processed_text
+        }
 
-    def _preprocess_text(self, text):
-        """Preprocess text for classification"""
+    def preprocess(self, text):
+        """Normalize, tokenize, drop stopwords and lemmatize text the way the heads expect"""
         try:
-            # Convert to lowercase
-            text = text.lower()
-            
-            # Remove special characters and numbers
-            text = re.sub(r'[^a-zA-Z\s]', '', text)
+            # Lowercase and remove special characters and numbers
+            text = default_normalizer.normalize(text)
             
             # Tokenize
             tokens = word_tokenize(text)
@@ -257,7 +382,7 @@ class ContentClassifier:
 
     def classify_batch(self, texts):
         """
-        Classify multiple texts
+        Classify multiple texts with one vectorizer pass and one fused head evaluation
         
         Args:
             texts (list): List of texts to classify
@@ -265,12 +390,72 @@ class ContentClassifier:
         Returns:
             list: List of classification results
         """
-        results = []
-        for text in texts:
-            result = self.classify(text)
-            results.append(result)
+        results = [None] * len(texts)
+        rows = []
+        for i, text in enumerate(texts):
+            if not text or len(text.strip()) == 0:
+                results[i] = {
+                    'category': 'other',
+                    'topic': 'other',
+                    'priority': 'low',
+                    'confidence': 0.0,
+                    'keywords': [],
+                    'tags': []
+                }
+            else:
+                rows.append(i)
+        
+        if not rows:
+            return results
+        
+        try:
+            # Pin one model snapshot for the whole batch
+            bundle = self._bundle
+            
+            # Preprocess and vectorize all texts at once
+            processed_texts = [self.preprocess(texts[i]) for i in rows]
+            text_vectors = bundle.vectorizer.transform(processed_texts)
+            
+            # Get predictions and confidence scores for every head
+            predictions = self._predict_heads(text_vectors, bundle)
+            
+            for row, (i, processed_text) in enumerate(zip(rows, processed_texts)):
+                results[i] = self._build_result(texts[i], processed_text, predictions, row)
+            
+        except Exception as e:
+            logger.error(f"Content classification failed: {str(e)}")
+            for i in rows:
+                results[i] = {
+                    'category': 'other',
+                    'topic': 'other',
+                    'priority': 'low',
+                    'confidence': {'category': 0.0, 'topic': 0.0, 'priority': 0.0},
+                    'keywords': [],
+                    'tags': [],
+                    'error': str(e)
+                }
+        
         return results
 
+    def embed(self, texts):
+        """
+        Compute dense content embeddings for similarity search
+        
+        Args:
+            texts (list): List of texts to embed
+            
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), embedding_dim), L2-normalized
+        """
+        try:
+            processed = [self.preprocess(text) if text else '' for text in texts]
+            vectors = self.embedding_vectorizer.transform(processed)
+            return vectors.toarray().astype(np.float32)
+            
+        except Exception as e:
+            logger.error(f"Content embedding failed: {str(e)}")
+            return np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+
     def get_classification_stats(self, classification_data):
         """
         Get statistics about classification results
@@ -0,0 +1,136 @@
+import numpy as np
+import logging
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+logger = logging.getLogger(__name__)
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+def _sigmoid(scores):
+    return 1.0 / (1.0 + np.exp(-scores))
+
+def _ovr_normalize(scores):
+    """One-vs-rest sigmoid probabilities normalized per row (sklearn's OvR predict_proba)"""
+    proba = _sigmoid(scores)
+    totals = proba.sum(axis=1, keepdims=True)
+    zero_rows = totals[:, 0] == 0
+    proba[zero_rows] = 1.0 / proba.shape[1]
+    totals[zero_rows] = 1.0
+    return proba / totals
+
+def _linear_form(model):
+    """
+    Express a fitted model's predict_proba as link(X @ W.T + b)
+
+    Returns:
+        tuple: (weights, intercept, link) or None if the model is not a supported linear model
+    """
+    n_classes = len(getattr(model, 'classes_', ()))
+    if n_classes < 2:
+        return None
+
+    if type(model) is MultinomialNB:
+        return model.feature_log_prob_, model.class_log_prior_, 'softmax'
+
+    if type(model) is LogisticRegression:
+        ovr = getattr(model, 'multi_class', 'auto') == 'ovr' or model.solver == 'liblinear'
+        if n_classes == 2:
+            return model.coef_, model.intercept_, 'binary'
+        return model.coef_, model.intercept_, 'ovr' if ovr else 'softmax'
+
+    if type(model) is SGDClassifier and model.loss in ('log_loss', 'log'):
+        if n_classes == 2:
+            return model.coef_, model.intercept_, 'binary'
+        return model.coef_, model.intercept_, 'ovr'
+
+    return None
+
+class FusedLinearHeads:
+    def __init__(self, heads, weights, intercepts, slices, links):
+        """
+        Multi-output linear model over several classification heads
+
+        Use from_heads to build one; heads that are not linear are left out.
+        """
+        self.heads = heads
+        self.classes = {head: model.classes_ for head, model in heads.items()}
+        self._weights = weights
+        self._intercepts = intercepts
+        self._slices = slices
+        self._links = links
+
+    @classmethod
+    def from_heads(cls, heads):
+        """
+        Stack the linear heads into one (n_features x total_outputs) matrix
+
+        Args:
+            heads (dict): head name -> fitted classifier
+
+        Returns:
+            FusedLinearHeads: or None when fewer than two heads can be fused
+        """
+        fused, blocks, intercepts, slices, links = {}, [], [], {}, {}
+        offset = 0
+        for head, model in heads.items():
+            try:
+                form = _linear_form(model)
+            except AttributeError:
+                form = None
+            if form is None:
+                continue
+            weights, intercept, link = form
+            fused[head] = model
+            blocks.append(np.asarray(weights, dtype=np.float64))
+            intercepts.append(np.asarray(intercept, dtype=np.float64))
+            slices[head] = slice(offset, offset + blocks[-1].shape[0])
+            links[head] = link
+            offset += blocks[-1].shape[0]
+
+        if len(fused) < 2:
+            return None
+
+        weights = np.ascontiguousarray(np.vstack(blocks).T)
+        return cls(fused, weights, np.concatenate(intercepts), slices, links)
+
+    def predict_proba(self, X):
+        """
+        Evaluate every fused head with one sparse x dense product
+
+        Args:
+            X: Sparse or dense feature rows
+
+        Returns:
+            dict: head -> probability matrix with columns in classes_ order
+        """
+        scores = np.asarray(X @ self._weights) + self._intercepts
+        probabilities = {}
+        for head, columns in self._slices.items():
+            block = scores[:, columns]
+            link = self._links[head]
+            if link == 'softmax':
+                probabilities[head] = _softmax(block.copy())
+            elif link == 'binary':
+                positive = _sigmoid(block[:, 0])
+                probabilities[head] = np.column_stack([1.0 - positive, positive])
+            else:
+                probabilities[head] = _ovr_normalize(block)
+        return probabilities
+
+    def predict(self, X):
+        """
+        Labels and confidences for every fused head
+
+        Returns:
+            dict: head -> (labels array, confidence array)
+        """
+        results = {}
+        for head, proba in self.predict_proba(X).items():
+            best = proba.argmax(axis=1)
+            results[head] = (self.classes[head][best], proba[np.arange(proba.shape[0]), best])
+        return results
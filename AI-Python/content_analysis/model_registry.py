@@ -0,0 +1,245 @@
+import os
+import logging
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+from sklearn.naive_bayes import MultinomialNB, ComplementNB
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Every registered model must implement predict_proba so a head needs one call per prediction
+MODEL_FACTORIES = {
+    'multinomial_nb': lambda: MultinomialNB(),
+    'complement_nb': lambda: ComplementNB(),
+    'logistic_regression': lambda: LogisticRegression(random_state=42, max_iter=1000),
+    'sgd': lambda: SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42),
+    'random_forest': lambda: RandomForestClassifier(n_estimators=100, random_state=42)
+}
+
+HEADS = ('category', 'topic', 'priority')
+
+# Linear models throughout: they run directly on sparse TF-IDF rows
+DEFAULT_HEAD_MODELS = {
+    'category': 'multinomial_nb',
+    'topic': 'logistic_regression',
+    'priority': 'logistic_regression'
+}
+
+def resolve_head_models(overrides=None):
+    """
+    Resolve the model name for each classification head
+
+    Precedence: explicit overrides, then CLASSIFIER_<HEAD>_MODEL environment
+    variables, then DEFAULT_HEAD_MODELS.
+
+    Args:
+        overrides (dict): Optional head -> model name mapping
+
+    Returns:
+        dict: head -> model name
+    """
+    overrides = overrides or {}
+    resolved = {}
+    for head in HEADS:
+        name = overrides.get(head) or os.environ.get(f'CLASSIFIER_{head.upper()}_MODEL') or DEFAULT_HEAD_MODELS[head]
+        if name not in MODEL_FACTORIES:
+            logger.warning(f"Unknown model '{name}' for {head} head, using {DEFAULT_HEAD_MODELS[head]}")
+            name = DEFAULT_HEAD_MODELS[head]
+        resolved[head] = name
+    return resolved
+
+def create_model(name):
+    """Instantiate an unfitted model from the registry"""
+    return MODEL_FACTORIES[name]()
+
+# Feature extraction modes for the classifier heads:
+#   tfidf          - fitted vocabulary (dict of every kept n-gram), capped at max_features
+#   hashing        - stateless hashing trick, fixed n_features columns and no fit
+#   hashing_tfidf  - hashing followed by an IDF reweighting fitted on the corpus (one
+#                    float per column, so memory stays fixed regardless of corpus size)
+VECTORIZER_MODES = ('tfidf', 'hashing', 'hashing_tfidf')
+DEFAULT_VECTORIZER_MODE = 'tfidf'
+DEFAULT_HASH_FEATURES = 2 ** 16
+
+def resolve_vectorizer_mode(mode=None):
+    """
+    Resolve the feature extraction mode
+
+    Precedence: explicit mode, then the CLASSIFIER_VECTORIZER environment
+    variable, then DEFAULT_VECTORIZER_MODE.
+    """
+    mode = mode or os.environ.get('CLASSIFIER_VECTORIZER') or DEFAULT_VECTORIZER_MODE
+    if mode not in VECTORIZER_MODES:
+        logger.warning(f"Unknown vectorizer mode '{mode}', using {DEFAULT_VECTORIZER_MODE}")
+        mode = DEFAULT_VECTORIZER_MODE
+    return mode
+
+def create_vectorizer(mode, n_features=None, min_df=2):
+    """
+    Instantiate an unfitted vectorizer for the classifier heads
+
+    Args:
+        mode (str): One of VECTORIZER_MODES
+        n_features (int): Hashing space size for the hashing modes; defaults to the
+            CLASSIFIER_HASH_FEATURES environment variable or DEFAULT_HASH_FEATURES
+        min_df (int): Minimum document frequency for the tfidf vocabulary
+
+    Returns:
+        object: Vectorizer with fit_transform and transform
+    """
+    if mode == 'tfidf':
+        return TfidfVectorizer(
+            max_features=5000,
+            stop_words='english',
+            ngram_range=(1, 2),
+            min_df=min_df,
+            max_df=0.95
+        )
+    
+    n_features = n_features or int(os.environ.get('CLASSIFIER_HASH_FEATURES', DEFAULT_HASH_FEATURES))
+    # Non-negative features so MultinomialNB heads can consume them
+    hashing = HashingVectorizer(
+        n_features=n_features,
+        stop_words='english',
+        ngram_range=(1, 2),
+        alternate_sign=False,
+        norm=None if mode == 'hashing_tfidf' else 'l2'
+    )
+    if mode == 'hashing_tfidf':
+        return make_pipeline(hashing, TfidfTransformer())
+    return hashing
+
+# Heads trained online need partial_fit; NB for the many-class category head, SGD elsewhere
+ONLINE_HEAD_MODELS = {
+    'category': 'multinomial_nb',
+    'topic': 'sgd',
+    'priority': 'sgd'
+}
+
+class ModelBundle:
+    """
+    Immutable snapshot of everything needed to serve a classification
+
+    ContentClassifier swaps whole bundles by reference so readers never see a
+    vectorizer from one training run paired with heads from another.
+    """
+
+    __slots__ = ('vectorizer', 'heads', 'fused', 'model_names', 'generation', 'online_generation')
+
+    def __init__(self, vectorizer, heads, fused, model_names, generation, online_generation=0):
+        self.vectorizer = vectorizer
+        self.heads = heads
+        self.fused = fused
+        self.model_names = model_names
+        self.generation = generation
+        self.online_generation = online_generation
+
+DEFAULT_ONLINE_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'online_models.sqlite3'
+)
+
+ONLINE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS online_models (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+class OnlineModelStore:
+    def __init__(self, path=None):
+        """
+        Latest snapshot of the online heads, shared by every worker process on the host
+
+        One row holds the pickled models with a generation counter and the number
+        of feedback samples they were trained on. Updates run in an immediate
+        transaction, so two workers training at once apply their batches one
+        after the other instead of overwriting each other, and a recycled worker
+        reloads the snapshot instead of starting over.
+
+        Args:
+            path (str): Database file; defaults to ONLINE_MODELS_DB_PATH or data/online_models.sqlite3
+        """
+        try:
+            self.path = path or os.environ.get('ONLINE_MODELS_DB_PATH', DEFAULT_ONLINE_DB_PATH)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._local = threading.local()
+            self._connect().executescript(ONLINE_SCHEMA)
+            logger.info(f"Online model store initialized at {self.path}")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize online model store: {str(e)}")
+            raise
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        # A connection inherited across fork (preloaded server) must not be reused
+        if connection is not None and self._local.pid != os.getpid():
+            connection = None
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def generation(self):
+        """Generation of the stored snapshot, 0 when there is none (cheap; no unpickling)"""
+        row = self._connect().execute('SELECT generation FROM online_models WHERE id = 1').fetchone()
+        return row[0] if row else 0
+
+    def load(self):
+        """
+        Stored snapshot
+
+        Returns:
+            dict: 'generation', 'samples' and the pickled 'state', or None
+        """
+        row = self._connect().execute(
+            'SELECT generation, samples, state FROM online_models WHERE id = 1'
+        ).fetchone()
+        return self._snapshot(row)
+
+    def update(self, apply):
+        """
+        Replace the snapshot with apply(current snapshot or None), atomically across processes
+
+        Args:
+            apply (callable): Returns the new {'generation', 'samples', 'state'}
+
+        Returns:
+            dict: The snapshot written
+        """
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT generation, samples, state FROM online_models WHERE id = 1'
+            ).fetchone()
+            snapshot = apply(self._snapshot(row))
+            connection.execute(
+                'INSERT OR REPLACE INTO online_models (id, generation, samples, state, updated_at) '
+                'VALUES (1, ?, ?, ?, ?)',
+                (snapshot['generation'], snapshot['samples'], pickle.dumps(snapshot['state']),
+                 datetime.utcnow().isoformat())
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return snapshot
+
+    def _snapshot(self, row):
+        if row is None:
+            return None
+        return {'generation': row[0], 'samples': row[1], 'state': pickle.loads(row[2])}
@@ -0,0 +1,310 @@
+import logging
+import os
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from utils.text_normalizer import default_normalizer
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_BITS = 64
+_SHIFTS = np.arange(SIGNATURE_BITS, dtype=np.uint64)
+# Set-bit count of every 16-bit value; four lookups give a 64-bit popcount
+_POPCOUNT16 = np.array([bin(i).count('1') for i in range(1 << 16)], dtype=np.uint8)
+_MASK16 = np.uint64(0xFFFF)
+
+def hamming_distances(signatures, signature):
+    """Bit differences between each signature in an array and one signature"""
+    diff = np.bitwise_xor(signatures, np.uint64(signature))
+    total = np.zeros(diff.shape, dtype=np.uint8)
+    for shift in (0, 16, 32, 48):
+        total += _POPCOUNT16[(diff >> np.uint64(shift)) & _MASK16]
+    return total
+
+class NearDuplicateIndex:
+    def __init__(self, bands=4, threshold=None, min_tokens=5, initial_capacity=1024):
+        """
+        SimHash index for finding near-identical texts
+
+        Each text gets a 64-bit SimHash over its word unigrams and bigrams
+        (the tokens the text pipeline already uses). Signatures live in one
+        uint64 array; lookups go through LSH banding: the signature is cut into
+        `bands` slices and candidates must match one slice exactly, which
+        guarantees recall for up to bands - 1 differing bits. Each band is a
+        sorted key array searched with searchsorted, plus a short unsorted tail
+        of recent inserts that is merged in when it grows.
+
+        Args:
+            bands (int): Signature slices (must divide 64)
+            threshold (float): Minimum similarity, 1 - hamming / 64, to count as a
+                near duplicate; env NEAR_DUPLICATE_THRESHOLD
+            min_tokens (int): Shorter texts get no signature (too unstable)
+            initial_capacity (int): Rows to reserve up front
+        """
+        try:
+            if SIGNATURE_BITS % bands:
+                raise ValueError('bands must divide 64')
+            self.bands = bands
+            self.band_bits = SIGNATURE_BITS // bands
+            self.threshold = float(threshold or os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.95))
+            self.min_tokens = min_tokens
+            self._lock = threading.RLock()
+
+            self._keys = []
+            self._key_to_row = {}
+            self._owner_codes = {}
+            self._signatures = np.zeros(initial_capacity, dtype=np.uint64)
+            self._owners = np.full(initial_capacity, -1, dtype=np.int32)
+            # sha1 of the content whose cached analysis a row points to
+            self._refs = np.zeros((initial_capacity, 20), dtype=np.uint8)
+
+            # Per band: sorted band keys and their rows, covering rows [0, _indexed)
+            self._band_keys = [np.zeros(0, dtype=np.uint64) for _ in range(bands)]
+            self._band_rows = [np.zeros(0, dtype=np.int64) for _ in range(bands)]
+            self._indexed = 0
+
+            logger.info(f"Near-duplicate index initialized ({bands} bands, threshold={self.threshold})")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize near-duplicate index: {str(e)}")
+            raise
+
+    def __len__(self):
+        return len(self._keys)
+
+    def signature(self, text):
+        """
+        64-bit SimHash of a text
+
+        Returns:
+            int: Signature, or None when the text has fewer than min_tokens words
+        """
+        words = default_normalizer.words(text)
+        if len(words) < self.min_tokens:
+            return None
+        features = Counter(words)
+        features.update(f'{a} {b}' for a, b in zip(words, words[1:]))
+
+        # Two CRC32s (plain and salted) make a stable 64-bit feature hash
+        hashes = np.fromiter(
+            (zlib.crc32(feature.encode('utf-8')) | (zlib.crc32(b'\x01' + feature.encode('utf-8')) << 32)
+             for feature in features),
+            dtype=np.uint64,
+            count=len(features)
+        )
+        weights = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+        bits = ((hashes[:, None] >> _SHIFTS) & np.uint64(1)).astype(np.float64)
+        votes = weights @ (2.0 * bits - 1.0)
+        return int(np.sum(np.uint64(1) << _SHIFTS[votes > 0], dtype=np.uint64))
+
+    def signatures(self, texts):
+        """Signatures for many texts (None for texts that are too short)"""
+        return [self.signature(text) for text in texts]
+
+    def add(self, key, signature, ref, owner=None):
+        """
+        Insert or replace one signature
+
+        Args:
+            key (str): Row key (capsule id, or content fingerprint when there is none)
+            signature (int): SimHash from signature()
+            ref (str): Content fingerprint (hex sha1) of the cached analysis
+            owner (str): Owner (user) id for per-user reports
+        """
+        if signature is None:
+            return
+        key = str(key)
+        with self._lock:
+            row = self._key_to_row.get(key)
+            if row is None:
+                row = len(self._keys)
+                self._reserve(row + 1)
+                self._keys.append(key)
+                self._key_to_row[key] = row
+            elif row < self._indexed and int(self._signatures[row]) != signature:
+                # The sorted band arrays hold the old signature; rebuild on next lookup
+                self._indexed = 0
+            self._signatures[row] = np.uint64(signature)
+            self._owners[row] = self._owner_code(owner)
+            self._refs[row] = np.frombuffer(bytes.fromhex(ref), dtype=np.uint8)
+
+    def _reserve(self, size):
+        """Grow storage geometrically so inserts stay amortized O(1)"""
+        capacity = len(self._signatures)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        signatures = np.zeros(new_capacity, dtype=np.uint64)
+        signatures[:capacity] = self._signatures
+        owners = np.full(new_capacity, -1, dtype=np.int32)
+        owners[:capacity] = self._owners
+        refs = np.zeros((new_capacity, 20), dtype=np.uint8)
+        refs[:capacity] = self._refs
+        self._signatures, self._owners, self._refs = signatures, owners, refs
+
+    def _owner_code(self, owner):
+        if owner is None:
+            return -1
+        owner = str(owner)
+        code = self._owner_codes.get(owner)
+        if code is None:
+            code = len(self._owner_codes)
+            self._owner_codes[owner] = code
+        return code
+
+    def _band(self, signatures, band):
+        mask = np.uint64((1 << self.band_bits) - 1)
+        return (signatures >> np.uint64(band * self.band_bits)) & mask
+
+    def _refresh(self):
+        """Merge the unsorted tail into the sorted band arrays once it is large"""
+        count = len(self._keys)
+        if count - self._indexed <= max(4096, self._indexed // 8):
+            return
+        signatures = self._signatures[:count]
+        for band in range(self.bands):
+            keys = self._band(signatures, band)
+            order = np.argsort(keys, kind='stable')
+            self._band_keys[band] = keys[order]
+            self._band_rows[band] = order
+        self._indexed = count
+
+    def _candidates(self, signature):
+        count = len(self._keys)
+        signature = np.uint64(signature)
+        found = []
+        tail = self._signatures[self._indexed:count]
+        for band in range(self.bands):
+            key = self._band(signature, band)
+            keys = self._band_keys[band]
+            lo, hi = np.searchsorted(keys, key, side='left'), np.searchsorted(keys, key, side='right')
+            found.append(self._band_rows[band][lo:hi])
+            if tail.size:
+                found.append(np.flatnonzero(self._band(tail, band) == key) + self._indexed)
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query(self, signature, owner=None, exclude=None, threshold=None, limit=10):
+        """
+        Near duplicates of a signature
+
+        Args:
+            signature (int): SimHash from signature()
+            owner (str): Only rows of this owner
+            exclude (str): Row key to leave out
+            threshold (float): Minimum similarity; defaults to the index threshold
+            limit (int): Maximum matches
+
+        Returns:
+            list: [{'key', 'ref', 'similarity'}] by descending similarity
+        """
+        if signature is None:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+        max_distance = int((1.0 - threshold) * SIGNATURE_BITS)
+
+        with self._lock:
+            if not self._keys:
+                return []
+            self._refresh()
+            rows = self._candidates(signature)
+            if owner is not None:
+                code = self._owner_codes.get(str(owner))
+                if code is None:
+                    return []
+                rows = rows[self._owners[rows] == code]
+            if not rows.size:
+                return []
+
+            distances = hamming_distances(self._signatures[rows], signature)
+            keep = distances <= max_distance
+            rows, distances = rows[keep], distances[keep]
+            order = np.argsort(distances, kind='stable')
+
+            matches = []
+            for row, distance in zip(rows[order], distances[order]):
+                key = self._keys[row]
+                if key == exclude:
+                    continue
+                matches.append({
+                    'key': key,
+                    'ref': self._refs[row].tobytes().hex(),
+                    'similarity': round(1.0 - int(distance) / SIGNATURE_BITS, 4)
+                })
+                if len(matches) == limit:
+                    break
+            return matches
+
+    def duplicate_report(self, owner, threshold=None, max_bucket=256):
+        """
+        Groups of near-identical texts for one owner
+
+        Rows sharing a band value are compared pairwise and merged with
+        union-find. Buckets larger than max_bucket are truncated to bound the
+        pairwise work.
+
+        Args:
+            owner (str): Owner (user) id
+            threshold (float): Minimum similarity; defaults to the index threshold
+
+        Returns:
+            dict: Indexed count, duplicate groups (largest first) and the number
+                of texts that repeat an earlier one
+        """
+        threshold = self.threshold if threshold is None else threshold
+        max_distance = int((1.0 - threshold) * SIGNATURE_BITS)
+
+        with self._lock:
+            code = self._owner_codes.get(str(owner))
+            if code is None:
+                return {'owner': owner, 'indexed': 0, 'groups': [], 'redundant': 0}
+            rows = np.flatnonzero(self._owners[:len(self._keys)] == code)
+            signatures = self._signatures[rows]
+            keys = [self._keys[row] for row in rows]
+
+        parent = list(range(len(rows)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(self.bands):
+            band_keys = self._band(signatures, band)
+            order = np.argsort(band_keys, kind='stable')
+            boundaries = np.flatnonzero(np.diff(band_keys[order])) + 1
+            for bucket in np.split(order, boundaries):
+                if bucket.size < 2:
+                    continue
+                bucket = bucket[:max_bucket]
+                for position, i in enumerate(bucket[:-1]):
+                    others = bucket[position + 1:]
+                    close = others[hamming_distances(signatures[others], signatures[i]) <= max_distance]
+                    for j in close:
+                        parent[find(int(j))] = find(int(i))
+
+        groups = {}
+        for i in range(len(rows)):
+            groups.setdefault(find(i), []).append(keys[i])
+        duplicate_groups = sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+        return {
+            'owner': owner,
+            'indexed': len(rows),
+            'groups': [{'keys': group, 'size': len(group)} for group in duplicate_groups],
+            'redundant': sum(len(group) - 1 for group in duplicate_groups)
+        }
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size': len(self._keys),
+                'capacity': int(len(self._signatures)),
+                'sorted_rows': self._indexed,
+                'bands': self.bands,
+                'threshold': self.threshold,
+                'owners': len(self._owner_codes)
+            }
@@ -0,0 +1,261 @@
+import copy
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from content_analysis.model_registry import (
+    HEADS, ONLINE_HEAD_MODELS, OnlineModelStore, create_model, create_vectorizer
+)
+from content_analysis.content_classifier import SAMPLE_TRAINING_DATA
+
+logger = logging.getLogger(__name__)
+
+class OnlineLearner:
+    def __init__(self, classifier, batch_size=32, flush_interval=5.0, max_queue=10000,
+                 n_features=2 ** 16, seed_epochs=5, min_samples=None, sync_interval=None, store=None):
+        """
+        Incrementally train ContentClassifier heads from user feedback
+
+        Features come from a stateless HashingVectorizer, so there is no vocabulary
+        to refit and every mini-batch can be applied with partial_fit. Training runs
+        on a background thread; each mini-batch trains copies of the newest shared
+        online models and writes them back to the OnlineModelStore. Every worker
+        polls the store and loads new generations, so feedback sent to one worker
+        reaches all of them and survives worker recycling.
+
+        The configured heads keep serving until the online models have been
+        trained on min_samples feedback items; a hashing model warm-started from
+        the sample data and a handful of corrections would be less accurate.
+
+        Args:
+            classifier (ContentClassifier): Serving classifier to update
+            batch_size (int): Maximum feedback items per training step
+            flush_interval (float): Seconds to wait for a batch to fill before training
+            max_queue (int): Maximum queued feedback items before submissions are rejected
+            n_features (int): Hashing space size
+            seed_epochs (int): Passes over the built-in sample data to warm-start models
+            min_samples (int): Feedback items before the online heads are served;
+                env ONLINE_MIN_SAMPLES
+            sync_interval (float): Seconds between checks for a newer shared
+                generation; env ONLINE_SYNC_INTERVAL
+            store (OnlineModelStore): Shared snapshot store; defaults to ONLINE_MODELS_DB_PATH
+        """
+        try:
+            self.classifier = classifier
+            self.batch_size = batch_size
+            self.flush_interval = flush_interval
+            self.queue = queue.Queue(maxsize=max_queue)
+            self.n_features = n_features
+            self.min_samples = int(min_samples if min_samples is not None else os.environ.get('ONLINE_MIN_SAMPLES', 200))
+            self.sync_interval = float(
+                sync_interval if sync_interval is not None else os.environ.get('ONLINE_SYNC_INTERVAL', 10)
+            )
+            self.store = store or OnlineModelStore()
+
+            # Stateless features: nothing to refit as feedback arrives
+            self.vectorizer = create_vectorizer('hashing', n_features=n_features)
+
+            self.classes = {
+                'category': list(classifier.categories),
+                'topic': list(classifier.topics),
+                'priority': list(classifier.priorities)
+            }
+            self.models = {head: create_model(ONLINE_HEAD_MODELS[head]) for head in HEADS}
+            self._seed(seed_epochs)
+            self.samples = 0
+            self.generation = 0
+
+            self.processed = 0
+            self.rejected = 0
+            self.updates = 0
+            self.last_update = None
+            self._thread = None
+            self._start_lock = threading.Lock()
+            self._sync_lock = threading.Lock()
+
+            # Pick up what earlier or sibling workers already learned
+            self.sync()
+
+            logger.info("Online learner initialized successfully")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize online learner: {str(e)}")
+            raise
+
+    def _seed(self, epochs):
+        """Warm-start the online models on the sample data (not served until feedback arrives)"""
+        texts = [self.classifier.preprocess(item[0]) for item in SAMPLE_TRAINING_DATA]
+        X = self.vectorizer.transform(texts)
+        for head_index, head in enumerate(HEADS, start=1):
+            labels = [item[head_index] for item in SAMPLE_TRAINING_DATA]
+            for _ in range(epochs):
+                self.models[head].partial_fit(X, labels, classes=self.classes[head])
+
+    def start(self):
+        """Start the background training thread if it is not running"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='online-learner', daemon=True)
+                self._thread.start()
+
+    def submit(self, items):
+        """
+        Queue corrected labels for training
+
+        Args:
+            items (list): Dicts with 'text' and any of 'category', 'topic', 'priority'
+
+        Returns:
+            dict: Counts of accepted and invalid items
+        """
+        # Started lazily so a pre-forking server does not lose the thread in its workers
+        self.start()
+
+        accepted, invalid = 0, []
+        for index, item in enumerate(items):
+            error = self._validate(item)
+            if error:
+                invalid.append({'index': index, 'error': error})
+                continue
+            try:
+                self.queue.put_nowait(item)
+                accepted += 1
+            except queue.Full:
+                self.rejected += 1
+                invalid.append({'index': index, 'error': 'Feedback queue is full'})
+
+        return {'accepted': accepted, 'invalid': invalid}
+
+    def _validate(self, item):
+        if not isinstance(item, dict) or not item.get('text'):
+            return 'Missing text'
+        labelled = [head for head in HEADS if item.get(head) is not None]
+        if not labelled:
+            return 'No labels provided'
+        for head in labelled:
+            if item[head] not in self.classes[head]:
+                return f"Unknown {head} label: {item[head]}"
+        return None
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                if batch:
+                    self.train_batch(batch)
+                else:
+                    self.sync()
+            except Exception as e:
+                logger.error(f"Online training step failed: {str(e)}")
+
+    def _next_batch(self):
+        """
+        Wait up to sync_interval for the first item, then collect more until full
+        or flush_interval elapses; an empty batch means it is time to sync
+        """
+        try:
+            batch = [self.queue.get(timeout=self.sync_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def train_batch(self, batch):
+        """
+        Apply one mini-batch to the newest shared models and serve the result
+
+        Args:
+            batch (list): Validated feedback items
+
+        Returns:
+            int: Shared online generation after this batch
+        """
+        texts = [self.classifier.preprocess(item['text']) for item in batch]
+        X = self.vectorizer.transform(texts)
+
+        def apply(snapshot):
+            # Another worker may have trained since this one last synced
+            base = self._usable(snapshot) or {'generation': 0, 'samples': 0, 'state': {'models': self.models}}
+            # Train copies so the models currently being served are never mutated
+            models = {head: copy.deepcopy(model) for head, model in base['state']['models'].items()}
+            for head in HEADS:
+                rows = [i for i, item in enumerate(batch) if item.get(head) is not None]
+                if rows:
+                    models[head].partial_fit(
+                        X[rows],
+                        [batch[i][head] for i in rows],
+                        classes=self.classes[head]
+                    )
+            return {
+                'generation': max(base['generation'], self.generation) + 1,
+                'samples': base['samples'] + len(batch),
+                'state': {'models': models, 'n_features': self.n_features}
+            }
+
+        with self._sync_lock:
+            snapshot = self.store.update(apply)
+            self._adopt(snapshot)
+        self.processed += len(batch)
+        self.updates += 1
+        self.last_update = datetime.utcnow().isoformat()
+        return snapshot['generation']
+
+    def sync(self):
+        """Load the shared snapshot when another worker has published a newer generation"""
+        with self._sync_lock:
+            if self.store.generation() <= self.generation:
+                return False
+            snapshot = self._usable(self.store.load())
+            if snapshot is None:
+                return False
+            self._adopt(snapshot)
+            return True
+
+    def _usable(self, snapshot):
+        """The snapshot, or None when it is missing or was hashed into a different feature space"""
+        if snapshot is None:
+            return None
+        if snapshot['state'].get('n_features') != self.n_features:
+            logger.warning("Ignoring stored online models trained with a different hashing space")
+            return None
+        return snapshot
+
+    def _adopt(self, snapshot):
+        """Take a snapshot as the current online state; serve it once it has enough samples"""
+        self.models = snapshot['state']['models']
+        self.samples = snapshot['samples']
+        self.generation = snapshot['generation']
+        if self.samples >= self.min_samples:
+            self.classifier.swap_models(
+                self.vectorizer,
+                self.models,
+                {head: f'online_{ONLINE_HEAD_MODELS[head]}' for head in HEADS},
+                online_generation=self.generation
+            )
+
+    def get_status(self):
+        """Get queue depth and training progress"""
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'queued': self.queue.qsize(),
+            'processed': self.processed,
+            'rejected': self.rejected,
+            'updates': self.updates,
+            'last_update': self.last_update,
+            'online_generation': self.generation,
+            'samples': self.samples,
+            'min_samples': self.min_samples,
+            'serving_online': self.classifier.online_generation > 0,
+            'model_generation': self.classifier.model_generation
+        }
@@ -0,0 +1,302 @@
+import numpy as np
+import logging
+import os
+import threading
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from utils.text_normalizer import default_normalizer
+
+logger = logging.getLogger(__name__)
+
+# Topic -> descriptive keywords; the union of the TextProcessor keyword topics
+# and the ContentClassifier topic labels. Each entry becomes one label embedding.
+TOPIC_KEYWORDS = {
+    'family': ['family', 'mother', 'father', 'parent', 'child', 'sister', 'brother', 'grandmother', 'grandfather'],
+    'work': ['work', 'job', 'office', 'meeting', 'project', 'boss', 'colleague', 'business'],
+    'career': ['career', 'promotion', 'interview', 'hired', 'profession', 'goals', 'achievement'],
+    'travel': ['travel', 'trip', 'vacation', 'holiday', 'journey', 'flight', 'hotel', 'destination'],
+    'education': ['school', 'university', 'college', 'study', 'learn', 'teacher', 'student', 'exam', 'course', 'graduation'],
+    'health': ['health', 'doctor', 'hospital', 'medicine', 'exercise', 'fitness', 'wellness', 'medical'],
+    'food': ['food', 'eat', 'restaurant', 'cooking', 'recipe', 'meal', 'dinner', 'lunch', 'breakfast'],
+    'music': ['music', 'song', 'concert', 'band', 'artist', 'album', 'guitar', 'piano', 'singing'],
+    'sports': ['sport', 'game', 'football', 'basketball', 'soccer', 'tennis', 'running', 'swimming', 'team'],
+    'nature': ['nature', 'outdoor', 'park', 'forest', 'mountain', 'beach', 'garden', 'tree', 'flower'],
+    'technology': ['technology', 'computer', 'phone', 'internet', 'software', 'app', 'digital', 'tech'],
+    'love': ['love', 'romance', 'partner', 'wedding', 'anniversary', 'boyfriend', 'girlfriend', 'husband', 'wife'],
+    'friendship': ['friend', 'friends', 'friendship', 'buddy', 'together', 'hangout', 'reunion'],
+    'hobbies': ['hobby', 'hobbies', 'reading', 'gaming', 'crafts', 'collecting', 'photography', 'gardening'],
+    'art': ['art', 'painting', 'drawing', 'sketch', 'museum', 'gallery', 'creative', 'design'],
+    'pets': ['pet', 'pets', 'dog', 'cat', 'puppy', 'kitten', 'vet', 'animal'],
+    'celebration': ['celebration', 'birthday', 'party', 'festival', 'christmas', 'gift', 'celebrate'],
+    'reflection': ['reflection', 'memory', 'remember', 'thoughts', 'grateful', 'lesson', 'journal', 'future']
+}
+
+DEFAULT_SENTENCE_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# Score thresholds per encoder. The hashing encoder scores keyword hits (a count,
+# so long texts are not penalized) and needs one; dense encoders are compared by
+# cosine similarity, which scores everything somewhat
+ENCODER_THRESHOLDS = {
+    'hashing': 1.0,
+    'sentence': 0.3,
+    'emotion': 0.2
+}
+
+def label_text(topic, keywords):
+    """Text encoded as the label embedding for one topic"""
+    return f"{topic}: {', '.join(keywords)}"
+
+def _l2_normalize(vectors):
+    if sparse.issparse(vectors):
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1))).ravel()
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ vectors
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class HashingTopicEncoder:
+    def __init__(self, n_features=2 ** 16):
+        """
+        Keyword-level sparse encoder used when no sentence model is configured
+
+        Binary unigram hashing over normalized text, left unnormalized: the dot
+        product with a topic's keyword vector is the number of its keywords the
+        text contains, whatever the text length.
+        """
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 1),
+            alternate_sign=False,
+            binary=True,
+            norm=None
+        )
+
+    def __call__(self, texts):
+        return self.vectorizer.transform(default_normalizer.normalize_many(texts))
+
+class SentenceEncoder:
+    def __init__(self, model_name=DEFAULT_SENTENCE_MODEL, max_length=256, batch_size=32):
+        """
+        Mean-pooled transformer sentence encoder (loaded through transformers)
+
+        Args:
+            model_name (str): Hugging Face model id
+            max_length (int): Token truncation length
+            batch_size (int): Texts per forward pass
+        """
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self._torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+    def __call__(self, texts):
+        outputs = []
+        with self._torch.inference_mode():
+            for start in range(0, len(texts), self.batch_size):
+                encoded = self.tokenizer(
+                    texts[start:start + self.batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors='pt'
+                )
+                hidden = self.model(**encoded).last_hidden_state
+                mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                outputs.append(pooled.cpu().numpy())
+        if not outputs:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+        return np.vstack(outputs).astype(np.float32)
+
+class TopicEngine:
+    def __init__(self, encoder=None, threshold=None, top_k=3, topic_keywords=None, center=False,
+                 encoder_name='hashing', defer_labels=False, fallback=None):
+        """
+        Multi-label zero-shot topic scoring against cached label embeddings
+
+        Label embeddings are computed once; scoring a batch is one
+        (texts x dim) @ (dim x topics) product followed by thresholding. The
+        hashing encoder scores keyword hit counts, other encoders cosine similarity.
+
+        Args:
+            encoder (callable): texts -> (n, dim) dense or sparse embeddings;
+                defaults to HashingTopicEncoder
+            threshold (float): Minimum cosine similarity for a topic to be assigned
+            top_k (int): Maximum topics per text
+            topic_keywords (dict): topic -> keywords; defaults to TOPIC_KEYWORDS
+            center (bool): Subtract the mean label embedding before comparing;
+                helps encoders whose embeddings all share one dominant direction
+            encoder_name (str): Which encoder produced the label embeddings; callers
+                holding embeddings from the same encoder can pass them to score()
+            defer_labels (bool): Encode the labels on first use instead of now, for
+                encoders whose model is still loading
+            fallback (TopicEngine): Scores texts that come without embeddings, so
+                this engine's encoder is only ever fed labels (no unbounded model
+                calls on the request path)
+        """
+        try:
+            self.encoder = encoder or HashingTopicEncoder()
+            self.keyword_hits = isinstance(self.encoder, HashingTopicEncoder)
+            self.threshold = ENCODER_THRESHOLDS['hashing'] if threshold is None else threshold
+            self.top_k = top_k
+            self.center = center
+            self.encoder_name = encoder_name
+            self.fallback = fallback
+
+            self.topic_keywords = topic_keywords or TOPIC_KEYWORDS
+            self.topics = np.array(list(self.topic_keywords))
+            self._offset = None
+            self._label_matrix = None
+            self._labels_lock = threading.Lock()
+            if not defer_labels:
+                self._encode_labels()
+
+            logger.info(f"Topic engine initialized with {len(self.topics)} topics")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize topic engine: {str(e)}")
+            raise
+
+    def _encode_labels(self):
+        """Encode the topic labels once; raises if the encoder cannot run yet"""
+        with self._labels_lock:
+            if self._label_matrix is not None:
+                return
+            labels = self.encoder([label_text(topic, self.topic_keywords[topic]) for topic in self.topics])
+            if sparse.issparse(labels):
+                labels = labels.toarray()
+            labels = np.asarray(labels, dtype=np.float32)
+
+            self._offset = labels.mean(axis=0) if self.center else None
+            # (dim x topics), ready for a single right-multiplication
+            self._label_matrix = np.ascontiguousarray(self._prepare(labels).T)
+
+    def get_version(self):
+        """Encoder, scoring and label set the topic scores depend on"""
+        scoring = 'hits' if self.keyword_hits else 'cosine'
+        version = f'{self.encoder_name}-{scoring}:{len(self.topics)}'
+        if self.fallback is not None:
+            version += f'+{self.fallback.get_version()}'
+        return version
+
+    def _prepare(self, vectors):
+        if self._offset is not None:
+            if sparse.issparse(vectors):
+                vectors = vectors.toarray()
+            vectors = np.asarray(vectors, dtype=np.float32)
+            # Empty texts come back as zero rows; keep them at zero similarity
+            empty = ~vectors.any(axis=1)
+            vectors = vectors - self._offset
+            vectors[empty] = 0.0
+        if self.keyword_hits:
+            return vectors
+        return _l2_normalize(vectors)
+
+    def score(self, texts=None, embeddings=None):
+        """
+        Similarity of every text to every topic label (keyword hits or cosine)
+
+        Args:
+            texts (list): Texts to encode; ignored when embeddings are given
+            embeddings: Precomputed encoder output for the texts, e.g. from a shared
+                forward pass
+
+        Returns:
+            np.ndarray: float32 array of shape (n_texts, n_topics)
+        """
+        if embeddings is None:
+            texts = list(texts)
+            if not texts:
+                return np.zeros((0, len(self.topics)), dtype=np.float32)
+            embeddings = self.encoder(texts)
+        if embeddings.shape[0] == 0:
+            return np.zeros((0, len(self.topics)), dtype=np.float32)
+        self._encode_labels()
+        scores = self._prepare(embeddings) @ self._label_matrix
+        return np.asarray(scores, dtype=np.float32)
+
+    def predict_batch(self, texts=None, embeddings=None):
+        """
+        Assign up to top_k topics per text
+
+        Returns:
+            list: Per text, a list of {'topic', 'score'} sorted by score
+        """
+        if embeddings is None and self.fallback is not None:
+            return self.fallback.predict_batch(texts)
+        try:
+            scores = self.score(texts, embeddings)
+            k = min(self.top_k, scores.shape[1])
+            if scores.shape[0] == 0 or k == 0:
+                return [[] for _ in range(scores.shape[0])]
+
+            # Best k per row; a stable sort keeps tied hit counts in topic order
+            top = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+
+            results = []
+            for row_topics, row_scores in zip(self.topics[top], top_scores):
+                keep = row_scores >= self.threshold
+                results.append([
+                    {'topic': str(topic), 'score': round(float(score), 4)}
+                    for topic, score in zip(row_topics[keep], row_scores[keep])
+                ])
+            return results
+
+        except Exception as e:
+            logger.error(f"Topic scoring failed: {str(e)}")
+            n = len(texts) if texts is not None else embeddings.shape[0]
+            return [[] for _ in range(n)]
+
+    def extract_topics_batch(self, texts=None, embeddings=None):
+        """Topic names per text, best first"""
+        return [[item['topic'] for item in row] for row in self.predict_batch(texts, embeddings)]
+
+    def extract_topics(self, text):
+        """Topic names for a single text; drop-in for TextProcessor.extract_topics"""
+        if not text:
+            return []
+        return self.extract_topics_batch([text])[0]
+
+def create_topic_engine(encoder_name=None, emotion_analyzer=None, top_k=3):
+    """
+    Build a TopicEngine for the configured encoder
+
+    Args:
+        encoder_name (str): 'hashing', 'sentence' or 'emotion'; defaults to the
+            TOPIC_ENCODER environment variable (hashing)
+        emotion_analyzer: Analyzer exposing encode(texts); 'emotion' reuses its backbone
+        top_k (int): Maximum topics per text
+
+    Returns:
+        TopicEngine: Falls back to the hashing encoder if the requested one cannot load.
+            The 'emotion' engine encodes its labels once the model has loaded and
+            only scores embeddings from the emotion forward pass; texts analyzed
+            without them (fallback tier) are scored by keyword hits.
+    """
+    encoder_name = encoder_name or os.environ.get('TOPIC_ENCODER', 'hashing')
+    try:
+        if encoder_name == 'sentence':
+            encoder = SentenceEncoder(os.environ.get('TOPIC_ENCODER_MODEL', DEFAULT_SENTENCE_MODEL))
+            return TopicEngine(encoder, ENCODER_THRESHOLDS['sentence'], top_k, encoder_name='sentence')
+        if encoder_name == 'emotion':
+            if emotion_analyzer is None or not hasattr(emotion_analyzer, 'encode'):
+                raise ValueError('emotion analyzer does not expose an encoder')
+            return TopicEngine(
+                emotion_analyzer.encode, ENCODER_THRESHOLDS['emotion'], top_k,
+                center=True, encoder_name='emotion', defer_labels=True,
+                fallback=TopicEngine(HashingTopicEncoder(), ENCODER_THRESHOLDS['hashing'], top_k)
+            )
+        if encoder_name != 'hashing':
+            logger.warning(f"Unknown topic encoder '{encoder_name}', using hashing")
+    except Exception as e:
+        logger.warning(f"Topic encoder '{encoder_name}' unavailable, using hashing: {str(e)}")
+    return TopicEngine(HashingTopicEncoder(), ENCODER_THRESHOLDS['hashing'], top_k)
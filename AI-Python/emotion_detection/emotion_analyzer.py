@@ -1,21 +1,26 @@
 import numpy as np
-from transformers import pipeline
 import nltk
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import logging
 
+from emotion_detection.fallback_emotion import sentiment_fields
+from emotion_detection.inference_engine import MultiTaskInferenceEngine, DEFAULT_EMOTION_MODEL
+from emotion_detection.output_shaper import EmotionOutputShaper
+
 logger = logging.getLogger(__name__)
 
 class EmotionAnalyzer:
+    VERSION = f'1.3.0+{DEFAULT_EMOTION_MODEL}'
+
     def __init__(self):
         """Initialize emotion analysis models"""
         try:
-            # Load pre-trained emotion classification model
-            self.emotion_classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                return_all_scores=True
-            )
+            # Load pre-trained emotion classification model; one forward pass per
+            # batch yields both emotion probabilities and pooled embeddings
+            self.engine = MultiTaskInferenceEngine(DEFAULT_EMOTION_MODEL)
+            self.provides_embeddings = True
+            # Calibrated softmax and top-k pruning of the emotion scores
+            self.shaper = EmotionOutputShaper(self.engine.labels)
             
             # Initialize sentiment analyzer
             self.sentiment_analyzer = SentimentIntensityAnalyzer()
@@ -37,12 +42,14 @@ class EmotionAnalyzer:
             logger.error(f"Failed to initialize emotion analyzer: {str(e)}")
             raise
 
-    def analyze(self, text):
+    def analyze(self, text, sentiment_scores=None):
         """
         Analyze emotion from text with enhanced detection
         
         Args:
             text (str): Input text to analyze
+            sentiment_scores (dict): Precomputed VADER-style scores (neg/neu/pos/compound);
+                VADER is only run when these are not supplied
             
         Returns:
             dict: Detailed emotion analysis results including:
@@ -51,63 +58,51 @@ class EmotionAnalyzer:
                 - Context awareness
                 - Unlock date recommendations
         """
-        try:
-            if not text or len(text.strip()) == 0:
-                return {
-                    'primary_emotion': 'neutral',
-                    'secondary_emotion': 'neutral',
-                    'confidence': 0.0,
-                    'emotions': {},
-                    'sentiment': {'compound': 0.0, 'positive': 0.0, 'negative': 0.0, 'neutral': 1.0}
-                }
-            
-            # Get emotion predictions
-            emotion_results = self.emotion_classifier(text)
-            
-            # Process emotion results
-            emotions = {}
-            for result in emotion_results[0]:
-                emotions[result['label']] = result['score']
-            
-            # Find primary and secondary emotions
-            sorted_emotions = sorted(emotion_results[0], key=lambda x: x['score'], reverse=True)
-            primary_emotion = sorted_emotions[0]['label']
-            primary_confidence = sorted_emotions[0]['score']
-            
-            secondary_emotion = sorted_emotions[1]['label'] if len(sorted_emotions) > 1 else primary_emotion
-            
-            # Get sentiment analysis
+        return self.analyze_batch([text], [sentiment_scores])[0]
+
+    def _empty_result(self, error=None):
+        result = {
+            'primary_emotion': 'neutral',
+            'secondary_emotion': 'neutral',
+            'confidence': 0.0,
+            'emotions': {},
+            'sentiment': {'compound': 0.0, 'positive': 0.0, 'negative': 0.0, 'neutral': 1.0}
+        }
+        if error:
+            result['error'] = error
+        return result
+
+    def _build_result(self, text, shaped, sentiment_scores):
+        """Assemble one analysis from a shaped (ranked labels, scores, top-k emotions) row"""
+        ranked_labels, ranked_scores, emotions = shaped
+        
+        # Primary and secondary emotions
+        primary_emotion = ranked_labels[0]
+        primary_confidence = ranked_scores[0]
+        secondary_emotion = ranked_labels[1] if len(ranked_labels) > 1 else primary_emotion
+        
+        # Get sentiment analysis unless the caller already scored this text
+        if sentiment_scores is None:
             sentiment_scores = self.sentiment_analyzer.polarity_scores(text)
-            
-            # Map emotions to broader categories
-            emotion_category = self._categorize_emotion(primary_emotion)
-            
-            return {
-                'primary_emotion': primary_emotion,
-                'secondary_emotion': secondary_emotion,
-                'confidence': float(primary_confidence),
-                'emotions': emotions,
-                'sentiment': sentiment_scores,
-                'category': emotion_category,
-                'intensity': self._calculate_intensity(sentiment_scores),
-                'recommendedUnlock': self._predict_unlock_date(
-                    primary_emotion,
-                    emotion_category,
-                    sentiment_scores
-                ),
-                'contextualTags': self._extract_context_tags(text)
-            }
-            
-        except Exception as e:
-            logger.error(f"Emotion analysis failed: {str(e)}")
-            return {
-                'primary_emotion': 'neutral',
-                'secondary_emotion': 'neutral',
-                'confidence': 0.0,
-                'emotions': {},
-                'sentiment': {'compound': 0.0, 'positive': 0.0, 'negative': 0.0, 'neutral': 1.0},
-                'error': str(e)
-            }
+        
+        # Map emotions to broader categories
+        emotion_category = self._categorize_emotion(primary_emotion)
+        
+        return {
+            'primary_emotion': primary_emotion,
+            'secondary_emotion': secondary_emotion,
+            'confidence': float(primary_confidence),
+            'emotions': emotions,
+            'sentiment': sentiment_fields(sentiment_scores),
+            'category': emotion_category,
+            'intensity': self._calculate_intensity(sentiment_scores),
+            'recommendedUnlock': self._predict_unlock_date(
+                primary_emotion,
+                emotion_category,
+                sentiment_scores
+            ),
+            'contextualTags': self._extract_context_tags(text)
+        }
 
     def _categorize_emotion(self, emotion):
         """Categorize emotion into broader categories"""
@@ -186,22 +181,60 @@ class EmotionAnalyzer:
             logger.error(f"Context tag extraction failed: {str(e)}")
             return ['general-memory']
 
-    def analyze_batch(self, texts):
+    def analyze_batch(self, texts, sentiment_scores=None, return_embeddings=False):
         """
-        Analyze emotions for multiple texts
+        Analyze emotions for multiple texts with one transformer pass per batch
         
         Args:
             texts (list): List of texts to analyze
+            sentiment_scores (list): Optional precomputed VADER-style scores per text
+            return_embeddings (bool): Also return the pooled embeddings from the same pass
             
         Returns:
-            list: List of emotion analysis results
+            list: List of emotion analysis results, or (results, embeddings) when
+                return_embeddings is set; empty texts get zero embeddings
         """
-        results = []
-        for text in texts:
-            result = self.analyze(text)
-            results.append(result)
+        if sentiment_scores is None:
+            sentiment_scores = [None] * len(texts)
+        
+        results = [None] * len(texts)
+        embeddings = np.zeros((len(texts), self.engine.embedding_dim), dtype=np.float32)
+        active = [i for i, text in enumerate(texts) if text and text.strip()]
+        
+        try:
+            outputs = self.engine.infer([texts[i] for i in active])
+            shaped = self.shaper.shape(self.shaper.probabilities(outputs['logits']))
+            for row, i in enumerate(active):
+                results[i] = self._build_result(texts[i], shaped[row], sentiment_scores[i])
+            embeddings[active] = outputs['embeddings']
+        except Exception as e:
+            logger.error(f"Emotion analysis failed: {str(e)}")
+            for i in active:
+                results[i] = self._empty_result(str(e))
+        
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = self._empty_result()
+        
+        if return_embeddings:
+            return results, embeddings
         return results
 
+    def encode(self, texts):
+        """
+        Mean-pooled sentence embeddings from the emotion model's backbone
+        
+        Prefer analyze_batch(..., return_embeddings=True) when emotions are needed
+        too; this runs the same forward pass and discards the logits.
+        
+        Args:
+            texts (list): Texts to encode
+            
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), hidden_size)
+        """
+        return self.engine.encode(list(texts))
+
     def get_emotion_trends(self, emotion_data):
         """
         Analyze emotion trends over time
@@ -1,74 +1,136 @@
+import re
+
+import numpy as np
+
+from emotion_detection.output_shaper import EmotionOutputShaper
+
+# Column order of the heuristic scores. The label with the most keyword hits wins
+# and ties go to the earlier label; the old if/elif chain instead picked the
+# first label in this order with any hit.
+FALLBACK_LABELS = ['joy', 'sadness', 'anger', 'fear', 'surprise', 'neutral']
+FALLBACK_KEYWORDS = {
+    'joy': ['happy', 'joy', 'love', 'excited', 'smile', 'wonderful', 'amazing', 'great'],
+    'sadness': ['sad', 'sadness', 'cry', 'unhappy', 'miss', 'lonely', 'depressed'],
+    'anger': ['angry', 'hate', 'frustrated', 'annoyed', 'mad'],
+    'fear': ['afraid', 'fear', 'scared', 'anxious', 'worried', 'nervous'],
+    'surprise': ['surprise', 'amazed', 'shocked', 'astonished']
+}
+FALLBACK_CATEGORIES = {
+    'joy': 'positive', 'sadness': 'negative', 'anger': 'negative',
+    'fear': 'negative', 'surprise': 'neutral', 'neutral': 'neutral'
+}
+FALLBACK_TAGS = {
+    'joy': 'positive-memory', 'sadness': 'reflective-memory', 'anger': 'emotional-memory',
+    'fear': 'reflective-memory', 'surprise': 'milestone-memory', 'neutral': 'general-memory'
+}
+# Whole-word matchers, so 'sadness' is one hit (not 'sad' + 'sadness') and 'enjoy' is none
+FALLBACK_PATTERNS = {
+    label: re.compile(r'\b(?:' + '|'.join(keywords) + r')\b')
+    for label, keywords in FALLBACK_KEYWORDS.items()
+}
+# Each keyword hit adds this much logit; neutral keeps a fixed baseline
+KEYWORD_LOGIT = 3.0
+NEUTRAL_LOGIT = 2.0
+
+def sentiment_fields(sentiment_scores):
+    """
+    Map VADER-style neg/neu/pos/compound scores to the compound/positive/negative/neutral
+    fields every emotion tier reports
+    """
+    if not sentiment_scores:
+        return {'compound': 0.0, 'positive': 0.0, 'negative': 0.0, 'neutral': 1.0}
+    return {
+        'compound': sentiment_scores.get('compound', 0.0),
+        'positive': sentiment_scores.get('pos', sentiment_scores.get('positive', 0.0)),
+        'negative': sentiment_scores.get('neg', sentiment_scores.get('negative', 0.0)),
+        'neutral': sentiment_scores.get('neu', sentiment_scores.get('neutral', 1.0))
+    }
+
+def sentiment_intensity(compound):
+    """'high', 'medium' or 'low' from the magnitude of a compound sentiment score"""
+    compound = abs(compound)
+    if compound >= 0.7:
+        return 'high'
+    if compound >= 0.4:
+        return 'medium'
+    return 'low'
+
 class EmotionAnalyzer:
+    VERSION = '1.3.0'
+
     def __init__(self):
-        pass
-
-    def analyze(self, text):
-        # Return a deterministic mock analysis for demo
-        text = (text or '').strip()
-        if not text:
-            return {
-                'dominant_emotion': 'neutral',
-                'primary_emotion': 'neutral',
-                'secondary_emotion': 'neutral',
-                'confidence': 0.0,
-                'emotions': {'neutral': 1.0},
-                'sentiment': {'compound': 0.0, 'positive': 0.0, 'negative': 0.0, 'neutral': 1.0},
-                'recommendedUnlock': {'days': 14, 'rationale': 'Default recommendation'},
-                'contextualTags': ['general-memory']
-            }
-
-        # Simple heuristics
-        lower = text.lower()
-        if any(w in lower for w in ['happy','joy','love','excited', 'smile', 'wonderful', 'amazing', 'great']):
-            primary = 'joy'
-            conf = 0.9
-            category = 'positive'
-            tags = ['positive-memory']
-        elif any(w in lower for w in ['sad','sadness','cry','unhappy','miss', 'lonely', 'depressed']):
-            primary = 'sadness'
-            conf = 0.85
-            category = 'negative'
-            tags = ['reflective-memory']
-        elif any(w in lower for w in ['angry','hate','frustrated','annoyed','mad']):
-            primary = 'anger'
-            conf = 0.8
-            category = 'negative'
-            tags = ['emotional-memory']
-        elif any(w in lower for w in ['afraid','fear','scared','anxious','worried','nervous']):
-            primary = 'fear'
-            conf = 0.75
-            category = 'negative'
-            tags = ['reflective-memory']
-        elif any(w in lower for w in ['surprise','amazed','shocked','astonished']):
-            primary = 'surprise'
-            conf = 0.7
-            category = 'neutral'
-            tags = ['milestone-memory']
-        else:
-            primary = 'neutral'
-            conf = 0.6
-            category = 'neutral'
-            tags = ['general-memory']
-
-        # Predict unlock recommendation
-        if category == 'positive':
-            unlock_rec = {'days': 7, 'rationale': 'Positive emotion - unlock soon to share joy'}
-        elif category == 'negative':
-            unlock_rec = {'days': 30, 'rationale': 'Reflective emotion - unlock when you need perspective'}
-        else:
-            unlock_rec = {'days': 14, 'rationale': 'Neutral emotion - unlock when ready'}
+        self.labels = FALLBACK_LABELS
+        # Heuristic scores are not a model's logits; no temperature calibration
+        self.shaper = EmotionOutputShaper(self.labels, temperature=1.0)
 
+    def analyze(self, text, sentiment_scores=None):
+        """Keyword-heuristic emotion analysis (no model required)"""
+        return self.analyze_batch([text], [sentiment_scores])[0]
+
+    def _empty_result(self, sentiment):
         return {
-            'dominant_emotion': primary,
-            'primary_emotion': primary,
+            'primary_emotion': 'neutral',
             'secondary_emotion': 'neutral',
-            'confidence': conf,
-            'emotions': {primary: conf, 'neutral': 1.0 - conf},
-            'sentiment': {'compound': 0.0, 'positive': 0.0, 'negative': 0.0, 'neutral': 1.0},
-            'recommendedUnlock': unlock_rec,
-            'contextualTags': tags
+            'confidence': 0.0,
+            'emotions': {'neutral': 1.0},
+            'sentiment': sentiment,
+            'category': 'neutral',
+            'intensity': sentiment_intensity(sentiment['compound']),
+            'recommendedUnlock': {'days': 14, 'rationale': 'Default recommendation'},
+            'contextualTags': ['general-memory']
         }
 
+    def logits(self, texts):
+        """
+        Heuristic logits, float32 (n, len(FALLBACK_LABELS))
+
+        Each whole-word keyword occurrence adds KEYWORD_LOGIT to its emotion;
+        neutral has a constant baseline, so texts without any hit lean neutral.
+        """
+        logits = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        logits[:, self.labels.index('neutral')] = NEUTRAL_LOGIT
+        for row, text in enumerate(texts):
+            lower = text.lower()
+            for column, label in enumerate(self.labels):
+                pattern = FALLBACK_PATTERNS.get(label)
+                if pattern is not None:
+                    logits[row, column] += KEYWORD_LOGIT * len(pattern.findall(lower))
+        return logits
+
+    def _build_result(self, shaped, sentiment):
+        ranked_labels, ranked_scores, emotions = shaped
+        primary = ranked_labels[0]
+        category = FALLBACK_CATEGORIES[primary]
+        return {
+            'primary_emotion': primary,
+            'secondary_emotion': ranked_labels[1],
+            'confidence': ranked_scores[0],
+            'emotions': emotions,
+            'sentiment': sentiment,
+            'category': category,
+            'intensity': sentiment_intensity(sentiment['compound']),
+            'recommendedUnlock': self._predict_unlock_date(primary, category, sentiment),
+            'contextualTags': [FALLBACK_TAGS[primary]]
+        }
+
+    def analyze_batch(self, texts, sentiment_scores=None):
+        """Analyze emotions for multiple texts, scoring them as one array"""
+        if sentiment_scores is None:
+            sentiment_scores = [None] * len(texts)
+        texts = [(text or '').strip() for text in texts]
+        results = [None] * len(texts)
+        active = [i for i, text in enumerate(texts) if text]
+
+        if active:
+            probabilities = self.shaper.probabilities(self.logits([texts[i] for i in active]))
+            for i, shaped in zip(active, self.shaper.shape(probabilities)):
+                results[i] = self._build_result(shaped, sentiment_fields(sentiment_scores[i]))
+
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = self._empty_result(sentiment_fields(sentiment_scores[i]))
+        return results
+
     def _predict_unlock_date(self, primary_emotion, emotion_category, sentiment_scores):
         """Predict optimal unlock date based on emotion analysis"""
         if emotion_category == 'positive':
@@ -77,20 +139,3 @@ class EmotionAnalyzer:
             return {'days': 30, 'rationale': 'Reflective emotion - unlock when you need perspective'}
         else:
             return {'days': 14, 'rationale': 'Neutral emotion - unlock when ready'}
-
-    def _extract_context_tags(self, text):
-        """Extract contextual tags from text"""
-        keywords = []
-        lower = (text or '').lower()
-        if any(word in lower for word in ['love', 'happy', 'joy', 'wonderful']):
-            keywords.append('positive-memory')
-        if any(word in lower for word in ['sad', 'miss', 'lost', 'grief']):
-            keywords.append('reflective-memory')
-        if any(word in lower for word in ['family', 'friend', 'together', 'group']):
-            keywords.append('social-memory')
-        if any(word in lower for word in ['achievement', 'success', 'goal', 'accomplish']):
-            keywords.append('milestone-memory')
-        if any(word in lower for word in ['thank', 'grateful', 'appreciate']):
-            keywords.append('gratitude-memory')
-        
-        return keywords if keywords else ['general-memory']
@@ -0,0 +1,98 @@
+import numpy as np
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMOTION_MODEL = 'j-hartmann/emotion-english-distilroberta-base'
+
+class MultiTaskInferenceEngine:
+    def __init__(self, model_name=DEFAULT_EMOTION_MODEL, max_length=256, batch_size=32, device=None):
+        """
+        Run the emotion transformer once per batch and keep every useful output
+
+        One forward pass yields the classification logits (emotion scores)
+        and the mean-pooled last hidden state (a sentence embedding), so similarity,
+        topic scoring and clustering can read embeddings instead of re-encoding.
+
+        Args:
+            model_name (str): Hugging Face sequence-classification model id
+            max_length (int): Token truncation length
+            batch_size (int): Texts per forward pass
+            device (str): torch device; defaults to CUDA when available
+        """
+        try:
+            import torch
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+            self._torch = torch
+            self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(self.device)
+            self.model.eval()
+
+            config = self.model.config
+            self.labels = [config.id2label[i] for i in range(config.num_labels)]
+            self.embedding_dim = config.hidden_size
+            self.max_length = max_length
+            self.batch_size = batch_size
+
+            # Tokenizers are not safe to share across threads mid-call
+            self._tokenizer_lock = threading.Lock()
+
+            logger.info(f"Inference engine loaded {model_name} on {self.device}")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize inference engine: {str(e)}")
+            raise
+
+    def infer(self, texts):
+        """
+        Emotion logits and pooled embeddings for a batch of texts
+
+        Texts are sorted by length before batching so each forward pass pads to a
+        similar length; outputs are returned in input order.
+
+        Args:
+            texts (list): Input texts
+
+        Returns:
+            dict: 'labels' (list of emotion names), 'logits' float32
+                (n, num_labels) and 'embeddings' float32 (n, hidden_size)
+        """
+        n = len(texts)
+        logits = np.zeros((n, len(self.labels)), dtype=np.float32)
+        embeddings = np.zeros((n, self.embedding_dim), dtype=np.float32)
+        if n == 0:
+            return {'labels': self.labels, 'logits': logits, 'embeddings': embeddings}
+
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        torch = self._torch
+
+        with torch.inference_mode():
+            for start in range(0, n, self.batch_size):
+                rows = order[start:start + self.batch_size]
+                with self._tokenizer_lock:
+                    encoded = self.tokenizer(
+                        [texts[i] for i in rows],
+                        padding=True,
+                        truncation=True,
+                        max_length=self.max_length,
+                        return_tensors='pt'
+                    )
+                encoded = encoded.to(self.device)
+                outputs = self.model(**encoded, output_hidden_states=True)
+
+                hidden = outputs.hidden_states[-1]
+                mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+
+                # Softmax (with calibration) is applied by the caller's output shaper
+                logits[rows] = outputs.logits.float().cpu().numpy()
+                embeddings[rows] = pooled.float().cpu().numpy()
+
+        return {'labels': self.labels, 'logits': logits, 'embeddings': embeddings}
+
+    def encode(self, texts):
+        """Pooled embeddings only; still a single forward pass per batch"""
+        return self.infer(texts)['embeddings']
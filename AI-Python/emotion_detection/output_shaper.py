@@ -0,0 +1,155 @@
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 3
+
+def softmax(logits, temperature=1.0):
+    """Row-wise softmax of logits / temperature as float32"""
+    scaled = np.asarray(logits, dtype=np.float32) / np.float32(temperature)
+    scaled = scaled - scaled.max(axis=-1, keepdims=True)
+    np.exp(scaled, out=scaled)
+    scaled /= scaled.sum(axis=-1, keepdims=True)
+    return scaled
+
+def fit_temperature(logits, targets, bounds=(0.05, 20.0), iterations=60):
+    """
+    Fit a softmax temperature on held-out data by minimizing negative log-likelihood
+
+    The NLL is unimodal in log(T), so a golden-section search is enough.
+
+    Args:
+        logits (np.ndarray): (n, num_labels) raw model logits
+        targets (np.ndarray): (n,) true label indices
+        bounds (tuple): Search range for the temperature
+        iterations (int): Golden-section steps
+
+    Returns:
+        float: Temperature; > 1 softens overconfident models
+    """
+    logits = np.asarray(logits, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.int64)
+    rows = np.arange(len(targets))
+
+    def nll(log_temperature):
+        scaled = logits / np.exp(log_temperature)
+        scaled -= scaled.max(axis=1, keepdims=True)
+        log_norm = np.log(np.exp(scaled).sum(axis=1))
+        return float(np.mean(log_norm - scaled[rows, targets]))
+
+    ratio = (np.sqrt(5.0) - 1.0) / 2.0
+    lo, hi = np.log(bounds[0]), np.log(bounds[1])
+    a, b = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    fa, fb = nll(a), nll(b)
+    for _ in range(iterations):
+        if fa < fb:
+            hi, b, fb = b, a, fa
+            a = hi - ratio * (hi - lo)
+            fa = nll(a)
+        else:
+            lo, a, fa = a, b, fb
+            b = lo + ratio * (hi - lo)
+            fb = nll(b)
+    return float(np.exp((lo + hi) / 2.0))
+
+def load_temperature(path):
+    """Temperature from a calibration file written by this module's CLI, or None"""
+    try:
+        with open(path) as handle:
+            return float(json.load(handle)['temperature'])
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Could not load emotion calibration from {path}: {str(e)}")
+        return None
+
+class EmotionOutputShaper:
+    def __init__(self, labels, top_k=None, temperature=None):
+        """
+        Turn emotion logits into calibrated probabilities and compact top-k results
+
+        Scores stay in fixed-order float32 arrays (one column per label) through
+        the batch; label -> score dicts are only built for the top-k labels of
+        each result.
+
+        Args:
+            labels (list): Label names in column order
+            top_k (int): Emotions returned per result, 0 for all; env EMOTION_TOP_K
+            temperature (float): Softmax temperature; defaults to env
+                EMOTION_TEMPERATURE, then the file at EMOTION_CALIBRATION_PATH, then 1.0
+        """
+        self.labels = list(labels)
+        if top_k is None:
+            top_k = int(os.environ.get('EMOTION_TOP_K', DEFAULT_TOP_K))
+        self.top_k = min(top_k, len(self.labels)) if top_k > 0 else len(self.labels)
+
+        if temperature is None and os.environ.get('EMOTION_TEMPERATURE'):
+            temperature = float(os.environ['EMOTION_TEMPERATURE'])
+        if temperature is None and os.environ.get('EMOTION_CALIBRATION_PATH'):
+            temperature = load_temperature(os.environ['EMOTION_CALIBRATION_PATH'])
+        self.temperature = temperature or 1.0
+
+    def probabilities(self, logits):
+        """Calibrated probabilities, float32 (n, num_labels)"""
+        return softmax(logits, self.temperature)
+
+    def rank(self, probabilities, k):
+        """
+        Top-k columns per row without sorting every label
+
+        Args:
+            probabilities (np.ndarray): (n, num_labels) scores
+            k (int): Columns to keep
+
+        Returns:
+            tuple: (indices, scores), each (n, k), highest score first
+        """
+        probabilities = np.asarray(probabilities)
+        k = min(k, probabilities.shape[1])
+        if k < probabilities.shape[1]:
+            # A negligible per-column offset makes ties at the cut resolve to earlier labels
+            key = np.arange(probabilities.shape[1]) * 1e-9 - probabilities.astype(np.float64)
+            top = np.argpartition(key, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(k), (probabilities.shape[0], k))
+        scores = np.take_along_axis(probabilities, top, axis=1)
+        # Highest score first; ties keep label (column) order
+        order = np.lexsort((top, -scores), axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+    def shape(self, probabilities):
+        """
+        Per-row ranking for result assembly
+
+        Returns:
+            list: One (ranked label list, ranked score list, top-k emotions dict)
+                per row; at least two ranked labels so a secondary emotion exists
+        """
+        indices, scores = self.rank(probabilities, max(self.top_k, 2))
+        shaped = []
+        for row_indices, row_scores in zip(indices.tolist(), scores.tolist()):
+            ranked_labels = [self.labels[i] for i in row_indices]
+            emotions = dict(zip(ranked_labels[:self.top_k], row_scores[:self.top_k]))
+            shaped.append((ranked_labels, row_scores, emotions))
+        return shaped
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fit the emotion softmax temperature from held-out logits'
+    )
+    parser.add_argument('data', help='.npz file with "logits" (n, num_labels) and "targets" (n,) arrays')
+    parser.add_argument('--output', default='emotion_calibration.json')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    data = np.load(args.data)
+    temperature = fit_temperature(data['logits'], data['targets'])
+    with open(args.output, 'w') as handle:
+        json.dump({'temperature': temperature, 'samples': int(len(data['targets']))}, handle)
+    logger.info(f'temperature={temperature:.4f} written to {args.output}; set EMOTION_CALIBRATION_PATH to use it')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from emotion_detection.fallback_emotion import (
+    EmotionAnalyzer as FallbackEmotionAnalyzer,
+    FALLBACK_CATEGORIES,
+    sentiment_fields,
+    sentiment_intensity
+)
+from utils.latency_tracker import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+TRANSFORMER_TIER = 'transformer'
+FALLBACK_TIER = 'fallback'
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+DEFAULT_UNLOCK = {'days': 14, 'rationale': 'Default recommendation'}
+
+def normalize_result(result, tier):
+    """
+    Emotion result in the schema shared by every tier
+
+    Fields: primary_emotion, secondary_emotion, confidence, emotions, sentiment
+    (compound/positive/negative/neutral), category, intensity, recommendedUnlock,
+    contextualTags and tier, plus error when the analyzer reported one. Fields
+    an analyzer left out are derived from the others.
+    """
+    primary = result.get('primary_emotion') or result.get('dominant_emotion') or 'neutral'
+    sentiment = sentiment_fields(result.get('sentiment'))
+    normalized = {
+        'primary_emotion': primary,
+        'secondary_emotion': result.get('secondary_emotion') or primary,
+        'confidence': float(result.get('confidence') or 0.0),
+        'emotions': result.get('emotions') or {},
+        'sentiment': sentiment,
+        'category': result.get('category') or FALLBACK_CATEGORIES.get(primary, 'neutral'),
+        'intensity': result.get('intensity') or sentiment_intensity(sentiment['compound']),
+        'recommendedUnlock': result.get('recommendedUnlock') or dict(DEFAULT_UNLOCK),
+        'contextualTags': result.get('contextualTags') or ['general-memory'],
+        'tier': tier
+    }
+    if result.get('error'):
+        normalized['error'] = result['error']
+    return normalized
+
+def _setting(value, env, default):
+    """Explicit argument (0 included), else the environment variable, else the default"""
+    return value if value is not None else os.environ.get(env, default)
+
+class CircuitBreaker:
+    def __init__(self, latency, p95_limit_ms, failure_threshold=3, cooldown=30.0, min_samples=20):
+        """
+        Trip to the fallback tier when the primary tier is slow or failing
+
+        Opens when recent p95 latency exceeds p95_limit_ms (once min_samples are
+        recorded) or after failure_threshold consecutive failures. After cooldown
+        seconds one probe request is let through; success closes the breaker.
+
+        Args:
+            latency (LatencyTracker): Tracker holding primary-tier samples
+            p95_limit_ms (float): Latency ceiling for the primary tier
+            failure_threshold (int): Consecutive timeouts/errors before opening
+            cooldown (float): Seconds to stay open before probing
+            min_samples (int): Samples needed before p95 is trusted
+        """
+        self.latency = latency
+        self.p95_limit_ms = p95_limit_ms
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.open_reason = None
+        self.failures = 0
+        self.trips = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether the next request may use the primary tier"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, seconds):
+        self.latency.record(TRANSFORMER_TIER, seconds)
+        with self._lock:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if seconds * 1000.0 <= self.p95_limit_ms:
+                    # Start the latency window fresh so old slow samples do not re-trip it
+                    self.latency.reset(TRANSFORMER_TIER)
+                    self._close()
+                else:
+                    self._open('probe too slow')
+                return
+
+        stats = self.latency.stats(TRANSFORMER_TIER)
+        if stats['count'] >= self.min_samples and stats['p95_ms'] > self.p95_limit_ms:
+            with self._lock:
+                if self.state == CLOSED:
+                    self._open(f"p95 {stats['p95_ms']:.0f}ms over {self.p95_limit_ms:.0f}ms")
+
+    def record_failure(self, reason):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._open(reason)
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open(reason)
+
+    def _open(self, reason):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.open_reason = reason
+        self.trips += 1
+        logger.warning(f"Emotion circuit breaker opened: {reason}")
+
+    def _close(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self.open_reason = None
+        logger.info("Emotion circuit breaker closed")
+
+    def get_status(self):
+        return {
+            'state': self.state,
+            'reason': self.open_reason,
+            'consecutive_failures': self.failures,
+            'trips': self.trips,
+            'p95_limit_ms': self.p95_limit_ms
+        }
+
+class TieredEmotionService:
+    def __init__(self, mode=None, deadline_ms=None, p95_limit_ms=None, max_in_flight=None,
+                 primary=None, fallback=None, memory_monitor=None):
+        """
+        Emotion analysis that prefers the transformer model and degrades per request
+
+        The transformer EmotionAnalyzer loads in the background. Each request uses it
+        only when it is loaded, the circuit breaker is closed and fewer than
+        max_in_flight requests are already waiting on it; the call must also finish
+        within the deadline. Otherwise the heuristic analyzer answers. Every result
+        carries a 'tier' field naming the analyzer that produced it, and both tiers
+        share one result schema (see normalize_result). A primary result carrying
+        an 'error' counts as a model failure and is answered by the fallback.
+
+        Args:
+            mode (str): 'auto' (default), 'transformer' (wait for the model at startup)
+                or 'fallback' (never load it); env EMOTION_TIER
+            deadline_ms (float): Per-request budget for the transformer; env EMOTION_DEADLINE_MS
+            p95_limit_ms (float): Breaker latency ceiling; env EMOTION_P95_LIMIT_MS
+            max_in_flight (int): Queue depth at which requests go straight to the
+                fallback; env EMOTION_MAX_IN_FLIGHT
+            primary: Preloaded primary analyzer (skips background loading)
+            fallback: Fallback analyzer; defaults to the heuristic EmotionAnalyzer
+            memory_monitor (MemoryMonitor): Accounts for the transformer and keeps
+                the service on the fallback tier when it would exceed the memory budget
+        """
+        try:
+            self.mode = mode or os.environ.get('EMOTION_TIER', 'auto')
+            self.deadline_ms = float(_setting(deadline_ms, 'EMOTION_DEADLINE_MS', 800))
+            p95_limit_ms = float(_setting(p95_limit_ms, 'EMOTION_P95_LIMIT_MS', self.deadline_ms * 0.75))
+            self.max_in_flight = int(_setting(max_in_flight, 'EMOTION_MAX_IN_FLIGHT', 4))
+
+            self.fallback = fallback or FallbackEmotionAnalyzer()
+            self.primary = primary
+            self.load_error = None
+            self.memory_monitor = memory_monitor
+
+            self.latency = LatencyTracker(window=200)
+            self.breaker = CircuitBreaker(self.latency, p95_limit_ms)
+            self.tier_counts = Counter()
+            self.fallback_reasons = Counter()
+            self._in_flight = 0
+            self._lock = threading.Lock()
+
+            # Primary calls run here so the request thread can stop waiting at the deadline
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='emotion')
+
+            self._loader = None
+            if self.mode == TRANSFORMER_TIER or os.environ.get('EMOTION_LOAD_BACKGROUND', '1') == '0':
+                if self.primary is None and self.mode != FALLBACK_TIER:
+                    self._load_primary()
+            else:
+                self.start_loading()
+
+            logger.info(f"Tiered emotion service initialized (mode={self.mode}, deadline={self.deadline_ms:.0f}ms)")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize tiered emotion service: {str(e)}")
+            raise
+
+    def start_loading(self):
+        """Load the transformer in the background unless loaded, loading or disabled"""
+        if self.primary is not None or self.mode == FALLBACK_TIER or self.load_error:
+            return
+        if self._loader is None or not self._loader.is_alive():
+            self._loader = threading.Thread(target=self._load_primary, name='emotion-loader', daemon=True)
+            self._loader.start()
+
+    def _load_primary(self):
+        try:
+            tracking = nullcontext()
+            if self.memory_monitor is not None:
+                if not self.memory_monitor.can_load('emotion_transformer'):
+                    self.load_error = 'memory budget exceeded'
+                    return
+                tracking = self.memory_monitor.track('emotion_transformer')
+            with tracking:
+                from emotion_detection.emotion_analyzer import EmotionAnalyzer
+                self.primary = EmotionAnalyzer()
+        except Exception as e:
+            self.load_error = str(e)
+            logger.warning(f"Transformer emotion model unavailable, serving fallback tier: {str(e)}")
+
+    def get_version(self, tier=None):
+        """
+        Version of the analyzer behind a tier
+
+        Read from the loaded analyzers only, so the model is never imported on
+        a request thread. Until the transformer has loaded the fallback version
+        is reported; once it loads, results stamped while loading become stale
+        and are recomputed. Results degraded to the fallback while the breaker
+        is open carry the fallback version and count as stale the same way.
+
+        Args:
+            tier (str): 'transformer' or 'fallback'; defaults to the transformer
+                when it is loaded, otherwise the fallback
+        """
+        if tier is None:
+            tier = TRANSFORMER_TIER if self.primary is not None else FALLBACK_TIER
+        if tier == TRANSFORMER_TIER and self.primary is not None:
+            return f'{TRANSFORMER_TIER}-{self.primary.VERSION}'
+        return f'{FALLBACK_TIER}-{self.fallback.VERSION}'
+
+    @property
+    def provides_embeddings(self):
+        # Only the loaded transformer returns embeddings; a request that degrades
+        # to the fallback still gets None back from analyze_batch
+        return self.primary is not None and getattr(self.primary, 'provides_embeddings', False)
+
+    def _acquire(self):
+        """Reserve a primary-tier slot, or return the reason the fallback must answer"""
+        if self.primary is None:
+            return 'model not loaded'
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                return 'queue full'
+            if not self.breaker.allow():
+                return 'circuit open'
+            self._in_flight += 1
+        return None
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _run_primary(self, texts, sentiment_scores, return_embeddings):
+        try:
+            return self.primary.analyze_batch(texts, sentiment_scores, return_embeddings=return_embeddings)
+        finally:
+            self._release()
+
+    def analyze_batch(self, texts, sentiment_scores=None, return_embeddings=False):
+        """
+        Analyze a batch on the best available tier
+
+        The deadline grows with the number of 32-text forward passes in the batch.
+
+        Args:
+            texts (list): Texts to analyze
+            sentiment_scores (list): Optional precomputed VADER-style scores per text
+            return_embeddings (bool): Also return transformer embeddings (None on fallback)
+
+        Returns:
+            list: Results with a 'tier' field, or (results, embeddings) when
+                return_embeddings is set
+        """
+        if sentiment_scores is None:
+            sentiment_scores = [None] * len(texts)
+
+        reason = self._acquire() if texts else 'empty batch'
+        if reason is None:
+            deadline = self.deadline_ms / 1000.0 * max(1, math.ceil(len(texts) / 32))
+            start = time.perf_counter()
+            future = self._executor.submit(self._run_primary, texts, sentiment_scores, return_embeddings)
+            try:
+                output = future.result(timeout=deadline)
+                elapsed = time.perf_counter() - start
+                results, embeddings = output if return_embeddings else (output, None)
+                failed = [i for i, result in enumerate(results) if result.get('error')]
+                if not failed:
+                    self.breaker.record_success(elapsed)
+                    return self._finish(results, embeddings, [TRANSFORMER_TIER] * len(results), return_embeddings)
+                # The analyzer reports model errors per result instead of raising
+                self.breaker.record_failure('model error')
+                logger.error(f"Transformer emotion analysis failed: {results[failed[0]]['error']}")
+                return self._finish_degraded(texts, sentiment_scores, results, failed, return_embeddings)
+            except FutureTimeoutError:
+                # The call keeps its slot until it finishes, so a stuck model fills the queue
+                reason = 'deadline exceeded'
+                self.breaker.record_failure(reason)
+            except Exception as e:
+                reason = 'model error'
+                self.breaker.record_failure(reason)
+                logger.error(f"Transformer emotion analysis failed: {str(e)}")
+
+        results = self._run_fallback(texts, sentiment_scores, reason)
+        return self._finish(results, None, [FALLBACK_TIER] * len(results), return_embeddings)
+
+    def _run_fallback(self, texts, sentiment_scores, reason):
+        start = time.perf_counter()
+        results = self.fallback.analyze_batch(texts, sentiment_scores)
+        self.latency.record(FALLBACK_TIER, time.perf_counter() - start)
+        with self._lock:
+            self.fallback_reasons[reason] += 1
+        return results
+
+    def _finish_degraded(self, texts, sentiment_scores, results, failed, return_embeddings):
+        """Replace the primary results that report an error with fallback results"""
+        replacements = self._run_fallback(
+            [texts[i] for i in failed], [sentiment_scores[i] for i in failed], 'model error'
+        )
+        tiers = [TRANSFORMER_TIER] * len(results)
+        for i, replacement in zip(failed, replacements):
+            results[i] = replacement
+            tiers[i] = FALLBACK_TIER
+        # Embeddings of the failed rows are zeros; returning None makes callers re-encode
+        return self._finish(results, None, tiers, return_embeddings)
+
+    def _finish(self, results, embeddings, tiers, return_embeddings):
+        results = [normalize_result(result, tier) for result, tier in zip(results, tiers)]
+        with self._lock:
+            self.tier_counts.update(tiers)
+        if return_embeddings:
+            return results, embeddings
+        return results
+
+    def analyze(self, text, sentiment_scores=None):
+        """Analyze one text; see analyze_batch"""
+        return self.analyze_batch([text], [sentiment_scores])[0]
+
+    def encode(self, texts):
+        """Transformer embeddings; raises when the model is not loaded"""
+        if self.primary is None:
+            raise RuntimeError('transformer emotion model not loaded')
+        return self.primary.encode(texts)
+
+    def get_metrics(self):
+        """Tier usage, breaker state and latency per tier"""
+        with self._lock:
+            tier_counts = dict(self.tier_counts)
+            fallback_reasons = dict(self.fallback_reasons)
+            in_flight = self._in_flight
+        return {
+            'mode': self.mode,
+            'primary_loaded': self.primary is not None,
+            'load_error': self.load_error,
+            'deadline_ms': self.deadline_ms,
+            'in_flight': in_flight,
+            'max_in_flight': self.max_in_flight,
+            'breaker': self.breaker.get_status(),
+            'tiers': tier_counts,
+            'fallback_reasons': fallback_reasons,
+            'latency': {
+                TRANSFORMER_TIER: self.latency.stats(TRANSFORMER_TIER),
+                FALLBACK_TIER: self.latency.stats(FALLBACK_TIER)
+            }
+        }
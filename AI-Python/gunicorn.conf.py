@@ -0,0 +1,50 @@
+"""
+Gunicorn settings for the AI service
+
+Start with: gunicorn -c gunicorn.conf.py
+Worker class, worker/thread counts, preloading and recycling are derived in
+utils.server_config from SERVER_MODE, the CPU count and the model footprint.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.runtime_config import configure_process, configure_worker
+from utils.server_config import resolve_server_config
+
+server_config = resolve_server_config()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+wsgi_app = server_config['wsgi_app']
+worker_class = server_config['worker_class']
+workers = server_config['workers']
+threads = server_config['threads']
+preload_app = server_config['preload_app']
+max_requests = server_config['max_requests']
+max_requests_jitter = server_config['max_requests_jitter']
+timeout = server_config['timeout']
+keepalive = server_config['keepalive']
+
+# Export the per-worker thread counts before any worker imports numpy or torch
+os.environ.setdefault('WEB_CONCURRENCY', str(workers))
+configure_process(workers)
+
+if preload_app:
+    # Load models once in the master so workers share them copy-on-write, and
+    # leave background threads to the workers (threads do not survive fork)
+    os.environ['GUNICORN_PRELOAD'] = '1'
+    os.environ.setdefault('EMOTION_LOAD_BACKGROUND', '0')
+
+def on_starting(server):
+    server.log.info(f"Server config: {server_config}")
+
+def post_fork(server, worker):
+    # worker.age counts spawns; replacements reuse the slot of the worker they replace
+    # only approximately, which is fine for spreading CPU slices
+    index = (worker.age - 1) % workers
+    os.environ['WORKER_INDEX'] = str(index)
+    configure_worker(index, workers)
+    if preload_app:
+        import app as service
+        service.start_background_workers()
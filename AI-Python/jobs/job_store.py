@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'jobs.sqlite3')
+
+QUEUED, RUNNING, COMPLETED, FAILED = 'queued', 'running', 'completed', 'failed'
+FINISHED_STATES = (COMPLETED, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    worker TEXT,
+    lease_expires REAL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    result TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+class JobStore:
+    def __init__(self, path=None):
+        """
+        SQLite-backed job queue shared by every worker process on the host
+
+        Jobs and per-item results are committed as they are produced, so a
+        restarted worker resumes from the first unfinished item. Workers claim
+        jobs with a lease; a job whose lease expires (worker died) is claimable again.
+
+        Args:
+            path (str): Database file; defaults to JOBS_DB_PATH or data/jobs.sqlite3
+        """
+        try:
+            self.path = path or os.environ.get('JOBS_DB_PATH', DEFAULT_DB_PATH)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # sqlite3 connections must stay on the thread that created them
+            self._local = threading.local()
+            connection = self._connect()
+            connection.executescript(SCHEMA)
+
+            logger.info(f"Job store initialized at {self.path}")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize job store: {str(e)}")
+            raise
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        # A connection inherited across fork (preloaded server) must not be reused
+        if connection is not None and self._local.pid != os.getpid():
+            connection = None
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            # WAL lets readers (status polls) proceed while a worker writes results
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _now(self):
+        return datetime.utcnow().isoformat()
+
+    def create(self, items, kind='analyze', idempotency_key=None):
+        """
+        Enqueue a job, or return the existing job for a repeated idempotency key
+
+        Args:
+            items (list): JSON-serializable work items
+            kind (str): Processor name
+            idempotency_key (str): Client key; resubmissions with it are deduplicated
+
+        Returns:
+            tuple: (job dict, created bool)
+        """
+        connection = self._connect()
+        if idempotency_key:
+            existing = connection.execute(
+                'SELECT id FROM jobs WHERE idempotency_key = ?', (idempotency_key,)
+            ).fetchone()
+            if existing:
+                return self.get(existing['id']), False
+
+        job_id = uuid.uuid4().hex
+        now = self._now()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT INTO jobs (id, idempotency_key, kind, status, total, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, idempotency_key, kind, QUEUED, len(items), now, now)
+            )
+            connection.executemany(
+                'INSERT INTO job_items (job_id, idx, item) VALUES (?, ?, ?)',
+                ((job_id, i, json.dumps(item)) for i, item in enumerate(items))
+            )
+            connection.execute('COMMIT')
+        except sqlite3.IntegrityError:
+            # Another process inserted the same idempotency key first
+            connection.execute('ROLLBACK')
+            existing = connection.execute(
+                'SELECT id FROM jobs WHERE idempotency_key = ?', (idempotency_key,)
+            ).fetchone()
+            return self.get(existing['id']), False
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return self.get(job_id), True
+
+    def claim(self, worker, lease_seconds=60):
+        """
+        Claim the oldest queued job, or a running job whose lease has expired
+
+        Returns:
+            dict: Claimed job, or None when there is nothing to do
+        """
+        connection = self._connect()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT id FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) '
+                'ORDER BY created_at LIMIT 1',
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                connection.execute('COMMIT')
+                return None
+            connection.execute(
+                'UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, updated_at = ? WHERE id = ?',
+                (RUNNING, worker, now + lease_seconds, self._now(), row['id'])
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return self.get(row['id'])
+
+    def pending_items(self, job_id, limit):
+        """Next unprocessed items as (idx, item) pairs"""
+        rows = self._connect().execute(
+            'SELECT idx, item FROM job_items WHERE job_id = ? AND result IS NULL ORDER BY idx LIMIT ?',
+            (job_id, limit)
+        ).fetchall()
+        return [(row['idx'], json.loads(row['item'])) for row in rows]
+
+    def save_results(self, job_id, results, worker, lease_seconds=60):
+        """
+        Persist results for a chunk of items and renew the worker's lease
+
+        Args:
+            job_id (str): Job id
+            results (list): (idx, result dict) pairs; results with success False count as failed
+            worker (str): Worker holding the lease
+
+        Returns:
+            bool: False when the lease was lost to another worker (stop processing)
+        """
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            owner = connection.execute('SELECT worker FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if owner is None or owner['worker'] != worker:
+                connection.execute('ROLLBACK')
+                return False
+            # Count only rows written here; items already saved (e.g. by a worker
+            # whose lease expired mid-chunk) are neither overwritten nor counted twice
+            processed = failed = 0
+            for idx, result in results:
+                written = connection.execute(
+                    'UPDATE job_items SET result = ? WHERE job_id = ? AND idx = ? AND result IS NULL',
+                    (json.dumps(result), job_id, idx)
+                ).rowcount
+                processed += written
+                if written and not result.get('success', True):
+                    failed += 1
+            connection.execute(
+                'UPDATE jobs SET processed = processed + ?, failed = failed + ?, lease_expires = ?, '
+                'updated_at = ? WHERE id = ?',
+                (processed, failed, time.time() + lease_seconds, self._now(), job_id)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return True
+
+    def finish(self, job_id, worker, error=None):
+        """
+        Mark a job completed, or failed with an error message
+
+        Args:
+            job_id (str): Job id
+            worker (str): Worker holding the lease
+            error (str): Failure message; None marks the job completed
+
+        Returns:
+            bool: False when another worker holds the job (it was left unchanged)
+        """
+        cursor = self._connect().execute(
+            'UPDATE jobs SET status = ?, error = ?, lease_expires = NULL, updated_at = ? '
+            'WHERE id = ? AND worker = ?',
+            (FAILED if error else COMPLETED, error, self._now(), job_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        """Job status and progress, or None"""
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'idempotency_key': row['idempotency_key'],
+            'progress': {
+                'total': row['total'],
+                'processed': row['processed'],
+                'failed': row['failed']
+            },
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+    def results(self, job_id, after=-1, limit=None):
+        """
+        Finished item results in item order
+
+        Args:
+            job_id (str): Job id
+            after (int): Only items with a larger index (for incremental polling)
+            limit (int): Maximum results to return
+
+        Returns:
+            list: (idx, result dict) pairs
+        """
+        query = 'SELECT idx, result FROM job_items WHERE job_id = ? AND idx > ? AND result IS NOT NULL ORDER BY idx'
+        params = [job_id, after]
+        if limit:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        rows = self._connect().execute(query, params).fetchall()
+        return [(row['idx'], json.loads(row['result'])) for row in rows]
+
+    def get_stats(self):
+        """Job counts per status"""
+        rows = self._connect().execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
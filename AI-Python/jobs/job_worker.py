@@ -0,0 +1,117 @@
+import logging
+import os
+import socket
+import threading
+
+logger = logging.getLogger(__name__)
+
+class JobWorker:
+    def __init__(self, store, processors, batch_size=16, poll_interval=1.0, lease_seconds=60):
+        """
+        Background thread that claims jobs from a JobStore and processes them in chunks
+
+        Args:
+            store (JobStore): Shared job store
+            processors (dict): kind -> callable(list of items) -> list of result dicts
+            batch_size (int): Items per processor call (and per results commit)
+            poll_interval (float): Seconds to sleep when the queue is empty
+            lease_seconds (float): Lease renewed after every chunk; a job whose
+                worker stops renewing is picked up by another worker
+        """
+        self.store = store
+        self.processors = processors
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        self.jobs_processed = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread if it is not running (safe to call per request)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                # Forked processes inherit no threads; key the id to this pid
+                self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+                self._thread = threading.Thread(target=self._run, name='job-worker', daemon=True)
+                self._thread.start()
+
+    def notify(self):
+        """Wake the worker after a job was submitted"""
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                job = self.store.claim(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Job claim failed: {str(e)}")
+                job = None
+
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            self.process(job)
+
+    def process(self, job):
+        """Process every unfinished item of a claimed job"""
+        job_id = job['id']
+        processor = self.processors.get(job['kind'])
+        if processor is None:
+            self.store.finish(job_id, self.worker_id, error=f"Unknown job kind: {job['kind']}")
+            return
+
+        try:
+            while True:
+                chunk = self.store.pending_items(job_id, self.batch_size)
+                if not chunk:
+                    break
+                results = self._process_chunk(processor, [item for _, item in chunk])
+                owned = self.store.save_results(
+                    job_id,
+                    [(idx, result) for (idx, _), result in zip(chunk, results)],
+                    self.worker_id,
+                    self.lease_seconds
+                )
+                if not owned:
+                    logger.warning(f"Lost lease on job {job_id}, stopping")
+                    return
+            if not self.store.finish(job_id, self.worker_id):
+                logger.warning(f"Lost lease on job {job_id} before finishing")
+                return
+            self.jobs_processed += 1
+            logger.info(f"Job {job_id} completed")
+
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self.store.finish(job_id, self.worker_id, error=str(e))
+
+    def _process_chunk(self, processor, items):
+        """Run a chunk through the batched processor, isolating failures per item"""
+        try:
+            return processor(items)
+        except Exception as e:
+            logger.warning(f"Batch processing failed, retrying items individually: {str(e)}")
+
+        results = []
+        for item in items:
+            try:
+                results.extend(processor([item]))
+            except Exception as e:
+                item_id = item.get('id') if isinstance(item, dict) else None
+                results.append({'id': item_id, 'success': False, 'error': str(e)})
+        return results
+
+    def get_status(self):
+        return {
+            'worker': self.worker_id,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'jobs_processed': self.jobs_processed,
+            'jobs': self.store.get_stats()
+        }
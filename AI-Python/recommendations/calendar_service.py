@@ -0,0 +1,180 @@
+import logging
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Holiday rules per locale: (name, rule, kinds)
+#   ('fixed', month, day)
+#   ('nth_weekday', month, weekday, n)   weekday 0=Monday, n=-1 for the last one
+#   ('easter', offset_days)
+HOLIDAY_RULES = {
+    'US': [
+        ("New Year's Day", ('fixed', 1, 1), ('holiday',)),
+        ("Valentine's Day", ('fixed', 2, 14), ('holiday',)),
+        ('Easter', ('easter', 0), ('holiday', 'family')),
+        ("Mother's Day", ('nth_weekday', 5, 6, 2), ('holiday', 'family')),
+        ("Father's Day", ('nth_weekday', 6, 6, 3), ('holiday', 'family')),
+        ('Independence Day', ('fixed', 7, 4), ('holiday',)),
+        ('Halloween', ('fixed', 10, 31), ('holiday',)),
+        ('Thanksgiving', ('nth_weekday', 11, 3, 4), ('holiday', 'family')),
+        ('Christmas', ('fixed', 12, 25), ('holiday', 'family')),
+        ("New Year's Eve", ('fixed', 12, 31), ('holiday',)),
+    ],
+    'GB': [
+        ("New Year's Day", ('fixed', 1, 1), ('holiday',)),
+        ("Valentine's Day", ('fixed', 2, 14), ('holiday',)),
+        ('Mothering Sunday', ('easter', -21), ('holiday', 'family')),
+        ('Easter', ('easter', 0), ('holiday', 'family')),
+        ("Father's Day", ('nth_weekday', 6, 6, 3), ('holiday', 'family')),
+        ('Bonfire Night', ('fixed', 11, 5), ('holiday',)),
+        ('Christmas', ('fixed', 12, 25), ('holiday', 'family')),
+        ('Boxing Day', ('fixed', 12, 26), ('holiday', 'family')),
+        ("New Year's Eve", ('fixed', 12, 31), ('holiday',)),
+    ],
+    'IN': [
+        ("New Year's Day", ('fixed', 1, 1), ('holiday',)),
+        ('Republic Day', ('fixed', 1, 26), ('holiday',)),
+        ("Mother's Day", ('nth_weekday', 5, 6, 2), ('holiday', 'family')),
+        ("Father's Day", ('nth_weekday', 6, 6, 3), ('holiday', 'family')),
+        ('Independence Day', ('fixed', 8, 15), ('holiday',)),
+        ("Teachers' Day", ('fixed', 9, 5), ('holiday',)),
+        ('Gandhi Jayanti', ('fixed', 10, 2), ('holiday',)),
+        ("Children's Day", ('fixed', 11, 14), ('holiday', 'family')),
+        ('Christmas', ('fixed', 12, 25), ('holiday', 'family')),
+    ],
+}
+
+DEFAULT_LOCALE = 'US'
+
+def _easter_sunday(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def _resolve_rule(rule, year):
+    """Resolve a holiday rule to a concrete date in the given year"""
+    kind = rule[0]
+    if kind == 'fixed':
+        return date(year, rule[1], rule[2])
+    if kind == 'nth_weekday':
+        _, month, weekday, n = rule
+        if n > 0:
+            first = date(year, month, 1)
+            return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        last = next_month - timedelta(days=1)
+        return last - timedelta(days=(last.weekday() - weekday) % 7)
+    if kind == 'easter':
+        return _easter_sunday(year) + timedelta(days=rule[1])
+    raise ValueError(f'Unknown holiday rule: {kind}')
+
+@lru_cache(maxsize=256)
+def _event_table(locale, year, kind):
+    """
+    Sorted event table for one locale, year and event kind
+
+    Returns:
+        tuple: (ordinals, names) where ordinals is a sorted tuple of date ordinals
+    """
+    rules = HOLIDAY_RULES.get(locale, HOLIDAY_RULES[DEFAULT_LOCALE])
+    events = sorted(
+        (_resolve_rule(rule, year).toordinal(), name)
+        for name, rule, kinds in rules
+        if kind in kinds
+    )
+    return tuple(ordinal for ordinal, _ in events), tuple(name for _, name in events)
+
+class CalendarService:
+    def __init__(self, locale=DEFAULT_LOCALE):
+        """
+        Initialize calendar service
+
+        Args:
+            locale (str): Default locale code for holiday tables
+        """
+        try:
+            self.locale = self._normalize_locale(locale)
+            self._lock = threading.Lock()
+            self._today = None
+            self._daily_cache = {}
+            logger.info("Calendar service initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize calendar service: {str(e)}")
+            raise
+
+    def today(self):
+        """Current date; resets the per-day lookup cache when the date changes"""
+        current = date.today()
+        if current != self._today:
+            with self._lock:
+                if current != self._today:
+                    self._daily_cache = {}
+                    self._today = current
+        return current
+
+    def next_event(self, after=None, locale=None, kind='holiday'):
+        """
+        Find the first event strictly after a date
+
+        Args:
+            after (date|datetime): Reference date, defaults to today
+            locale (str): Locale code, defaults to the service locale
+            kind (str): 'holiday' or 'family'
+
+        Returns:
+            dict: {'name', 'date'} with date as a datetime at midnight; a new
+                dict per call, so callers may modify it
+        """
+        locale = self._normalize_locale(locale or self.locale)
+
+        if after is None:
+            key = (locale, kind)
+            today = self.today()
+            cached = self._daily_cache.get(key)
+            if cached is None:
+                cached = self._lookup(today, locale, kind)
+                self._daily_cache[key] = cached
+            # The cached entry is shared by every caller today
+            return dict(cached)
+
+        return self._lookup(self._as_date(after), locale, kind)
+
+    def _lookup(self, after, locale, kind):
+        """Binary search this year's table, falling through to later years"""
+        ordinal = after.toordinal()
+        year = after.year
+        # Every locale has at least one event per kind, so two years always suffice
+        for candidate_year in (year, year + 1):
+            ordinals, names = _event_table(locale, candidate_year, kind)
+            pos = bisect_right(ordinals, ordinal)
+            if pos < len(ordinals):
+                return {
+                    'name': names[pos],
+                    'date': datetime.fromordinal(ordinals[pos])
+                }
+        raise ValueError(f'No {kind} events defined for locale {locale}')
+
+    def _as_date(self, value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).date()
+
+    def _normalize_locale(self, locale):
+        locale = str(locale or DEFAULT_LOCALE).upper().replace('-', '_')
+        # Accept full locale tags such as en_US or en-GB
+        region = locale.split('_')[-1]
+        return region if region in HOLIDAY_RULES else DEFAULT_LOCALE
@@ -3,12 +3,22 @@ import logging
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from recommendations.calendar_service import CalendarService, DEFAULT_LOCALE
+
 logger = logging.getLogger(__name__)
 
 class RecommendationEngine:
-    def __init__(self):
-        """Initialize recommendation engine"""
+    def __init__(self, calendar=None, locale=DEFAULT_LOCALE):
+        """
+        Initialize recommendation engine
+        
+        Args:
+            calendar (CalendarService): Shared calendar service, created if omitted
+            locale (str): Default locale for holiday suggestions
+        """
         try:
+            self.locale = locale
+            self.calendar = calendar or CalendarService(locale)
             logger.info("Recommendation engine initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize recommendation engine: {str(e)}")
@@ -53,13 +63,15 @@ class RecommendationEngine:
                 'category_recommendations': []
             }
 
-    def suggest_unlock_timing(self, unlock_conditions, content_analysis):
+    def suggest_unlock_timing(self, unlock_conditions, content_analysis, locale=None, reference_dates=None):
         """
         Suggest optimal unlock timing based on content analysis
         
         Args:
             unlock_conditions (dict): Current unlock conditions
             content_analysis (dict): AI analysis of content
+            locale (str): Locale for holiday lookup, overrides unlock_conditions['locale']
+            reference_dates (dict): Precomputed dates from get_reference_dates
             
         Returns:
             list: Unlock timing suggestions
@@ -67,6 +79,10 @@ class RecommendationEngine:
         try:
             suggestions = []
             
+            if reference_dates is None:
+                locale = locale or (unlock_conditions or {}).get('locale')
+                reference_dates = self.get_reference_dates(locale)
+            
             # Analyze emotion and sentiment
             emotion = content_analysis.get('emotion', {})
             sentiment = content_analysis.get('sentiment', {})
@@ -74,14 +90,14 @@ class RecommendationEngine:
             # Suggest timing based on emotional content
             if emotion.get('primary') in ['joy', 'love', 'optimism']:
                 suggestions.append({
-                    'suggested_date': self._get_next_holiday(),
+                    'suggested_date': reference_dates['holiday'],
                     'reason': 'Positive emotional content is perfect for holiday sharing',
                     'confidence': 0.85
                 })
             
             if sentiment.get('score', 0) > 0.7:
                 suggestions.append({
-                    'suggested_date': self._get_next_birthday(),
+                    'suggested_date': reference_dates['birthday'],
                     'reason': 'High positive sentiment content for birthday celebration',
                     'confidence': 0.78
                 })
@@ -90,7 +106,7 @@ class RecommendationEngine:
             topics = content_analysis.get('topics', [])
             if 'family' in topics:
                 suggestions.append({
-                    'suggested_date': self._get_next_family_event(),
+                    'suggested_date': reference_dates['family_event'],
                     'reason': 'Family-related content for family gathering',
                     'confidence': 0.82
                 })
@@ -101,13 +117,59 @@ class RecommendationEngine:
             logger.error(f"Unlock timing suggestion failed: {str(e)}")
             return []
 
-    def suggest_sharing(self, capsule_data, content_analysis):
+    def suggest_unlock_timing_batch(self, items, locale=None):
+        """
+        Suggest unlock timing for many capsules, resolving calendars once per locale
+        
+        Args:
+            items (list): (unlock_conditions, content_analysis) pairs
+            locale (str): Default locale for items that do not set one
+            
+        Returns:
+            list: One suggestion list per item, or {'error'} for an item whose
+                unlock_conditions is not an object
+        """
+        reference_by_locale = {}
+        results = []
+        for unlock_conditions, content_analysis in items:
+            if unlock_conditions is not None and not isinstance(unlock_conditions, dict):
+                results.append({'error': 'unlock_conditions must be an object'})
+                continue
+            item_locale = (unlock_conditions or {}).get('locale') or locale or self.locale
+            if item_locale not in reference_by_locale:
+                reference_by_locale[item_locale] = self.get_reference_dates(item_locale)
+            results.append(self.suggest_unlock_timing(
+                unlock_conditions,
+                content_analysis,
+                reference_dates=reference_by_locale[item_locale]
+            ))
+        return results
+
+    def get_reference_dates(self, locale=None):
+        """
+        Get the upcoming calendar dates used by unlock suggestions
+        
+        Args:
+            locale (str): Locale code
+            
+        Returns:
+            dict: ISO dates for 'holiday', 'birthday' and 'family_event'
+        """
+        locale = locale or self.locale
+        return {
+            'holiday': self._get_next_holiday(locale),
+            'birthday': self._get_next_birthday(),
+            'family_event': self._get_next_family_event(locale)
+        }
+
+    def suggest_sharing(self, capsule_data, content_analysis, related_capsules=None):
         """
         Suggest sharing opportunities based on content
         
         Args:
             capsule_data (dict): Capsule data
             content_analysis (dict): Content analysis results
+            related_capsules (list): Similar capsules from the similarity index
             
         Returns:
             list: Sharing suggestions
@@ -142,6 +204,19 @@ class RecommendationEngine:
                     'confidence': 0.80
                 })
             
+            # Suggest sharing together with closely related capsules
+            related = [
+                capsule for capsule in (related_capsules or [])
+                if capsule.get('score', 0) >= 0.5
+            ]
+            if related:
+                suggestions.append({
+                    'recipients': [],
+                    'related_capsules': [capsule['capsule_id'] for capsule in related],
+                    'reason': 'Similar memories can be shared together as a collection',
+                    'confidence': round(float(np.mean([capsule['score'] for capsule in related])), 2)
+                })
+            
             return suggestions
             
         except Exception as e:
@@ -153,7 +228,8 @@ class RecommendationEngine:
         suggestions = []
         
         # Suggest seasonal unlocks
-        current_date = datetime.now()
+        current_date = datetime.combine(self.calendar.today(), datetime.min.time())
+        next_holiday = self.calendar.next_event(locale=preferences.get('locale') or self.locale)
         
         suggestions.append({
             'type': 'seasonal',
@@ -166,8 +242,8 @@ class RecommendationEngine:
         suggestions.append({
             'type': 'holiday',
             'description': 'Create a holiday celebration capsule',
-            'reason': 'Holiday season approaching',
-            'suggested_date': current_date + timedelta(days=60),
+            'reason': f"{next_holiday['name']} is approaching",
+            'suggested_date': next_holiday['date'],
             'confidence': 0.85
         })
         
@@ -240,26 +316,18 @@ class RecommendationEngine:
         
         return suggestions
 
-    def _get_next_holiday(self):
+    def _get_next_holiday(self, locale=None):
         """Get next major holiday date"""
-        current_date = datetime.now()
-        
-        # Simple holiday calculation (Christmas)
-        christmas = datetime(current_date.year, 12, 25)
-        if christmas < current_date:
-            christmas = datetime(current_date.year + 1, 12, 25)
-        
-        return christmas.isoformat()
+        return self.calendar.next_event(locale=locale, kind='holiday')['date'].isoformat()
 
     def _get_next_birthday(self):
         """Get next birthday date (mock)"""
-        current_date = datetime.now()
+        current_date = datetime.combine(self.calendar.today(), datetime.min.time())
         return (current_date + timedelta(days=30)).isoformat()
 
-    def _get_next_family_event(self):
-        """Get next family event date (mock)"""
-        current_date = datetime.now()
-        return (current_date + timedelta(days=45)).isoformat()
+    def _get_next_family_event(self, locale=None):
+        """Get next family-oriented holiday date"""
+        return self.calendar.next_event(locale=locale, kind='family')['date'].isoformat()
 
     def analyze_user_patterns(self, user_data):
         """
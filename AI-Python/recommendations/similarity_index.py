@@ -0,0 +1,239 @@
+import numpy as np
+import logging
+import threading
+
+# Import optional ANN backend only when available
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class SimilarityIndex:
+    def __init__(self, dim=256, initial_capacity=1024, backend='auto', ef_construction=200, m=16):
+        """
+        Initialize the related-capsule index
+
+        Args:
+            dim (int): Embedding dimensionality
+            initial_capacity (int): Number of vectors to reserve up front
+            backend (str): 'hnsw', 'numpy' or 'auto' (hnsw when hnswlib is installed)
+            ef_construction (int): HNSW build-time candidate list size
+            m (int): HNSW graph out-degree
+        """
+        try:
+            self.dim = int(dim)
+            self._lock = threading.RLock()
+
+            # External capsule ids <-> internal row labels
+            self._ids = []
+            self._id_to_row = {}
+
+            # Owner codes per row so lookups can stay inside one user's capsules
+            self._owner_codes = {}
+            self._owners = np.full(initial_capacity, -1, dtype=np.int32)
+
+            if backend == 'auto':
+                backend = 'hnsw' if HNSWLIB_AVAILABLE else 'numpy'
+            if backend == 'hnsw' and not HNSWLIB_AVAILABLE:
+                logger.warning("hnswlib not available, using NumPy similarity backend")
+                backend = 'numpy'
+            self.backend = backend
+
+            if self.backend == 'hnsw':
+                self._hnsw = hnswlib.Index(space='cosine', dim=self.dim)
+                self._hnsw.init_index(
+                    max_elements=initial_capacity,
+                    ef_construction=ef_construction,
+                    M=m
+                )
+            else:
+                # Row-major float32 matrix grown by doubling; vectors are unit length
+                self._vectors = np.zeros((initial_capacity, self.dim), dtype=np.float32)
+
+            logger.info(f"Similarity index initialized ({self.backend} backend, dim={self.dim})")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize similarity index: {str(e)}")
+            raise
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, capsule_id):
+        return str(capsule_id) in self._id_to_row
+
+    def add(self, capsule_ids, vectors, owners=None):
+        """
+        Insert or replace capsule embeddings
+
+        Args:
+            capsule_ids (list): Capsule ids, one per vector
+            vectors (np.ndarray): Embeddings of shape (n, dim)
+            owners (list): Optional owner (user) id per capsule
+
+        Returns:
+            int: Number of vectors written
+        """
+        vectors = self._normalize(vectors)
+        if len(capsule_ids) != vectors.shape[0]:
+            raise ValueError('capsule_ids and vectors must have the same length')
+        if owners is None:
+            owners = [None] * len(capsule_ids)
+
+        with self._lock:
+            rows = np.empty(len(capsule_ids), dtype=np.int64)
+            for i, capsule_id in enumerate(capsule_ids):
+                capsule_id = str(capsule_id)
+                row = self._id_to_row.get(capsule_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._ids.append(capsule_id)
+                    self._id_to_row[capsule_id] = row
+                rows[i] = row
+
+            self._reserve(len(self._ids))
+            self._owners[rows] = [self._owner_code(owner) for owner in owners]
+
+            if self.backend == 'hnsw':
+                self._hnsw.add_items(vectors, rows)
+            else:
+                self._vectors[rows] = vectors
+
+        return len(rows)
+
+    def get_vector(self, capsule_id):
+        """Return the stored embedding for a capsule, or None"""
+        with self._lock:
+            row = self._id_to_row.get(str(capsule_id))
+            if row is None:
+                return None
+            if self.backend == 'hnsw':
+                return np.asarray(self._hnsw.get_items([row])[0], dtype=np.float32)
+            return self._vectors[row].copy()
+
+    def query(self, vector, k=5, owner=None, exclude=None):
+        """
+        Find the k most similar capsules to an embedding
+
+        Args:
+            vector (np.ndarray): Query embedding of shape (dim,)
+            k (int): Number of neighbours to return
+            owner (str): Restrict results to capsules of this owner
+            exclude (str): Capsule id to leave out (usually the query capsule)
+
+        Returns:
+            list: [{'capsule_id', 'score'}] sorted by descending cosine similarity
+        """
+        query = self._normalize(np.asarray(vector).reshape(1, -1))[0]
+
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or k <= 0:
+                return []
+
+            owner_code = None
+            if owner is not None:
+                owner_code = self._owner_codes.get(str(owner))
+                if owner_code is None:
+                    return []
+
+            if self.backend == 'hnsw':
+                rows, scores = self._query_hnsw(query, k, owner_code, exclude, count)
+            else:
+                rows, scores = self._query_numpy(query, k, owner_code, exclude, count)
+
+            return [
+                {'capsule_id': self._ids[row], 'score': float(score)}
+                for row, score in zip(rows, scores)
+            ]
+
+    def query_id(self, capsule_id, k=5, owner=None):
+        """Find capsules related to an already indexed capsule"""
+        vector = self.get_vector(capsule_id)
+        if vector is None:
+            return []
+        return self.query(vector, k=k, owner=owner, exclude=str(capsule_id))
+
+    def _query_numpy(self, query, k, owner_code, exclude, count):
+        """Exact search: one matrix-vector product plus argpartition"""
+        scores = self._vectors[:count] @ query
+        if owner_code is not None:
+            scores[self._owners[:count] != owner_code] = -np.inf
+        if exclude is not None and exclude in self._id_to_row:
+            scores[self._id_to_row[exclude]] = -np.inf
+
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top]
+
+    def _query_hnsw(self, query, k, owner_code, exclude, count):
+        """Approximate search; oversample when results are filtered afterwards"""
+        fetch = k + (1 if exclude is not None else 0)
+        if owner_code is not None:
+            fetch *= 4
+        fetch = min(fetch, count)
+        self._hnsw.set_ef(max(fetch * 2, 50))
+
+        labels, distances = self._hnsw.knn_query(query, k=fetch)
+        rows, scores = [], []
+        for row, distance in zip(labels[0], distances[0]):
+            if exclude is not None and self._ids[row] == exclude:
+                continue
+            if owner_code is not None and self._owners[row] != owner_code:
+                continue
+            rows.append(int(row))
+            scores.append(1.0 - float(distance))
+            if len(rows) == k:
+                break
+        return rows, scores
+
+    def _reserve(self, size):
+        """Grow storage geometrically so inserts stay amortized O(1)"""
+        capacity = len(self._owners)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+
+        owners = np.full(new_capacity, -1, dtype=np.int32)
+        owners[:capacity] = self._owners
+        self._owners = owners
+
+        if self.backend == 'hnsw':
+            self._hnsw.resize_index(new_capacity)
+        else:
+            vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+            vectors[:capacity] = self._vectors
+            self._vectors = vectors
+
+    def _owner_code(self, owner):
+        if owner is None:
+            return -1
+        owner = str(owner)
+        code = self._owner_codes.get(owner)
+        if code is None:
+            code = len(self._owner_codes)
+            self._owner_codes[owner] = code
+        return code
+
+    def _normalize(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f'Expected embeddings of shape (n, {self.dim})')
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def get_stats(self):
+        """Get index size and backend information"""
+        return {
+            'backend': self.backend,
+            'dim': self.dim,
+            'size': len(self._ids),
+            'capacity': int(len(self._owners)),
+            'owners': len(self._owner_codes)
+        }
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Modules import from the AI-Python root (e.g. `from utils.x import Y`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _nltk_data_installed():
+    try:
+        import nltk
+        for resource in ('tokenizers/punkt', 'corpora/stopwords', 'corpora/wordnet'):
+            nltk.data.find(resource)
+        return True
+    except (ImportError, LookupError):
+        return False
+
+# ContentClassifier downloads missing NLTK corpora at construction; skip offline
+requires_nltk_data = pytest.mark.skipif(not _nltk_data_installed(), reason='NLTK corpora not installed')
@@ -0,0 +1,91 @@
+import hashlib
+
+import pytest
+
+from utils.columnar_results import PYARROW_AVAILABLE, ColumnarResults
+
+def digest(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def analysis(i):
+    # Scores are exact in float32 so the round trip compares equal
+    return {
+        'emotion': {
+            'primary_emotion': 'joy' if i % 2 else 'sadness',
+            'secondary_emotion': 'neutral',
+            'confidence': 0.75,
+            'emotions': {'joy': 0.75, 'neutral': 0.25},
+            'sentiment': {'compound': 0.5, 'positive': 0.5, 'negative': 0.0, 'neutral': 0.5},
+            'category': 'positive',
+            'intensity': 'medium',
+            'recommendedUnlock': {'days': 7, 'rationale': 'Positive emotion - unlock soon to share joy'},
+            'contextualTags': ['positive-memory'],
+            'tier': 'fallback'
+        },
+        'classification': {
+            'category': 'family',
+            'topic': 'love',
+            'priority': None,
+            'confidence': {'category': 0.5, 'topic': 0.125, 'priority': 0.25},
+            'keywords': ['summer', 'lake', f'word{i}'],
+            'tags': [],
+            'processed_text': f'summer lake word{i}'
+        },
+        'keywords': ['summer', 'lake'],
+        'topics': ['family'],
+        'language': {'code': 'en', 'confidence': 1.0, 'script': 'Latin', 'pipeline': 'full'},
+        'fingerprint': digest(f'content-{i}'),
+        'analyzer_version': 'abc123'
+    }
+
+RECORDS = [
+    {'index': 0, 'id': 'a', 'success': True, 'analysis_id': digest('content-0'), 'analysis': analysis(0)},
+    {'index': 1, 'id': 7, 'success': True, 'cached': False, 'analysis': analysis(1)},
+    {'index': 2, 'id': None, 'success': False, 'error': 'content has no data'},
+    # Wrong types and unknown fields go to the residual row and come back unchanged
+    {'index': 3, 'id': {'nested': [1, 2]}, 'success': 'yes', 'fingerprint': 'not-a-digest',
+     'analysis': {'emotion': {}, 'extra': {'x': 1}, 'keywords': 'not a list'}},
+    {}
+]
+
+def test_records_round_trip():
+    results = ColumnarResults.from_records(RECORDS)
+    assert len(results) == len(RECORDS)
+    assert list(results) == RECORDS
+    assert results[-1] == {}
+    with pytest.raises(IndexError):
+        results[len(RECORDS)]
+
+def test_floats_come_back_at_float32_precision():
+    records = [{'analysis': {'emotion': {'confidence': value}}} for value in (0.1, 0.6083, 0.123456789)]
+    values = [row['analysis']['emotion']['confidence'] for row in ColumnarResults.from_records(records)]
+    # Shortest repr of the float32, so short decimals read back unchanged
+    assert values == [0.1, 0.6083, 0.12345679]
+
+def test_column_reads_raw_arrays():
+    results = ColumnarResults.from_records(RECORDS)
+    emotion = results.column('analysis.emotion.primary_emotion')
+    assert emotion['present'].tolist() == [True, True, False, False, False]
+    assert [emotion['values'][code] for code in emotion['codes'][:2]] == ['sadness', 'joy']
+    assert results.column('success')['values'].tolist()[:3] == [True, True, False]
+    with pytest.raises(KeyError):
+        results.column('analysis.missing')
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason='pyarrow not installed')
+def test_arrow_and_parquet_round_trip():
+    import io
+    import json
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    results = ColumnarResults.from_records(RECORDS)
+    table = results.to_arrow()
+    assert table.num_rows == len(RECORDS)
+    assert table.column('analysis.emotion.primary_emotion').to_pylist()[:3] == ['sadness', 'joy', None]
+    assert table.column('analysis.fingerprint').to_pylist()[0] == bytes.fromhex(digest('content-0'))
+    assert json.loads(table.column('_extra').to_pylist()[3])['success'] == 'yes'
+
+    # Parquet may widen dictionary index types; compare values
+    assert pq.read_table(io.BytesIO(results.to_parquet())).to_pylist() == table.to_pylist()
+    assert pa.ipc.open_stream(results.to_ipc()).read_all().equals(table)
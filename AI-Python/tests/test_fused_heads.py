@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.tree import DecisionTreeClassifier
+
+from conftest import requires_nltk_data
+from content_analysis.fused_heads import FusedLinearHeads
+
+def make_data(n_classes, n=120, n_features=30, seed=0):
+    rng = np.random.default_rng(seed)
+    X = sparse.csr_matrix(rng.poisson(0.5, size=(n, n_features)).astype(np.float64))
+    y = np.array([f'c{i % n_classes}' for i in range(n)])
+    # Make the labels learnable: each class boosts its own block of features
+    X = X + sparse.csr_matrix(np.eye(n_classes)[np.arange(n) % n_classes].repeat(n_features // n_classes, axis=1) * 2)
+    return sparse.csr_matrix(X), y
+
+MODELS = {
+    'multinomial_nb': lambda: MultinomialNB(),
+    'logistic_softmax': lambda: LogisticRegression(max_iter=500),
+    'sgd_log_loss': lambda: SGDClassifier(loss='log_loss', random_state=0)
+}
+
+@pytest.mark.parametrize('n_classes', [2, 3, 5])
+def test_fused_probabilities_match_each_head(n_classes):
+    X, y = make_data(n_classes)
+    heads = {name: factory().fit(X, y) for name, factory in MODELS.items()}
+    if n_classes == 2:
+        # Recent scikit-learn only allows liblinear for binary problems
+        heads['logistic_liblinear'] = LogisticRegression(solver='liblinear').fit(X, y)
+    fused = FusedLinearHeads.from_heads(heads)
+    assert set(fused.heads) == set(heads)
+
+    probabilities = fused.predict_proba(X)
+    predictions = fused.predict(X)
+    for name, model in heads.items():
+        expected = model.predict_proba(X)
+        np.testing.assert_allclose(probabilities[name], expected, rtol=1e-6, atol=1e-9, err_msg=name)
+        labels, confidence = predictions[name]
+        assert (labels == model.predict(X)).all(), name
+        np.testing.assert_allclose(confidence, expected.max(axis=1), rtol=1e-6)
+
+def test_non_linear_heads_are_left_out():
+    X, y = make_data(3)
+    heads = {
+        'nb': MultinomialNB().fit(X, y),
+        'lr': LogisticRegression(max_iter=500).fit(X, y),
+        'tree': DecisionTreeClassifier(random_state=0).fit(X.toarray(), y)
+    }
+    fused = FusedLinearHeads.from_heads(heads)
+    assert set(fused.heads) == {'nb', 'lr'}
+    assert FusedLinearHeads.from_heads({'nb': heads['nb'], 'tree': heads['tree']}) is None
+
+@requires_nltk_data
+def test_classifier_fused_and_per_head_predictions_agree():
+    from content_analysis.content_classifier import ContentClassifier
+
+    texts = [
+        'Finally graduated after four long years of study',
+        'Sunday dinner with grandma and all the cousins',
+        'Quarterly planning meeting notes for the team',
+        'Backpacking through the mountains of Peru'
+    ]
+    fused = ContentClassifier(fuse_heads=True).classify_batch(texts)
+    per_head = ContentClassifier(fuse_heads=False).classify_batch(texts)
+    for a, b in zip(fused, per_head):
+        for head in ('category', 'topic', 'priority'):
+            assert a[head] == b[head]
+            assert a['confidence'][head] == pytest.approx(b['confidence'][head], rel=1e-6)
@@ -0,0 +1,74 @@
+import pytest
+
+from jobs.job_store import COMPLETED, QUEUED, RUNNING, JobStore
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+def expire_lease(store, job_id):
+    store._connect().execute('UPDATE jobs SET lease_expires = 0 WHERE id = ?', (job_id,))
+
+def test_claim_takes_oldest_queued_job_and_leases_it(store):
+    first, _ = store.create([{'n': 1}])
+    second, _ = store.create([{'n': 2}])
+
+    assert store.claim('a')['id'] == first['id']
+    assert store.claim('b')['id'] == second['id']
+    # Both leases are live: nothing left to claim
+    assert store.claim('c') is None
+    assert store.get(first['id'])['status'] == RUNNING
+
+def test_expired_lease_is_stolen_and_resumes_unfinished_items(store):
+    job, _ = store.create([{'n': 1}, {'n': 2}, {'n': 3}])
+    store.claim('a', lease_seconds=60)
+    assert store.save_results(job['id'], [(0, {'success': True})], 'a')
+    assert store.claim('b') is None
+
+    expire_lease(store, job['id'])
+    assert store.claim('b')['id'] == job['id']
+    assert [idx for idx, _ in store.pending_items(job['id'], 10)] == [1, 2]
+    assert not store.save_results(job['id'], [(1, {'success': True})], 'a')
+    assert store.save_results(job['id'], [(1, {'success': True}), (2, {'success': True})], 'b')
+    assert store.pending_items(job['id'], 10) == []
+
+def test_save_results_renews_the_lease(store):
+    job, _ = store.create([{'n': 1}, {'n': 2}])
+    store.claim('a', lease_seconds=60)
+    expire_lease(store, job['id'])
+    # Still the owner until someone else claims; saving extends the lease
+    assert store.save_results(job['id'], [(0, {'success': True})], 'a', lease_seconds=60)
+    assert store.claim('b') is None
+
+def test_idempotency_key_returns_existing_job(store):
+    job, created = store.create([{'n': 1}], idempotency_key='k')
+    again, created_again = store.create([{'n': 1}, {'n': 2}], idempotency_key='k')
+    assert created and not created_again
+    assert again['id'] == job['id'] and again['status'] == QUEUED
+    assert again['progress']['total'] == 1
+
+def test_results_already_saved_are_not_counted_again(store):
+    job, _ = store.create([{'n': 1}, {'n': 2}])
+    store.claim('a')
+    assert store.save_results(job['id'], [(0, {'success': False})], 'a')
+    expire_lease(store, job['id'])
+    store.claim('b')
+
+    # The new owner redoes item 0; only item 1 is written and counted
+    assert store.save_results(job['id'], [(0, {'success': True}), (1, {'success': False})], 'b')
+    progress = store.get(job['id'])['progress']
+    assert progress == {'total': 2, 'processed': 2, 'failed': 2}
+    assert store.results(job['id']) == [(0, {'success': False}), (1, {'success': False})]
+
+def test_stale_worker_cannot_finish_a_stolen_job(store):
+    job, _ = store.create([{'n': 1}])
+    store.claim('a')
+    expire_lease(store, job['id'])
+    store.claim('b')
+
+    assert not store.save_results(job['id'], [(0, {'success': True})], 'a')
+    assert not store.finish(job['id'], 'a')
+    assert store.get(job['id'])['status'] == RUNNING
+
+    assert store.finish(job['id'], 'b')
+    assert store.get(job['id'])['status'] == COMPLETED
@@ -0,0 +1,79 @@
+import hashlib
+import itertools
+
+import numpy as np
+import pytest
+
+from content_analysis.near_duplicate_index import SIGNATURE_BITS, NearDuplicateIndex, hamming_distances
+
+def ref(key):
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def flip(signature, bits):
+    for bit in bits:
+        signature ^= 1 << int(bit)
+    return signature
+
+@pytest.fixture
+def index():
+    return NearDuplicateIndex(bands=4, threshold=0.95)
+
+def test_hamming_distances_popcount():
+    signatures = np.array([0, 0xFFFFFFFFFFFFFFFF, 0b1011], dtype=np.uint64)
+    assert hamming_distances(signatures, 0).tolist() == [0, 64, 3]
+
+@pytest.mark.parametrize('background', [0, 5000])
+def test_recall_for_every_signature_within_the_threshold(index, background):
+    # 0.95 allows int(0.05 * 64) = 3 differing bits, which four bands always catch
+    rng = np.random.default_rng(0)
+    for i, signature in enumerate(rng.integers(0, 2 ** 63, size=background, dtype=np.uint64)):
+        index.add(f'bg{i}', int(signature), ref(f'bg{i}'))
+    base = int(rng.integers(0, 2 ** 63, dtype=np.uint64))
+    index.add('target', base, ref('target'))
+
+    # Worst case: each differing bit lands in a different band
+    band_bits = SIGNATURE_BITS // index.bands
+    spread = [[band * band_bits + offset for band, offset in zip(bands, (0, 7, 15))]
+              for bands in itertools.combinations(range(index.bands), 3)]
+    random_flips = [rng.choice(SIGNATURE_BITS, size=3, replace=False) for _ in range(200)]
+    for bits in spread + random_flips:
+        matches = {m['key']: m for m in index.query(flip(base, bits))}
+        assert 'target' in matches, bits
+        match = matches['target']
+        assert match['similarity'] == pytest.approx(1 - 3 / 64, abs=1e-4)
+        assert match['ref'] == ref('target')
+
+def test_signatures_beyond_the_threshold_are_not_returned(index):
+    base = 0x0123456789ABCDEF
+    index.add('target', base, ref('target'))
+    assert index.query(flip(base, [0, 1, 2, 3])) == []
+    assert [m['key'] for m in index.query(flip(base, [0, 1, 2]))] == ['target']
+
+def test_near_identical_texts_match_and_short_texts_are_skipped(index):
+    text = 'We spent the whole summer at the lake house with grandma and the cousins, swimming every day'
+    index.add('a', index.signature(text), ref('a'), owner='u1')
+    assert index.signature('too short') is None
+    assert [m['key'] for m in index.query(index.signature(text), owner='u1')] == ['a']
+    assert index.query(index.signature(text), owner='u2') == []
+    assert index.query(index.signature(text), exclude='a') == []
+
+def test_replacing_a_sorted_signature_is_found_under_the_new_value():
+    index = NearDuplicateIndex(bands=4, threshold=0.95)
+    for i in range(5000):
+        index.add(f'k{i}', i * 0x9E3779B97F4A7C15 % 2 ** 64, ref(f'k{i}'))
+    index.query(1)  # merge the inserts into the sorted band arrays
+    index.add('k7', 0xDEADBEEFDEADBEEF, ref('k7'))
+    assert 'k7' in [m['key'] for m in index.query(0xDEADBEEFDEADBEEF)]
+
+def test_duplicate_report_groups_per_owner(index):
+    base = 0x0F0F0F0F0F0F0F0F
+    index.add('a', base, ref('a'), owner='u1')
+    index.add('b', flip(base, [1]), ref('b'), owner='u1')
+    index.add('c', flip(base, [2, 20]), ref('c'), owner='u1')
+    index.add('d', ~base & (2 ** 64 - 1), ref('d'), owner='u1')
+    index.add('e', base, ref('e'), owner='u2')
+
+    report = index.duplicate_report('u1')
+    assert report['indexed'] == 4
+    assert [sorted(group['keys']) for group in report['groups']] == [['a', 'b', 'c']]
+    assert report['redundant'] == 2
@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import requires_nltk_data
+from content_analysis.content_classifier import ContentClassifier
+from content_analysis.model_registry import OnlineModelStore
+from content_analysis.online_learner import OnlineLearner
+
+pytestmark = requires_nltk_data
+
+FEEDBACK = [
+    {'text': 'Graduated today, so proud of this milestone', 'category': 'achievement', 'priority': 'high'},
+    {'text': 'Dinner with the whole family at grandma house', 'category': 'family'}
+]
+
+@pytest.fixture
+def store(tmp_path):
+    return OnlineModelStore(str(tmp_path / 'online.sqlite3'))
+
+def make_learner(store, min_samples):
+    return OnlineLearner(ContentClassifier(), seed_epochs=1, min_samples=min_samples, store=store)
+
+def test_configured_heads_serve_until_min_samples(store):
+    learner = make_learner(store, min_samples=4)
+    configured = learner.classifier.get_version()
+
+    learner.train_batch(FEEDBACK)
+    assert learner.samples == 2
+    assert learner.classifier.get_version() == configured
+    assert learner.classifier.online_generation == 0
+
+    learner.train_batch(FEEDBACK)
+    assert learner.samples == 4
+    assert learner.classifier.get_version() == f'{configured}:online-2'
+    assert learner.get_status()['serving_online']
+
+def test_learned_heads_survive_restart_and_reach_other_workers(store):
+    first = make_learner(store, min_samples=2)
+    second = make_learner(store, min_samples=2)
+    first.train_batch(FEEDBACK)
+
+    # A worker started after training loads the snapshot
+    restarted = make_learner(store, min_samples=2)
+    assert restarted.generation == 1 and restarted.samples == 2
+    assert restarted.classifier.get_version() == first.classifier.get_version()
+
+    # A running worker picks it up on its next sync and builds on it
+    assert second.sync()
+    second.train_batch(FEEDBACK)
+    assert second.generation == 2 and second.samples == 4
+    assert first.sync() and first.classifier.get_version() == second.classifier.get_version()
+    assert not first.sync()
+
+def test_snapshot_from_other_hashing_space_is_ignored(store):
+    make_learner(store, min_samples=1).train_batch(FEEDBACK)
+    other = OnlineLearner(ContentClassifier(), n_features=2 ** 10, seed_epochs=1, min_samples=1, store=store)
+    assert other.generation == 0
+    assert other.classifier.online_generation == 0
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from recommendations.similarity_index import HNSWLIB_AVAILABLE, SimilarityIndex
+
+BACKENDS = ['numpy', pytest.param('hnsw', marks=pytest.mark.skipif(not HNSWLIB_AVAILABLE, reason='hnswlib not installed'))]
+
+def random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+def brute_force(vectors, query, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = unit @ (query / np.linalg.norm(query))
+    order = np.argsort(-scores, kind='stable')[:k]
+    return [str(i) for i in order], scores[order]
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_query_matches_brute_force_cosine(backend):
+    vectors = random_vectors(200)
+    index = SimilarityIndex(dim=16, initial_capacity=8, backend=backend)
+    index.add([str(i) for i in range(200)], vectors)
+    assert len(index) == 200 and index.get_stats()['capacity'] >= 200
+
+    query = random_vectors(1, seed=1)[0]
+    expected_ids, expected_scores = brute_force(vectors, query, 5)
+    results = index.query(query, k=5)
+    assert [r['capsule_id'] for r in results] == expected_ids
+    np.testing.assert_allclose([r['score'] for r in results], expected_scores, atol=1e-4)
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_owner_filter_and_query_id_exclude_self(backend):
+    vectors = random_vectors(20)
+    index = SimilarityIndex(dim=16, backend=backend)
+    owners = ['alice' if i % 2 else 'bob' for i in range(20)]
+    index.add([str(i) for i in range(20)], vectors, owners=owners)
+
+    results = index.query_id('3', k=4, owner='alice')
+    ids = [r['capsule_id'] for r in results]
+    assert len(ids) == 4 and '3' not in ids
+    assert all(int(capsule_id) % 2 for capsule_id in ids)
+    assert index.query(vectors[0], owner='nobody') == []
+    assert index.query_id('missing') == []
+
+def test_add_replaces_existing_id():
+    index = SimilarityIndex(dim=4, backend='numpy')
+    index.add(['a', 'b'], np.eye(4, dtype=np.float32)[:2])
+    index.add(['a'], np.array([[0, 0, 3, 0]], dtype=np.float32))
+
+    assert len(index) == 2
+    np.testing.assert_allclose(index.get_vector('a'), [0, 0, 1, 0])
+    assert index.query(np.array([0, 0, 1, 0]), k=1)[0]['capsule_id'] == 'a'
+
+def test_rejects_wrong_shapes():
+    index = SimilarityIndex(dim=4, backend='numpy')
+    with pytest.raises(ValueError):
+        index.add(['a'], np.ones((1, 3)))
+    with pytest.raises(ValueError):
+        index.add(['a', 'b'], np.ones((1, 4)))
+    assert index.query(np.ones(4)) == []
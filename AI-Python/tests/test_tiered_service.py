@@ -0,0 +1,111 @@
+import time
+
+import numpy as np
+import pytest
+
+from emotion_detection.tiered_service import (
+    TieredEmotionService, TRANSFORMER_TIER, FALLBACK_TIER, OPEN, normalize_result
+)
+
+SCHEMA = {
+    'primary_emotion', 'secondary_emotion', 'confidence', 'emotions', 'sentiment',
+    'category', 'intensity', 'recommendedUnlock', 'contextualTags', 'tier'
+}
+
+class StubPrimary:
+    """Transformer stand-in returning VADER-keyed sentiment, like EmotionAnalyzer"""
+    VERSION = 'stub-1'
+    provides_embeddings = True
+
+    def __init__(self, fail=None, delay=0.0):
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+
+    def analyze_batch(self, texts, sentiment_scores, return_embeddings=False):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail == 'raise':
+            raise RuntimeError('CUDA out of memory')
+        results = []
+        for text in texts:
+            if self.fail == 'report':
+                # EmotionAnalyzer catches inference errors and returns them per result
+                results.append({'primary_emotion': 'neutral', 'emotions': {}, 'error': 'CUDA out of memory'})
+            else:
+                results.append({
+                    'primary_emotion': 'love',
+                    'secondary_emotion': 'joy',
+                    'confidence': 0.9,
+                    'emotions': {'love': 0.9, 'joy': 0.1},
+                    'sentiment': {'neg': 0.0, 'neu': 0.4, 'pos': 0.6, 'compound': 0.8},
+                    'category': 'positive',
+                    'intensity': 'high',
+                    'recommendedUnlock': {'days': 7, 'rationale': 'soon'},
+                    'contextualTags': ['positive-memory']
+                })
+        embeddings = np.ones((len(texts), 4), dtype=np.float32)
+        return (results, embeddings) if return_embeddings else results
+
+def make_service(primary, **kwargs):
+    return TieredEmotionService(mode='auto', primary=primary, deadline_ms=kwargs.pop('deadline_ms', 1000), **kwargs)
+
+def test_primary_answers_when_healthy():
+    service = make_service(StubPrimary())
+    results, embeddings = service.analyze_batch(['I love this'], return_embeddings=True)
+    assert results[0]['tier'] == TRANSFORMER_TIER
+    assert results[0]['primary_emotion'] == 'love'
+    assert embeddings is not None
+    assert service.breaker.failures == 0
+
+@pytest.mark.parametrize('fail', ['raise', 'report'])
+def test_failing_primary_falls_back(fail):
+    service = make_service(StubPrimary(fail=fail))
+    results, embeddings = service.analyze_batch(['I am so happy', 'sad day'], return_embeddings=True)
+    assert [result['tier'] for result in results] == [FALLBACK_TIER, FALLBACK_TIER]
+    assert [result['primary_emotion'] for result in results] == ['joy', 'sadness']
+    assert all('error' not in result for result in results)
+    assert embeddings is None
+    assert service.breaker.failures == 1
+    assert service.get_metrics()['fallback_reasons'] == {'model error': 1}
+
+def test_repeated_failures_open_the_breaker():
+    primary = StubPrimary(fail='raise')
+    service = make_service(primary)
+    for _ in range(service.breaker.failure_threshold):
+        service.analyze('hello')
+    assert service.breaker.state == OPEN
+    service.analyze('hello')
+    assert primary.calls == service.breaker.failure_threshold
+    assert service.get_metrics()['fallback_reasons']['circuit open'] == 1
+
+def test_deadline_falls_back():
+    service = make_service(StubPrimary(delay=0.2), deadline_ms=20)
+    assert service.analyze('I am happy')['tier'] == FALLBACK_TIER
+    assert service.get_metrics()['fallback_reasons'] == {'deadline exceeded': 1}
+
+def test_explicit_zero_settings_are_kept():
+    service = TieredEmotionService(mode='fallback', deadline_ms=0, p95_limit_ms=0)
+    assert service.deadline_ms == 0.0
+    assert service.breaker.p95_limit_ms == 0.0
+
+def test_tiers_share_one_schema():
+    healthy = make_service(StubPrimary()).analyze('I love this', {'neg': 0.0, 'neu': 0.4, 'pos': 0.6, 'compound': 0.8})
+    fallback = TieredEmotionService(mode='fallback').analyze('I love this', {'neg': 0.0, 'neu': 0.4, 'pos': 0.6, 'compound': 0.8})
+    empty = TieredEmotionService(mode='fallback').analyze('')
+    for result in (healthy, fallback, empty):
+        assert set(result) == SCHEMA
+        assert set(result['sentiment']) == {'compound', 'positive', 'negative', 'neutral'}
+    assert normalize_result({'dominant_emotion': 'fear'}, FALLBACK_TIER)['category'] == 'negative'
+
+def test_version_follows_loaded_analyzer():
+    service = TieredEmotionService(mode='fallback')
+    assert service.get_version().startswith(f'{FALLBACK_TIER}-')
+    assert service.get_version(TRANSFORMER_TIER) == service.get_version()
+    assert service.provides_embeddings is False
+
+    service = make_service(StubPrimary())
+    assert service.get_version() == f'{TRANSFORMER_TIER}-stub-1'
+    assert service.get_version(FALLBACK_TIER).startswith(f'{FALLBACK_TIER}-')
+    assert service.provides_embeddings is True
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from analytics.trend_analyzer import TrendAnalyzer
+
+@pytest.fixture
+def analyzer():
+    return TrendAnalyzer(default_period='day', default_window=2)
+
+def test_parses_iso_epoch_seconds_and_milliseconds(analyzer):
+    parsed = analyzer._parse_timestamps(['2024-01-01T10:00:00Z', '2024-01-01T23:30:00-02:00'])
+    assert parsed.tolist() == np.array(['2024-01-01T10:00:00', '2024-01-02T01:30:00'], dtype='datetime64[s]').tolist()
+    parsed = analyzer._parse_timestamps([1704103200, 1704103200000])
+    assert parsed[0] == parsed[1] == np.datetime64('2024-01-01T10:00:00')
+
+def test_mixed_epoch_and_iso_parse_per_value(analyzer):
+    parsed = analyzer._parse_timestamps([1700000000, '2024-01-01T00:00:00'])
+    assert parsed.tolist() == np.array(['2023-11-14T22:13:20', '2024-01-01T00:00:00'], dtype='datetime64[s]').tolist()
+    trends = analyzer.compute_trends({'timestamps': [1700000000, '2024-01-01T00:00:00']})
+    assert trends['summary']['total_items'] == 2
+    assert trends['buckets'][0] == '2023-11-14' and trends['buckets'][-1] == '2024-01-01'
+
+@pytest.mark.parametrize('timestamps', [[None], ['2024-01-01', {}], [True], [float('nan')], '2024-01-01'])
+def test_rejects_non_scalar_timestamps(analyzer, timestamps):
+    with pytest.raises(ValueError):
+        analyzer.compute_trends({'timestamps': timestamps})
+
+def test_epoch_zero_outlier_is_dropped(analyzer):
+    records = [{'timestamp': f'2024-03-0{day}T10:00:00Z', 'sentiment': 0.5} for day in range(1, 6)]
+    records.append({'timestamp': 0, 'sentiment': -1.0})
+    trends = analyzer.analyze(records)
+    assert trends['buckets'] == ['2024-03-01', '2024-03-02', '2024-03-03', '2024-03-04', '2024-03-05']
+    assert trends['summary']['dropped_outliers'] == 1
+    assert trends['summary']['sentiment_average'] == 0.5
+
+def test_sentiment_shapes(analyzer):
+    columns = analyzer.to_columns([
+        {'timestamp': '2024-01-01', 'sentiment': 0.25},
+        {'timestamp': '2024-01-01', 'emotion': {'primary_emotion': 'joy', 'sentiment': {'compound': 0.5}}},
+        {'timestamp': '2024-01-02', 'sentiment': {'compound': None}},
+        {'timestamp': '2024-01-02', 'sentiment': {'polarity': -0.5}}
+    ])
+    assert columns['sentiment'] == [0.25, 0.5, 0.0, -0.5]
+    assert columns['emotions'] == ['neutral', 'joy', 'neutral', 'neutral']
+    with pytest.raises(ValueError):
+        analyzer.to_columns([{'timestamp': '2024-01-01', 'sentiment': 'high'}])
+
+def test_buckets_and_rolling_mean(analyzer):
+    trends = analyzer.compute_trends({
+        'timestamps': ['2024-01-01', '2024-01-01', '2024-01-03'],
+        'emotions': ['joy', 'sadness', 'joy'],
+        'sentiment': [1.0, 0.0, -1.0]
+    })
+    assert trends['buckets'] == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert trends['counts'] == [2, 0, 1]
+    assert trends['sentiment_mean'] == [0.5, None, -1.0]
+    assert trends['rolling_sentiment_mean'] == [0.5, 0.5, -1.0]
+    assert trends['emotion_distribution']['joy'] == [0.5, None, 1.0]
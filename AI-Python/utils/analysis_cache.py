@@ -0,0 +1,86 @@
+import copy
+import logging
+import threading
+from collections import OrderedDict
+
+from utils.analysis_version import content_fingerprint
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    def __init__(self, max_entries=10000):
+        """
+        Initialize bounded LRU cache of content analyses
+
+        Entries are copied on put and on get, so callers may modify the
+        analyses they store or receive without changing the cached value.
+
+        Args:
+            max_entries (int): Maximum number of analyses kept in memory
+        """
+        try:
+            self.max_entries = max_entries
+            self._entries = OrderedDict()
+            self._lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            logger.info("Analysis cache initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize analysis cache: {str(e)}")
+            raise
+
+    def make_key(self, content):
+        """
+        Build the analysis handle for a content item
+
+        Args:
+            content (dict): Content item with 'type' and 'data'
+
+        Returns:
+            str: Hex digest identifying the content
+        """
+        return content_fingerprint(content)
+
+    def get(self, analysis_id):
+        """Return a cached analysis by handle, or None"""
+        with self._lock:
+            analysis = self._entries.get(analysis_id)
+            if analysis is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(analysis_id)
+            self.hits += 1
+        return copy.deepcopy(analysis)
+
+    def get_for_content(self, content):
+        """Return a cached analysis for a content item, or None"""
+        return self.get(self.make_key(content))
+
+    def put(self, content, analysis):
+        """
+        Store an analysis for a content item
+
+        Args:
+            content (dict): Content item that was analyzed
+            analysis (dict): Analysis result
+
+        Returns:
+            str: Analysis handle
+        """
+        analysis_id = self.make_key(content)
+        analysis = copy.deepcopy(analysis)
+        with self._lock:
+            self._entries[analysis_id] = analysis
+            self._entries.move_to_end(analysis_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis_id
+
+    def get_stats(self):
+        """Get cache size and hit statistics"""
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,31 @@
+import hashlib
+import json
+
+def content_fingerprint(content):
+    """
+    Stable fingerprint of a content item's input
+
+    Args:
+        content (dict): Content item with 'type' and 'data'
+
+    Returns:
+        str: sha1 hex digest of the type and data
+    """
+    content_type = content.get('type', 'text')
+    content_data = content.get('data', '')
+    if not isinstance(content_data, str):
+        content_data = json.dumps(content_data, sort_keys=True)
+    return hashlib.sha1(f'{content_type}\0{content_data}'.encode('utf-8')).hexdigest()
+
+def composite_version(components):
+    """
+    Short digest over every analyzer version that contributed to a result
+
+    Args:
+        components (dict): component name -> version string
+
+    Returns:
+        str: 12-character hex digest; changes when any component version changes
+    """
+    encoded = json.dumps(components, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:12]
@@ -0,0 +1,637 @@
+import io
+import logging
+
+import numpy as np
+
+from utils.serialization import dumps_json
+
+# Import optional Arrow/Parquet support only when available
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Column kinds
+CATEGORY = 'category'  # str or None -> small integer code into a per-column dictionary
+FLOAT = 'float'        # number -> float32
+INT = 'int'            # int -> int32
+FLAG = 'flag'          # bool
+TERMS = 'terms'        # list of str -> offsets + indices into the shared vocabulary
+TOKENS = 'tokens'      # space separated str, stored like TERMS
+SCORES = 'scores'      # {label: score} -> label codes + float32 scores, in dict order
+DIGEST = 'digest'      # 40 hex character sha1 -> 20 bytes
+VALUE = 'value'        # any JSON value, kept as the Python object
+
+_SENTIMENT_SCORES = {
+    name: FLOAT for name in ('compound', 'positive', 'negative', 'neutral', 'pos', 'neg', 'neu')
+}
+
+# Shape of a text content analysis (see app.analyze_text); fields outside it
+# are still stored, per row, in the residual column
+ANALYSIS_SCHEMA = {
+    'emotion': {
+        'dominant_emotion': CATEGORY,
+        'primary_emotion': CATEGORY,
+        'secondary_emotion': CATEGORY,
+        'confidence': FLOAT,
+        'emotions': SCORES,
+        'sentiment': _SENTIMENT_SCORES,
+        'category': CATEGORY,
+        'intensity': CATEGORY,
+        'recommendedUnlock': {'days': INT, 'rationale': CATEGORY},
+        'contextualTags': TERMS,
+        'tier': CATEGORY
+    },
+    'classification': {
+        'category': CATEGORY,
+        'topic': CATEGORY,
+        'priority': CATEGORY,
+        'confidence': {'category': FLOAT, 'topic': FLOAT, 'priority': FLOAT},
+        'keywords': TERMS,
+        'tags': TERMS,
+        'processed_text': TOKENS
+    },
+    'sentiment': dict(_SENTIMENT_SCORES, polarity=FLOAT, subjectivity=FLOAT, sentiment=CATEGORY),
+    'keywords': TERMS,
+    'topics': TERMS,
+    'language': {'code': CATEGORY, 'confidence': FLOAT, 'script': CATEGORY, 'pipeline': CATEGORY},
+    'near_duplicate_of': {'analysis_id': DIGEST, 'similarity': FLOAT},
+    'fingerprint': DIGEST,
+    'analyzer_version': CATEGORY
+}
+
+# Batch, diff and job result envelopes around an analysis
+RESULT_SCHEMA = {
+    'index': INT,
+    'id': VALUE,
+    'success': FLAG,
+    'status': CATEGORY,
+    'fingerprint': DIGEST,
+    'analyzer_version': CATEGORY,
+    'cached': FLAG,
+    'analysis_id': DIGEST,
+    'error': VALUE,
+    'analysis': ANALYSIS_SCHEMA
+}
+
+class _Buffer:
+    """
+    Growable NumPy array; rows are appended along the first axis
+
+    Appends go to a short Python list that is copied into the array in blocks,
+    since writing NumPy scalars one at a time costs more than the list append.
+    """
+
+    def __init__(self, dtype, width=None, capacity=256, fill=0, block=1024):
+        shape = (capacity,) if width is None else (capacity, width)
+        self.fill = fill
+        self.block = block
+        self._array = np.full(shape, fill, dtype=dtype)
+        self._size = 0
+        self._pending = []
+
+    @property
+    def size(self):
+        return self._size + len(self._pending)
+
+    @property
+    def array(self):
+        """Backing array with every appended row written (capacity may exceed size)"""
+        if self._pending:
+            self._flush()
+        return self._array
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        self._reserve(self._size + len(pending))
+        self._array[self._size:self._size + len(pending)] = pending
+        self._size += len(pending)
+
+    def _reserve(self, size):
+        capacity = len(self._array)
+        if size <= capacity:
+            return
+        grown = np.full((max(size, capacity * 2),) + self._array.shape[1:], self.fill, dtype=self._array.dtype)
+        grown[:capacity] = self._array
+        self._array = grown
+
+    def append(self, value):
+        self._pending.append(value)
+        if len(self._pending) >= self.block:
+            self._flush()
+
+    def extend(self, values):
+        self._pending.extend(values)
+        if len(self._pending) >= self.block:
+            self._flush()
+
+    def astype(self, dtype):
+        self._array = self.array.astype(dtype)
+
+    def widen(self, width):
+        """Add columns to a 2-D buffer"""
+        array = self.array
+        grown = np.full((len(array), width), self.fill, dtype=array.dtype)
+        grown[:, :array.shape[1]] = array
+        self._array = grown
+
+    @property
+    def width(self):
+        return self._array.shape[1]
+
+    def view(self):
+        return self.array[:self._size]
+
+class _Dictionary:
+    """Value <-> integer code mapping in first-seen order"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def nbytes(self):
+        # Rough: string payloads plus one hash entry each
+        return sum(len(value) for value in self.values) + 100 * len(self.values)
+
+class _Column:
+    """One leaf of the schema: presence mask plus kind-specific storage"""
+
+    def __init__(self, path):
+        self.path = path
+        self.present = _Buffer(np.bool_)
+
+    def __len__(self):
+        return self.present.size
+
+    def append(self, value):
+        """Store a value; returns False (storing nothing) when the value does not fit the column"""
+        if not self._store(value):
+            return False
+        self.present.append(True)
+        return True
+
+    def append_missing(self):
+        self._store_missing()
+        self.present.append(False)
+
+    def nbytes(self):
+        return self.present.array.nbytes
+
+class _CategoryColumn(_Column):
+    def __init__(self, path):
+        super().__init__(path)
+        self.dictionary = _Dictionary()
+        self.codes = _Buffer(np.int16, fill=-1)
+        self._max_code = np.iinfo(np.int16).max
+
+    def _store(self, value):
+        if value is not None and not isinstance(value, str):
+            return False
+        code = -1 if value is None else self.dictionary.encode(value)
+        if code > self._max_code:
+            self.codes.astype(np.int32)
+            self._max_code = np.iinfo(np.int32).max
+        self.codes.append(code)
+        return True
+
+    def _store_missing(self):
+        self.codes.append(-1)
+
+    def get(self, i):
+        code = int(self.codes.array[i])
+        return None if code < 0 else self.dictionary.values[code]
+
+    def nbytes(self):
+        return super().nbytes() + self.codes.array.nbytes + self.dictionary.nbytes()
+
+    def to_arrow(self, present):
+        codes = self.codes.view()
+        return pa.DictionaryArray.from_arrays(
+            pa.array(codes, mask=~present | (codes < 0)),
+            pa.array(self.dictionary.values, type=pa.string())
+        )
+
+class _NumberColumn(_Column):
+    def __init__(self, path, kind):
+        super().__init__(path)
+        self.kind = kind
+        self.values = _Buffer({FLOAT: np.float32, INT: np.int32, FLAG: np.bool_}[kind])
+
+    def _store(self, value):
+        if self.kind == FLAG:
+            if not isinstance(value, bool):
+                return False
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        elif self.kind == INT and (not isinstance(value, int) or not -2 ** 31 <= value < 2 ** 31):
+            return False
+        self.values.append(value)
+        return True
+
+    def _store_missing(self):
+        self.values.append(0)
+
+    def get(self, i):
+        value = self.values.array[i]
+        if self.kind == FLOAT:
+            # Shortest repr that round-trips the float32, so 0.6083 stays 0.6083
+            return float(str(value))
+        return value.item()
+
+    def nbytes(self):
+        return super().nbytes() + self.values.array.nbytes
+
+    def to_arrow(self, present):
+        return pa.array(self.values.view(), mask=~present)
+
+class _TermsColumn(_Column):
+    def __init__(self, path, vocabulary, separator=None):
+        super().__init__(path)
+        self.vocabulary = vocabulary
+        self.separator = separator
+        self.offsets = _Buffer(np.int64)
+        self.offsets.append(0)
+        self.indices = _Buffer(np.int32, capacity=1024)
+
+    def _store(self, value):
+        if self.separator is not None:
+            if not isinstance(value, str):
+                return False
+            # str.split with an explicit separator round-trips exactly through join
+            value = value.split(self.separator)
+        elif not isinstance(value, list) or not all(isinstance(term, str) for term in value):
+            return False
+        self.indices.extend([self.vocabulary.encode(term) for term in value])
+        self.offsets.append(self.indices.size)
+        return True
+
+    def _store_missing(self):
+        self.offsets.append(self.indices.size)
+
+    def get(self, i):
+        start, end = self.offsets.array[i], self.offsets.array[i + 1]
+        terms = [self.vocabulary.values[index] for index in self.indices.array[start:end].tolist()]
+        return terms if self.separator is None else self.separator.join(terms)
+
+    def nbytes(self):
+        return super().nbytes() + self.offsets.array.nbytes + self.indices.array.nbytes
+
+    def to_arrow(self, present):
+        if self.separator is not None:
+            return pa.array([self.get(i) if flag else None for i, flag in enumerate(present.tolist())], type=pa.string())
+        offsets = self.offsets.view()
+        indices = self.indices.view()
+        terms = pa.DictionaryArray.from_arrays(pa.array(indices), pa.array(self.vocabulary.values, type=pa.string()))
+        # A null offset marks the list starting there as null
+        return pa.ListArray.from_arrays(
+            pa.array(offsets.astype(np.int32), mask=np.append(~present, False)),
+            terms
+        )
+
+class _ScoresColumn(_Column):
+    def __init__(self, path, width=4):
+        super().__init__(path)
+        self.labels = _Dictionary()
+        self.counts = _Buffer(np.uint8)
+        self.codes = _Buffer(np.int16, width=width, fill=-1)
+        self.scores = _Buffer(np.float32, width=width)
+
+    def _store(self, value):
+        if not isinstance(value, dict) or len(value) > 255:
+            return False
+        items = list(value.items())
+        if not all(isinstance(label, str) and isinstance(score, (int, float)) and not isinstance(score, bool)
+                   for label, score in items):
+            return False
+        if len(items) > self.codes.width:
+            self.codes.widen(len(items))
+            self.scores.widen(len(items))
+        padding = self.codes.width - len(items)
+        self.counts.append(len(items))
+        self.codes.append([self.labels.encode(label) for label, _ in items] + [-1] * padding)
+        self.scores.append([score for _, score in items] + [0.0] * padding)
+        return True
+
+    def _store_missing(self):
+        self.counts.append(0)
+        self.codes.append([-1] * self.codes.width)
+        self.scores.append([0.0] * self.scores.width)
+
+    def get(self, i):
+        count = int(self.counts.array[i])
+        return {
+            self.labels.values[code]: float(str(score))
+            for code, score in zip(self.codes.array[i, :count].tolist(), self.scores.array[i, :count])
+        }
+
+    def nbytes(self):
+        return (super().nbytes() + self.counts.array.nbytes + self.codes.array.nbytes
+                + self.scores.array.nbytes + self.labels.nbytes())
+
+    def to_arrow(self, present):
+        counts = self.counts.view().astype(np.int32)
+        filled = np.arange(self.codes.width) < counts[:, None]
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+        labels = np.array(self.labels.values, dtype=object)[self.codes.view()[filled]]
+        return pa.MapArray.from_arrays(
+            pa.array(offsets, mask=np.append(~present, False)),
+            pa.array(labels.tolist(), type=pa.string()),
+            pa.array(self.scores.view()[filled])
+        )
+
+_EMPTY_DIGEST = np.zeros(20, dtype=np.uint8)
+
+class _DigestColumn(_Column):
+    def __init__(self, path):
+        super().__init__(path)
+        self.digests = _Buffer(np.uint8, width=20)
+
+    def _store(self, value):
+        if not isinstance(value, str) or len(value) != 40:
+            return False
+        try:
+            digest = bytes.fromhex(value)
+        except ValueError:
+            return False
+        # Upper-case hex would not round-trip
+        if digest.hex() != value:
+            return False
+        self.digests.append(np.frombuffer(digest, dtype=np.uint8))
+        return True
+
+    def _store_missing(self):
+        self.digests.append(_EMPTY_DIGEST)
+
+    def get(self, i):
+        return self.digests.array[i].tobytes().hex()
+
+    def nbytes(self):
+        return super().nbytes() + self.digests.array.nbytes
+
+    def to_arrow(self, present):
+        digests = self.digests.view()
+        return pa.array(
+            [digests[i].tobytes() if flag else None for i, flag in enumerate(present.tolist())],
+            type=pa.binary(20)
+        )
+
+class _ValueColumn(_Column):
+    def __init__(self, path):
+        super().__init__(path)
+        self.values = []
+
+    def _store(self, value):
+        self.values.append(value)
+        return True
+
+    def _store_missing(self):
+        self.values.append(None)
+
+    def get(self, i):
+        return self.values[i]
+
+    def to_arrow(self, present):
+        values = [value if flag else None for value, flag in zip(self.values, present.tolist())]
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed types (e.g. int and str ids): keep them as JSON text
+            return pa.array([None if value is None else dumps_json(value).decode('utf-8') for value in values])
+
+class ColumnarResults:
+    def __init__(self, schema=None):
+        """
+        Compact column store for many analysis results
+
+        Each leaf of the schema becomes one column: labels are small integer
+        codes into a per-column dictionary, scores are float32 arrays, keyword
+        lists are offsets + indices into one shared vocabulary and fingerprints
+        are 20-byte digests. Anything a record has outside the schema (or a value
+        of the wrong type) is kept per row in a residual dict, so every record
+        converts back to an equal dict, except that floats are rounded to
+        float32 precision. Per-item dicts are only built when rows are read.
+
+        Args:
+            schema (dict): Nested field -> kind tree; defaults to RESULT_SCHEMA
+        """
+        try:
+            self.schema = schema or RESULT_SCHEMA
+            self.vocabulary = _Dictionary()
+            self._columns = []
+            self._tree = self._build_columns(self.schema, ())
+            self._residual = {}
+            self._size = 0
+
+        except Exception as e:
+            logger.error(f"Failed to initialize columnar results: {str(e)}")
+            raise
+
+    def _build_columns(self, schema, prefix):
+        tree = {}
+        for key, kind in schema.items():
+            path = prefix + (key,)
+            if isinstance(kind, dict):
+                tree[key] = self._build_columns(kind, path)
+                continue
+            if kind == CATEGORY:
+                column = _CategoryColumn(path)
+            elif kind in (FLOAT, INT, FLAG):
+                column = _NumberColumn(path, kind)
+            elif kind in (TERMS, TOKENS):
+                column = _TermsColumn(path, self.vocabulary, separator=' ' if kind == TOKENS else None)
+            elif kind == SCORES:
+                column = _ScoresColumn(path)
+            elif kind == DIGEST:
+                column = _DigestColumn(path)
+            elif kind == VALUE:
+                column = _ValueColumn(path)
+            else:
+                raise ValueError(f"Unknown column kind '{kind}' for {'.'.join(path)}")
+            self._columns.append(column)
+            tree[key] = column
+        return tree
+
+    @classmethod
+    def from_records(cls, records, schema=None):
+        results = cls(schema)
+        results.extend(records)
+        return results
+
+    def __len__(self):
+        return self._size
+
+    def append(self, record):
+        """Encode one result dict; the caller can drop the dict afterwards"""
+        row = self._size
+        leftover, _ = self._split(record, self._tree)
+        for column in self._columns:
+            if len(column) == row:
+                column.append_missing()
+        if leftover:
+            self._residual[row] = leftover
+        self._size += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def _split(self, record, tree):
+        """Store the schema fields of a dict; returns (fields left over, fields stored)"""
+        leftover, stored = {}, 0
+        for key, value in record.items():
+            node = tree.get(key)
+            if isinstance(node, dict) and isinstance(value, dict):
+                rest, count = self._split(value, node)
+                stored += count
+                if rest or not count:
+                    # An empty dict has to be kept too, or it would disappear on read
+                    leftover[key] = rest
+            elif isinstance(node, _Column) and node.append(value):
+                stored += 1
+            else:
+                leftover[key] = value
+        return leftover, stored
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError('row out of range')
+        record = self._build(self._tree, i)
+        residual = self._residual.get(i)
+        if residual:
+            self._merge(record, residual)
+        return record
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    def _build(self, tree, i):
+        record = {}
+        for key, node in tree.items():
+            if isinstance(node, dict):
+                value = self._build(node, i)
+                if value:
+                    record[key] = value
+            elif node.present.array[i]:
+                record[key] = node.get(i)
+        return record
+
+    def _merge(self, record, residual):
+        for key, value in residual.items():
+            if isinstance(value, dict) and isinstance(record.get(key), dict):
+                self._merge(record[key], value)
+            else:
+                record[key] = value
+
+    def column(self, path):
+        """
+        Raw arrays of one column, for vectorized reads without building dicts
+
+        Args:
+            path (str): Dotted field path, e.g. 'analysis.emotion.primary_emotion'
+
+        Returns:
+            dict: 'present' mask plus the column's arrays ('codes' and 'values'
+                for categories, 'values' for numbers, 'offsets', 'indices' and
+                'vocabulary' for terms, 'labels', 'counts', 'codes' and 'scores'
+                for scores, 'digests' for digests)
+        """
+        for column in self._columns:
+            if '.'.join(column.path) != path:
+                continue
+            arrays = {'present': column.present.view()}
+            if isinstance(column, _CategoryColumn):
+                arrays.update(codes=column.codes.view(), values=column.dictionary.values)
+            elif isinstance(column, _NumberColumn):
+                arrays['values'] = column.values.view()
+            elif isinstance(column, _TermsColumn):
+                arrays.update(offsets=column.offsets.view(), indices=column.indices.view(),
+                              vocabulary=self.vocabulary.values)
+            elif isinstance(column, _ScoresColumn):
+                arrays.update(labels=column.labels.values, counts=column.counts.view(),
+                              codes=column.codes.view(), scores=column.scores.view())
+            elif isinstance(column, _DigestColumn):
+                arrays['digests'] = column.digests.view()
+            else:
+                arrays['values'] = column.values
+            return arrays
+        raise KeyError(path)
+
+    def to_arrow(self):
+        """
+        Arrow table with one column per schema leaf (dotted names)
+
+        Categories become dictionary arrays, terms list<dictionary<string>>,
+        scores map<string, float>, digests binary(20); the residual fields are
+        a JSON string column '_extra'.
+        """
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError('Arrow export requires pyarrow')
+        names, arrays = [], []
+        for column in self._columns:
+            names.append('.'.join(column.path))
+            arrays.append(column.to_arrow(column.present.view()))
+        names.append('_extra')
+        arrays.append(pa.array(
+            [dumps_json(self._residual[i]).decode('utf-8') if i in self._residual else None for i in range(self._size)],
+            type=pa.string()
+        ))
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def to_parquet(self, destination=None, compression='zstd'):
+        """
+        Write the results as a Parquet file
+
+        Args:
+            destination: Path or binary file object; None returns the bytes
+            compression (str): Parquet codec
+
+        Returns:
+            bytes: File contents when no destination was given
+        """
+        table = self.to_arrow()
+        if destination is not None:
+            pq.write_table(table, destination, compression=compression)
+            return None
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression=compression)
+        return buffer.getvalue()
+
+    def to_ipc(self):
+        """Results as an Arrow IPC stream (bytes)"""
+        table = self.to_arrow()
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def nbytes(self):
+        """Approximate memory held by the columns, vocabularies and residual rows"""
+        # Residual rows are ordinary Python objects; approximate them by their JSON size
+        residual = sum(len(dumps_json(value)) for value in self._residual.values())
+        return sum(column.nbytes() for column in self._columns) + self.vocabulary.nbytes() + residual
+
+    def get_stats(self):
+        return {
+            'rows': self._size,
+            'columns': len(self._columns),
+            'vocabulary': len(self.vocabulary),
+            'residual_rows': len(self._residual),
+            'nbytes': self.nbytes()
+        }
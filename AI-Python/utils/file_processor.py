@@ -1,25 +1,71 @@
 import numpy as np
+import importlib
 import logging
 import os
-
-# Import heavy libraries only when needed
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except ImportError:
-    CV2_AVAILABLE = False
+import threading
+import time
+from contextlib import nullcontext
 
 logger = logging.getLogger(__name__)
 
+# Seconds before a library refused for lack of memory is checked against the budget again
+BUDGET_RETRY_SECONDS = float(os.environ.get('MEMORY_BUDGET_RETRY_SECONDS', 60))
+
 class FileProcessor:
-    def __init__(self):
-        """Initialize file processing components"""
+    def __init__(self, memory_monitor=None):
+        """
+        Initialize file processing components
+
+        OpenCV and librosa are imported on first use rather than at startup, so
+        workers that only see text never pay for them.
+
+        Args:
+            memory_monitor (MemoryMonitor): Accounts for the libraries and may
+                refuse to load them when the worker is over its memory budget
+        """
         try:
+            self.memory_monitor = memory_monitor
+            self._modules = {}
+            self._unavailable = {}
+            self._refused_at = {}
+            self._import_lock = threading.Lock()
             logger.info("File processor initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize file processor: {str(e)}")
             raise
 
+    def _optional_module(self, name):
+        """
+        Import a heavy optional library once, or return None when missing or over budget
+
+        A missing library is remembered for good; a budget refusal only for
+        BUDGET_RETRY_SECONDS, since memory may be freed in the meantime.
+        """
+        module = self._modules.get(name)
+        if module is not None or name in self._unavailable or self._recently_refused(name):
+            return module
+
+        with self._import_lock:
+            if name in self._modules or name in self._unavailable or self._recently_refused(name):
+                return self._modules.get(name)
+            if self.memory_monitor is not None and not self.memory_monitor.can_load(name):
+                self._refused_at[name] = time.monotonic()
+                return None
+            self._refused_at.pop(name, None)
+            tracking = self.memory_monitor.track(name) if self.memory_monitor is not None else nullcontext()
+            try:
+                with tracking:
+                    module = importlib.import_module(name)
+            except ImportError as e:
+                self._unavailable[name] = str(e)
+                return None
+            self._modules[name] = module
+            return module
+
+    def _recently_refused(self, name):
+        refused_at = self._refused_at.get(name)
+        return refused_at is not None and time.monotonic() - refused_at < BUDGET_RETRY_SECONDS
+
     def analyze_visual_content(self, file_path):
         """
         Analyze visual content (images/videos) for emotion and context
@@ -51,7 +97,8 @@ class FileProcessor:
     def _analyze_image(self, image_path):
         """Analyze image content"""
         try:
-            if not CV2_AVAILABLE:
+            cv2 = self._optional_module('cv2')
+            if cv2 is None:
                 return {'error': 'OpenCV not available'}
             
             # Load image
@@ -111,7 +158,8 @@ class FileProcessor:
     def _analyze_video(self, video_path):
         """Analyze video content"""
         try:
-            if not CV2_AVAILABLE:
+            cv2 = self._optional_module('cv2')
+            if cv2 is None:
                 return {'error': 'OpenCV not available'}
             
             # Open video
@@ -192,6 +240,10 @@ class FileProcessor:
         try:
             if not os.path.exists(file_path):
                 return {'error': 'File not found'}
+
+            librosa = self._optional_module('librosa')
+            if librosa is None:
+                return {'error': 'librosa not available'}
             
             # Load audio file
             y, sr = librosa.load(file_path)
@@ -0,0 +1,219 @@
+import bisect
+import logging
+import re
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+UNDETERMINED = 'und'
+
+# (first code point, last code point, script); sorted by first code point
+SCRIPT_RANGES = [
+    (0x0041, 0x005A, 'Latin'), (0x0061, 0x007A, 'Latin'), (0x00C0, 0x024F, 'Latin'),
+    (0x0370, 0x03FF, 'Greek'), (0x0400, 0x04FF, 'Cyrillic'), (0x0590, 0x05FF, 'Hebrew'),
+    (0x0600, 0x06FF, 'Arabic'), (0x0900, 0x097F, 'Devanagari'), (0x0980, 0x09FF, 'Bengali'),
+    (0x0B80, 0x0BFF, 'Tamil'), (0x0E00, 0x0E7F, 'Thai'), (0x1100, 0x11FF, 'Hangul'),
+    (0x3040, 0x309F, 'Hiragana'), (0x30A0, 0x30FF, 'Katakana'), (0x3130, 0x318F, 'Hangul'),
+    (0x4E00, 0x9FFF, 'Han'), (0xAC00, 0xD7AF, 'Hangul')
+]
+_RANGE_STARTS = [start for start, _, _ in SCRIPT_RANGES]
+
+# Scripts used by a single language in our traffic; Latin goes through the n-gram model
+SCRIPT_LANGUAGES = {
+    'Greek': 'el', 'Cyrillic': 'ru', 'Hebrew': 'he', 'Arabic': 'ar', 'Devanagari': 'hi',
+    'Bengali': 'bn', 'Tamil': 'ta', 'Thai': 'th', 'Hangul': 'ko', 'Hiragana': 'ja',
+    'Katakana': 'ja', 'Han': 'zh'
+}
+# Scripts written without spaces between words
+UNSEGMENTED_SCRIPTS = {'Thai', 'Hiragana', 'Katakana', 'Han'}
+
+# Frequent words per Latin-script language; their character trigrams form the
+# language profiles, and the words double as stopwords for keyword extraction
+LANGUAGE_SEED_WORDS = {
+    'en': 'the and to of a in is it you that was for on are with as i my we they be at one have this '
+          'from or had by but not what all were when your can said there use an each which she do how '
+          'their if will up other about out many then them these so some her would make like him into '
+          'time has look two more day could go come did our no most people over know than first been '
+          'who now find long down get made may part today family friends love happy birthday trip',
+    'es': 'de la que el en y a los se del las un por con no una su para es al lo como más pero sus le '
+          'ya o este sí porque esta entre cuando muy sin sobre también me hasta hay donde quien desde '
+          'todo nos durante todos uno les ni contra otros ese eso ante ellos e esto mí antes algunos qué '
+          'unos yo otro otras otra él tanto esa estos mucho quienes nada muchos cual poco ella estar '
+          'día hoy familia amigos feliz cumpleaños viaje años niños fue estaba',
+    'fr': 'de la le et les des en un du une que est pour qui dans par plus pas au sur ne se ce il sont '
+          'avec ou son mais comme on tout nous sa aux ses elle cette été fait leur être bien ces sans '
+          'aussi ont même deux entre sous où très peut lui dont ça je tu vous notre nos mes ma mon '
+          'avait était jour aujourd hui famille amis heureux anniversaire voyage avons beaucoup',
+    'de': 'der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an '
+          'werden aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum '
+          'war haben nur oder aber vor zur bis mehr durch man sein wurde sei ich wir uns mein meine '
+          'heute tag familie freunde glücklich geburtstag reise schön mit waren gemacht',
+    'pt': 'de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele '
+          'das tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela '
+          'entre era depois sem mesmo aos ter seus quem nas me esse eles estão você tinha foram essa '
+          'num nem suas meu minha hoje dia família amigos feliz aniversário viagem então',
+    'it': 'di e il la che in a per un è del non sono una le si con da al dei nel alla ma anche più lo '
+          'gli come io questo ha se delle ci cosa mi tutto suo sua era molto quando fatto essere hanno '
+          'ancora tra noi loro mia mio fra dove nella degli sul stato perché oggi giorno famiglia '
+          'amici felice compleanno viaggio siamo abbiamo questa',
+    'nl': 'de en van het een in is dat op te zijn met voor niet aan er die maar om ook als dan bij of '
+          'nog wat uit worden door naar heeft over ze zo kan wel hij we was hebben tot wordt werd zich '
+          'mijn meer onze ons ik jij je u vandaag dag familie vrienden gelukkig verjaardag reis waren '
+          'geweest heel mooi samen'
+}
+
+LETTER_RUN_PATTERN = re.compile(r'[^\W\d_]+')
+
+DEFAULT_PRIORS = {'en': 0.7}
+
+class LanguageDetector:
+    # Bump when the seed profiles or routing rules change
+    VERSION = '1.0.0'
+
+    def __init__(self, seed_words=None, priors=None, max_chars=400, min_trigrams=4, min_confidence=0.5):
+        """
+        Fast language identification: Unicode script first, then a character
+        trigram model for Latin-script text
+
+        Scripts that map to one language (Cyrillic, Arabic, Han, ...) are decided
+        by counting code points; Latin text is scored with naive Bayes over
+        smoothed trigram log-probabilities, which takes tens of microseconds.
+
+        Args:
+            seed_words (dict): Language code -> space separated common words
+            priors (dict): Prior probability per language; languages left out share
+                the remainder. Defaults to favouring English, most of our traffic
+            max_chars (int): Only this many leading characters are inspected
+            min_trigrams (int): Fewer known trigrams than this is undetermined
+            min_confidence (float): Lower posterior than this is undetermined
+        """
+        try:
+            self.seed_words = seed_words or LANGUAGE_SEED_WORDS
+            self.max_chars = max_chars
+            self.min_trigrams = min_trigrams
+            self.min_confidence = min_confidence
+
+            self.languages = list(self.seed_words)
+            self.priors = DEFAULT_PRIORS if priors is None else priors
+            self.stopwords = {
+                language: frozenset(words.split()) for language, words in self.seed_words.items()
+            }
+            self._build_profiles()
+
+            logger.info(f"Language detector initialized ({len(self.languages)} Latin-script profiles)")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize language detector: {str(e)}")
+            raise
+
+    def _build_profiles(self):
+        counts = {language: Counter(self._trigrams(words)) for language, words in self.seed_words.items()}
+        vocabulary = sorted(set().union(*counts.values()))
+        self._trigram_index = {trigram: i for i, trigram in enumerate(vocabulary)}
+
+        # Add-one smoothed log P(trigram | language), one row per trigram
+        matrix = np.ones((len(vocabulary), len(self.languages)), dtype=np.float64)
+        for column, language in enumerate(self.languages):
+            for trigram, count in counts[language].items():
+                matrix[self._trigram_index[trigram], column] += count
+        self._log_probs = np.log(matrix / matrix.sum(axis=0))
+
+        unassigned = [language for language in self.languages if language not in self.priors]
+        remainder = max(1e-6, 1.0 - sum(self.priors.values()))
+        self._log_priors = np.log(np.array([
+            self.priors.get(language, remainder / max(1, len(unassigned))) for language in self.languages
+        ]))
+
+    def _trigrams(self, text):
+        for word in LETTER_RUN_PATTERN.findall(text.lower()):
+            padded = f'_{word}_'
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3]
+
+    def script_counts(self, text):
+        """Letters per script in the inspected prefix of the text"""
+        text = text[:self.max_chars]
+        if text.isascii():
+            # Common case: plain ASCII is all Latin letters plus punctuation
+            letters = sum(1 for char in text if char.isalpha())
+            return Counter({'Latin': letters}) if letters else Counter()
+        counts = Counter()
+        for char in text:
+            codepoint = ord(char)
+            i = bisect.bisect_right(_RANGE_STARTS, codepoint) - 1
+            if i >= 0 and codepoint <= SCRIPT_RANGES[i][1]:
+                counts[SCRIPT_RANGES[i][2]] += 1
+        return counts
+
+    def detect(self, text):
+        """
+        Identify the language of a text
+
+        Args:
+            text (str): Raw (not preprocessed) text
+
+        Returns:
+            dict: ISO 639-1 'language' ('und' when undetermined), 'confidence'
+                and dominant 'script'
+        """
+        scripts = self.script_counts(text or '')
+        if not scripts:
+            return {'language': UNDETERMINED, 'confidence': 0.0, 'script': None}
+
+        script, letters = scripts.most_common(1)[0]
+        share = letters / sum(scripts.values())
+
+        if script != 'Latin':
+            language = SCRIPT_LANGUAGES.get(script, UNDETERMINED)
+            # Kanji mixed with kana is Japanese
+            kana = scripts['Hiragana'] + scripts['Katakana']
+            if kana and script in ('Han', 'Hiragana', 'Katakana'):
+                language = 'ja'
+                share = (kana + scripts['Han']) / sum(scripts.values())
+            return {'language': language, 'confidence': round(share, 4), 'script': script}
+
+        indices = [
+            self._trigram_index[trigram]
+            for trigram in self._trigrams(text[:self.max_chars])
+            if trigram in self._trigram_index
+        ]
+        if len(indices) < self.min_trigrams:
+            return {'language': UNDETERMINED, 'confidence': 0.0, 'script': script}
+
+        scores = self._log_probs[indices].sum(axis=0) + self._log_priors
+        posterior = np.exp(scores - scores.max())
+        posterior /= posterior.sum()
+        best = int(np.argmax(posterior))
+        confidence = float(posterior[best]) * share
+        if confidence < self.min_confidence:
+            return {'language': UNDETERMINED, 'confidence': round(confidence, 4), 'script': script}
+        return {'language': self.languages[best], 'confidence': round(confidence, 4), 'script': script}
+
+    def detect_batch(self, texts):
+        """Detect the language of many texts"""
+        return [self.detect(text) for text in texts]
+
+    def words(self, text):
+        """Lowercased letter runs of any script (keeps accents and non-Latin letters)"""
+        return LETTER_RUN_PATTERN.findall((text or '').lower())
+
+    def extract_keywords(self, text, detection, top_k=10):
+        """
+        Frequency keywords for text the English pipeline cannot tokenize
+
+        Args:
+            text (str): Raw text
+            detection (dict): Result of detect() for the text
+            top_k (int): Number of keywords
+
+        Returns:
+            list: Keywords; empty for unsegmented scripts (Chinese, Japanese,
+                Thai), which have no word boundaries to count
+        """
+        if detection.get('script') in UNSEGMENTED_SCRIPTS:
+            return []
+        stopwords = self.stopwords.get(detection.get('language'), frozenset())
+        words = [word for word in self.words(text) if word not in stopwords and len(word) > 2]
+        return [word for word, _ in Counter(words).most_common(top_k)]
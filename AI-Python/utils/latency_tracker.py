@@ -0,0 +1,62 @@
+import numpy as np
+import threading
+from collections import defaultdict, deque
+
+class LatencyTracker:
+    def __init__(self, window=1000):
+        """
+        Track recent latencies per named operation
+
+        Args:
+            window (int): Number of most recent samples kept per operation
+        """
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Record one latency sample in seconds"""
+        with self._lock:
+            self._samples[name].append(seconds)
+            self._counts[name] += 1
+
+    def reset(self, name):
+        """Drop the recent samples and count for one operation"""
+        with self._lock:
+            self._samples.pop(name, None)
+            self._counts.pop(name, None)
+
+    def percentile(self, name, q):
+        """Latency percentile in milliseconds over the recent window, or None"""
+        with self._lock:
+            samples = list(self._samples.get(name, ()))
+        if not samples:
+            return None
+        return float(np.percentile(samples, q) * 1000.0)
+
+    def stats(self, name):
+        """
+        Summary statistics for one operation
+
+        Returns:
+            dict: count, mean/p50/p95/max in milliseconds over the recent window
+        """
+        with self._lock:
+            samples = np.array(self._samples.get(name, ()), dtype=np.float64) * 1000.0
+            count = self._counts.get(name, 0)
+        if samples.size == 0:
+            return {'count': count, 'mean_ms': None, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+        return {
+            'count': count,
+            'mean_ms': round(float(samples.mean()), 3),
+            'p50_ms': round(float(np.percentile(samples, 50)), 3),
+            'p95_ms': round(float(np.percentile(samples, 95)), 3),
+            'max_ms': round(float(samples.max()), 3)
+        }
+
+    def all_stats(self):
+        """Summary statistics for every tracked operation"""
+        with self._lock:
+            names = list(self._samples)
+        return {name: self.stats(name) for name in names}
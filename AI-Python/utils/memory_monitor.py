@@ -0,0 +1,163 @@
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Approximate resident size of one worker with only the always-loaded analyzers (MB)
+WORKER_BASE_MEMORY_MB = 300
+
+# Approximate resident cost of optional heavy components (MB), checked against the budget before loading
+COMPONENT_MEMORY_MB = {
+    'emotion_transformer': 600,
+    'cv2': 80,
+    'librosa': 150
+}
+
+def worker_memory_mb(components=()):
+    """Estimated resident size of one worker with the named optional components loaded"""
+    return WORKER_BASE_MEMORY_MB + sum(COMPONENT_MEMORY_MB[name] for name in components)
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None when it cannot be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1 << 20)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None"""
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    except (ImportError, OSError):
+        return None
+
+class MemoryMonitor:
+    def __init__(self, budget_mb=None, trace=None):
+        """
+        Per-component memory accounting and a load budget for optional components
+
+        Each component is loaded inside track(name), which records the RSS delta
+        (covers native allocations such as torch tensors and OpenCV) and, when
+        tracing is on, the Python heap delta from tracemalloc. Optional heavy
+        components call can_load() first and fall back to lighter ones when the
+        estimated size would exceed the budget.
+
+        Args:
+            budget_mb (float): RSS ceiling for this worker; env MEMORY_BUDGET_MB, unset means unlimited
+            trace (bool): Start tracemalloc (slows allocations); env MEMORY_TRACEMALLOC=1
+        """
+        budget_mb = budget_mb or os.environ.get('MEMORY_BUDGET_MB')
+        self.budget_mb = float(budget_mb) if budget_mb else None
+        if trace is None:
+            trace = os.environ.get('MEMORY_TRACEMALLOC') == '1'
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.baseline_rss_mb = current_rss_mb()
+        self.components = {}
+        self.refused = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, name):
+        """
+        Record the memory taken by the code inside the block under a component name
+
+        Loads running concurrently (the background transformer loader) are
+        attributed to whichever blocks overlap them, so deltas are approximate.
+        """
+        rss_before = current_rss_mb()
+        traced_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            rss_after = current_rss_mb()
+            entry = {
+                'rss_delta_mb': round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+                'python_heap_mb': None,
+                'load_seconds': round(time.perf_counter() - start, 3)
+            }
+            if traced_before is not None and tracemalloc.is_tracing():
+                entry['python_heap_mb'] = round((tracemalloc.get_traced_memory()[0] - traced_before) / (1 << 20), 1)
+            with self._lock:
+                self.components[name] = entry
+
+    def can_load(self, name, estimate_mb=None):
+        """
+        Check whether an optional component fits in the remaining budget
+
+        Args:
+            name (str): Component name (looked up in COMPONENT_MEMORY_MB)
+            estimate_mb (float): Expected RSS growth; defaults to the table entry
+
+        Returns:
+            bool: True when there is no budget or the component fits
+        """
+        if self.budget_mb is None:
+            return True
+        estimate_mb = estimate_mb if estimate_mb is not None else COMPONENT_MEMORY_MB.get(name, 0)
+        rss = current_rss_mb()
+        if rss is None or rss + estimate_mb <= self.budget_mb:
+            return True
+
+        reason = f'needs ~{estimate_mb:.0f} MB, {max(0.0, self.budget_mb - rss):.0f} MB of {self.budget_mb:.0f} MB budget left'
+        with self._lock:
+            self.refused[name] = reason
+        logger.warning(f"Not loading {name}: {reason}")
+        return False
+
+    def get_report(self, top=0):
+        """
+        Memory report for the debug endpoint
+
+        Args:
+            top (int): Include the largest tracemalloc allocation sites (tracing only)
+
+        Returns:
+            dict: Process RSS, budget, per-component deltas and refused components
+        """
+        rss = current_rss_mb()
+        peak = peak_rss_mb()
+        with self._lock:
+            components = dict(self.components)
+            refused = dict(self.refused)
+
+        report = {
+            'pid': os.getpid(),
+            'rss_mb': round(rss, 1) if rss is not None else None,
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+            'baseline_rss_mb': round(self.baseline_rss_mb, 1) if self.baseline_rss_mb is not None else None,
+            'budget_mb': self.budget_mb,
+            'headroom_mb': round(self.budget_mb - rss, 1) if self.budget_mb is not None and rss is not None else None,
+            'components': components,
+            'refused': refused,
+            'tracemalloc': tracemalloc.is_tracing()
+        }
+
+        if tracemalloc.is_tracing():
+            heap, heap_peak = tracemalloc.get_traced_memory()
+            report['python_heap_mb'] = round(heap / (1 << 20), 1)
+            report['python_heap_peak_mb'] = round(heap_peak / (1 << 20), 1)
+            if top:
+                stats = tracemalloc.take_snapshot().statistics('filename')[:top]
+                report['top_allocations'] = [
+                    {'file': str(stat.traceback), 'size_mb': round(stat.size / (1 << 20), 2), 'count': stat.count}
+                    for stat in stats
+                ]
+
+        return report
@@ -0,0 +1,310 @@
+import cProfile
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+class _StackSampler(threading.Thread):
+    def __init__(self, thread_id, interval):
+        """Background thread that snapshots one thread's Python stack at a fixed interval"""
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self.frame_index = {}
+        self.samples = []
+        self.weights = []
+        self._done = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_filename, code.co_firstlineno, code.co_name)
+                index = self.frame_index.get(key)
+                if index is None:
+                    index = self.frame_index[key] = len(self.frames)
+                    self.frames.append(key)
+                stack.append(index)
+                frame = frame.f_back
+            # Outermost frame first, as speedscope expects
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+class RequestProfiler:
+    def __init__(self, components=None, sample_rate=None, allow_header=None, capacity=None,
+                 mode=None, sample_interval_ms=None):
+        """
+        Opt-in per-request profiler with a bounded ring buffer of recent profiles
+
+        A request is profiled when it carries the X-Profile header (if allowed) or
+        is picked by 1-in-N sampling. 'cprofile' mode records every call and can
+        be downloaded as pstats; 'sample' mode snapshots the request thread's
+        stack every few milliseconds (low overhead) and exports to speedscope.
+        Each profile is summarized by the time spent in the named components.
+
+        Args:
+            components (dict): Component name -> module names whose code counts towards it
+            sample_rate (int): Profile 1 in N requests, 0 disables; env PROFILE_SAMPLE_RATE
+            allow_header (bool): Honour the X-Profile request header; env PROFILE_ALLOW_HEADER=1
+            capacity (int): Profiles kept; env PROFILE_BUFFER_SIZE
+            mode (str): Default mode for sampled requests; env PROFILE_MODE
+            sample_interval_ms (float): Stack sampling interval; env PROFILE_SAMPLE_INTERVAL_MS
+        """
+        try:
+            self.components = components or {}
+            self.sample_rate = int(sample_rate if sample_rate is not None else os.environ.get('PROFILE_SAMPLE_RATE', 0))
+            if allow_header is None:
+                allow_header = os.environ.get('PROFILE_ALLOW_HEADER') == '1'
+            self.allow_header = allow_header
+            self.mode = mode or os.environ.get('PROFILE_MODE', 'sample')
+            if self.mode not in PROFILE_MODES:
+                raise ValueError(f"Unknown profile mode '{self.mode}', expected one of {PROFILE_MODES}")
+            self.sample_interval = float(sample_interval_ms or os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 5)) / 1000.0
+
+            self._profiles = deque(maxlen=int(capacity or os.environ.get('PROFILE_BUFFER_SIZE', 20)))
+            self._lock = threading.Lock()
+            # Only one cProfile can be active per process (sys.setprofile/sys.monitoring)
+            self._cprofile_lock = threading.Lock()
+            self.skipped = 0
+
+            logger.info(f"Request profiler initialized (sample_rate=1/{self.sample_rate or 'off'}, mode={self.mode})")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize request profiler: {str(e)}")
+            raise
+
+    def select_mode(self, header_value=None):
+        """
+        Decide whether to profile a request
+
+        Args:
+            header_value (str): X-Profile header: '1'/'true' for the default mode, or a mode name
+
+        Returns:
+            str: Profile mode, or None to run the request unprofiled
+        """
+        if header_value and self.allow_header:
+            value = header_value.strip().lower()
+            if value in PROFILE_MODES:
+                return value
+            if value in ('1', 'true', 'yes'):
+                return self.mode
+        if self.sample_rate > 0 and random.random() < 1.0 / self.sample_rate:
+            return self.mode
+        return None
+
+    def start(self, mode, label):
+        """
+        Start profiling the current thread
+
+        Returns:
+            dict: Session to pass to stop(), or None when profiling is unavailable
+                (another cProfile session is active)
+        """
+        session = {'mode': mode, 'label': label, 'started': time.perf_counter()}
+        if mode == 'cprofile':
+            if not self._cprofile_lock.acquire(blocking=False):
+                self.skipped += 1
+                return None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiling tool holds the interpreter hook
+                self._cprofile_lock.release()
+                self.skipped += 1
+                return None
+            session['profile'] = profile
+        else:
+            sampler = _StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+            session['sampler'] = sampler
+        return session
+
+    def stop(self, session, status=None):
+        """
+        Stop a session and store its profile in the ring buffer
+
+        Returns:
+            str: Profile id
+        """
+        duration = time.perf_counter() - session['started']
+        record = {
+            'id': uuid.uuid4().hex[:12],
+            'label': session['label'],
+            'mode': session['mode'],
+            'status': status,
+            'duration_ms': round(duration * 1000.0, 2),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        if session['mode'] == 'cprofile':
+            profile = session['profile']
+            profile.disable()
+            self._cprofile_lock.release()
+            stats = pstats.Stats(profile).stats
+            record['stats'] = marshal.dumps(stats)
+            record['components'] = self._cprofile_components(stats)
+            record['top'] = self._cprofile_top(stats)
+        else:
+            sampler = session['sampler']
+            sampler.stop()
+            record['frames'] = sampler.frames
+            record['samples'] = sampler.samples
+            record['weights'] = sampler.weights
+            record['components'] = self._sample_components(sampler)
+            record['top'] = self._sample_top(sampler)
+
+        with self._lock:
+            self._profiles.append(record)
+        return record['id']
+
+    def _component_files(self):
+        # Resolved per profile: some component modules are imported lazily
+        files = {}
+        for name, modules in self.components.items():
+            paths = set()
+            for module_name in modules:
+                module = sys.modules.get(module_name)
+                if module is not None and getattr(module, '__file__', None):
+                    paths.add(os.path.abspath(module.__file__))
+            files[name] = paths
+        return files
+
+    def _cprofile_components(self, stats):
+        """Milliseconds per component: cumulative time of its functions entered from outside it"""
+        totals = {}
+        for name, paths in self._component_files().items():
+            total = 0.0
+            for func, (_, _, _, cumulative, callers) in stats.items():
+                if os.path.abspath(func[0]) not in paths:
+                    continue
+                # Count only entry points so nested calls within the component are not double counted
+                if not callers or any(os.path.abspath(caller[0]) not in paths for caller in callers):
+                    total += cumulative
+            totals[name] = round(total * 1000.0, 2)
+        return totals
+
+    def _cprofile_top(self, stats, limit=15):
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                'function': pstats.func_std_string(func),
+                'calls': calls,
+                'own_ms': round(own * 1000.0, 2),
+                'cumulative_ms': round(cumulative * 1000.0, 2)
+            }
+            for func, (_, calls, own, cumulative, _) in ranked
+        ]
+
+    def _sample_components(self, sampler):
+        """Milliseconds per component: weight of samples with any of its frames on the stack"""
+        totals = {}
+        for name, paths in self._component_files().items():
+            in_component = {i for i, frame in enumerate(sampler.frames) if os.path.abspath(frame[0]) in paths}
+            total = sum(
+                weight for stack, weight in zip(sampler.samples, sampler.weights)
+                if in_component.intersection(stack)
+            )
+            totals[name] = round(total * 1000.0, 2)
+        return totals
+
+    def _sample_top(self, sampler, limit=15):
+        # Innermost-frame (self) time per function
+        own = {}
+        for stack, weight in zip(sampler.samples, sampler.weights):
+            if stack:
+                own[stack[-1]] = own.get(stack[-1], 0.0) + weight
+        ranked = sorted(own.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {'function': f'{sampler.frames[i][0]}:{sampler.frames[i][1]}({sampler.frames[i][2]})', 'own_ms': round(t * 1000.0, 2)}
+            for i, t in ranked
+        ]
+
+    def list_profiles(self):
+        """Summaries of the buffered profiles, newest first"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [
+            {key: record[key] for key in ('id', 'label', 'mode', 'status', 'duration_ms', 'timestamp', 'components', 'top')}
+            for record in reversed(profiles)
+        ]
+
+    def get_profile(self, profile_id):
+        with self._lock:
+            for record in self._profiles:
+                if record['id'] == profile_id:
+                    return record
+        return None
+
+    def export_pstats(self, record):
+        """
+        Profile in the marshal format written by pstats.Stats.dump_stats
+
+        Load with pstats.Stats(path), or open in snakeviz. Only cProfile
+        profiles have call statistics; returns None for sampled profiles.
+        """
+        return record.get('stats')
+
+    def export_speedscope(self, record):
+        """
+        Sampled profile in speedscope's file format (https://www.speedscope.app)
+
+        Returns None for cProfile profiles, which record call counts but not stacks.
+        """
+        if record['mode'] != 'sample':
+            return None
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f"{record['label']} {record['timestamp']}",
+            'exporter': 'soulsafe-ai',
+            'activeProfileIndex': 0,
+            'shared': {
+                'frames': [{'name': name, 'file': path, 'line': line} for path, line, name in record['frames']]
+            },
+            'profiles': [{
+                'type': 'sampled',
+                'name': record['label'],
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(record['weights']),
+                'samples': record['samples'],
+                'weights': record['weights']
+            }]
+        }
+
+    def get_stats(self):
+        with self._lock:
+            buffered = len(self._profiles)
+        return {
+            'sample_rate': self.sample_rate,
+            'allow_header': self.allow_header,
+            'mode': self.mode,
+            'buffered': buffered,
+            'capacity': self._profiles.maxlen,
+            'skipped': self.skipped
+        }
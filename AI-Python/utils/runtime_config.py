@@ -0,0 +1,173 @@
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Read once by each native library when it first loads, so they must be set
+# before numpy/sklearn/torch are imported in the process
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+)
+
+def available_cpus():
+    """CPUs this process may run on (respects cgroup/affinity limits where the OS exposes them)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def resolve_thread_policy(workers=None, cpus=None):
+    """
+    Decide per-worker thread counts from one worker-count-aware policy
+
+    Each worker gets an equal share of the CPUs for intra-op parallelism, so
+    workers x threads never exceeds the core count. Environment overrides:
+        WEB_CONCURRENCY     number of server worker processes (default 1)
+        INFERENCE_THREADS   intra-op threads per worker (torch and BLAS)
+        CPU_AFFINITY        '1' to pin each worker to its own CPU slice
+
+    Args:
+        workers (int): Worker processes sharing the machine
+        cpus (int): CPUs available; defaults to available_cpus()
+
+    Returns:
+        dict: workers, cpus, intra_op_threads, inter_op_threads,
+            tokenizers_parallelism, pin_cpus
+    """
+    workers = max(1, int(workers or os.environ.get('WEB_CONCURRENCY', 1)))
+    cpus = max(1, int(cpus or available_cpus()))
+
+    threads = os.environ.get('INFERENCE_THREADS')
+    threads = int(threads) if threads else max(1, cpus // workers)
+
+    return {
+        'workers': workers,
+        'cpus': cpus,
+        'intra_op_threads': threads,
+        # Requests already run concurrently across workers/threads; keep torch's
+        # inter-op pool from adding another layer of threads
+        'inter_op_threads': 1,
+        # The Rust tokenizer pool would compete with the intra-op threads
+        'tokenizers_parallelism': False,
+        'pin_cpus': os.environ.get('CPU_AFFINITY', '0') == '1'
+    }
+
+def apply_thread_env(policy):
+    """
+    Export thread counts for native libraries that have not loaded yet
+
+    Explicitly set variables are left alone so operators can still override one library.
+    """
+    threads = str(policy['intra_op_threads'])
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, threads)
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'true' if policy['tokenizers_parallelism'] else 'false')
+
+def apply_runtime_limits(policy):
+    """
+    Resize thread pools of libraries already loaded in this process
+
+    Returns:
+        dict: What was applied, per library
+    """
+    applied = {}
+    threads = policy['intra_op_threads']
+
+    # threadpoolctl reaches BLAS/OpenMP pools that ignored the env vars because
+    # they were loaded first (e.g. in a preloaded gunicorn master)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+        applied['blas'] = threads
+    except ImportError:
+        pass
+
+    # Only configure torch if something already imported it; importing it here
+    # would cost hundreds of MB in processes that never run the transformer
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_interop_threads(policy['inter_op_threads'])
+        except RuntimeError:
+            # Only allowed before the first parallel torch op
+            pass
+        applied['torch'] = torch.get_num_threads()
+
+    return applied
+
+def worker_cpu_set(worker_index, policy):
+    """CPUs assigned to a worker: consecutive slices of intra_op_threads cores"""
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(policy['cpus']))
+    size = min(policy['intra_op_threads'], len(cpus))
+    start = (worker_index * size) % len(cpus)
+    return set(cpus[start:start + size]) or set(cpus[:size])
+
+def pin_worker(worker_index, policy):
+    """
+    Restrict the current process to its CPU slice
+
+    Returns:
+        list: Pinned CPU ids, or None when affinity is unsupported or disabled
+    """
+    if not policy['pin_cpus'] or not hasattr(os, 'sched_setaffinity'):
+        return None
+    cpu_set = worker_cpu_set(worker_index, policy)
+    try:
+        os.sched_setaffinity(0, cpu_set)
+        return sorted(cpu_set)
+    except OSError as e:
+        logger.warning(f"CPU pinning failed for worker {worker_index}: {str(e)}")
+        return None
+
+_state = {'policy': None, 'applied': {}, 'pinned': None, 'worker_index': None}
+
+def configure_process(workers=None):
+    """
+    Apply the thread policy at process start, before heavy imports
+
+    Safe to call more than once; later calls keep the first policy.
+
+    Returns:
+        dict: The active policy
+    """
+    if _state['policy'] is None:
+        _state['policy'] = resolve_thread_policy(workers)
+        apply_thread_env(_state['policy'])
+    return _state['policy']
+
+def configure_worker(worker_index=0, workers=None):
+    """
+    Per-worker setup after fork: pin CPUs and resize already loaded thread pools
+
+    Args:
+        worker_index (int): 0-based worker slot
+        workers (int): Total worker processes
+
+    Returns:
+        dict: Runtime info for this worker
+    """
+    policy = configure_process(workers)
+    _state['worker_index'] = worker_index
+    _state['pinned'] = pin_worker(worker_index, policy)
+    _state['applied'] = apply_runtime_limits(policy)
+    logger.info(
+        f"Worker {worker_index}: {policy['intra_op_threads']} intra-op threads"
+        f"{', pinned to CPUs ' + str(_state['pinned']) if _state['pinned'] else ''}"
+    )
+    return get_runtime_info()
+
+def get_runtime_info():
+    """Active thread policy and what was applied in this process"""
+    return {
+        'pid': os.getpid(),
+        'policy': _state['policy'],
+        'worker_index': _state['worker_index'],
+        'pinned_cpus': _state['pinned'],
+        'applied': _state['applied'],
+        'env': {name: os.environ.get(name) for name in THREAD_ENV_VARS + ('TOKENIZERS_PARALLELISM',)}
+    }
@@ -0,0 +1,205 @@
+import numpy as np
+import logging
+import os
+from scipy import sparse
+
+from utils.text_normalizer import default_normalizer
+
+logger = logging.getLogger(__name__)
+
+# Used when the vaderSentiment lexicon file is not installed; valences on VADER's -4..4 scale
+FALLBACK_LEXICON = {
+    'good': 1.9, 'great': 3.1, 'excellent': 2.7, 'amazing': 2.8, 'wonderful': 2.7,
+    'happy': 2.7, 'love': 3.2, 'best': 3.2, 'perfect': 2.7, 'fantastic': 2.6,
+    'joy': 2.8, 'grateful': 2.0, 'proud': 2.1, 'excited': 1.8, 'beautiful': 2.9,
+    'bad': -2.5, 'terrible': -2.1, 'awful': -2.0, 'hate': -2.7, 'worst': -3.1,
+    'horrible': -2.5, 'sad': -2.1, 'angry': -2.3, 'disappointed': -1.9, 'poor': -2.1,
+    'miss': -0.6, 'lonely': -2.0, 'afraid': -2.2, 'worried': -1.2, 'grief': -2.2
+}
+
+NEGATIONS = frozenset([
+    'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'nowhere',
+    'without', 'cannot', 'dont', 'doesnt', 'didnt', 'isnt', 'wasnt', 'werent', 'arent',
+    'aint', 'cant', 'couldnt', 'shouldnt', 'wouldnt', 'wont', 'hasnt', 'havent', 'hadnt'
+])
+
+# VADER constants: negated words are scaled by N_SCALAR, compound uses ALPHA
+NEGATION_SCALAR = -0.74
+NEGATION_SCOPE = 3
+NORMALIZATION_ALPHA = 15.0
+MAX_VALENCE = 4.0
+
+# Column order of the per-word weight matrix
+_VALENCE, _POSITIVE, _NEGATIVE, _SUBJECTIVITY, _HITS = range(5)
+
+def load_vader_lexicon():
+    """Load the lexicon shipped with vaderSentiment, or None if unavailable"""
+    try:
+        import vaderSentiment.vaderSentiment as vader_module
+        path = os.path.join(os.path.dirname(vader_module.__file__), 'vader_lexicon.txt')
+        lexicon = {}
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) >= 2 and parts[0].isalpha():
+                    lexicon[parts[0].lower()] = float(parts[1])
+        return lexicon
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"VADER lexicon not available, using fallback lexicon: {str(e)}")
+        return None
+
+class SentimentEngine:
+    def __init__(self, lexicon=None):
+        """
+        Initialize the lexicon sentiment engine
+
+        Args:
+            lexicon (dict): word -> valence on a -4..4 scale; defaults to the VADER lexicon
+        """
+        try:
+            lexicon = lexicon or load_vader_lexicon() or FALLBACK_LEXICON
+
+            self.vocabulary = {word: i for i, word in enumerate(sorted(lexicon))}
+            valence = np.array([lexicon[word] for word in sorted(lexicon)], dtype=np.float64)
+
+            # Rows 0..V-1 are plain words, rows V..2V-1 the same words under negation
+            self._negation_offset = len(self.vocabulary)
+            self._weights = np.vstack([
+                self._word_weights(valence),
+                self._word_weights(valence * NEGATION_SCALAR)
+            ])
+
+            logger.info(f"Sentiment engine initialized with {len(self.vocabulary)} lexicon entries")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize sentiment engine: {str(e)}")
+            raise
+
+    def _word_weights(self, valence):
+        """Per-word contributions: valence, VADER pos/neg mass, subjectivity, hit count"""
+        weights = np.zeros((len(valence), 5), dtype=np.float64)
+        weights[:, _VALENCE] = valence
+        weights[:, _POSITIVE] = np.where(valence > 0, valence + 1.0, 0.0)
+        weights[:, _NEGATIVE] = np.where(valence < 0, 1.0 - valence, 0.0)
+        weights[:, _SUBJECTIVITY] = np.minimum(np.abs(valence) / 3.0, 1.0)
+        weights[:, _HITS] = 1.0
+        return weights
+
+    def build_matrix(self, token_lists):
+        """
+        Build a sparse document x (lexicon, negated lexicon) count matrix
+
+        Args:
+            token_lists (list): Lists of lowercase tokens
+
+        Returns:
+            tuple: (csr_matrix, token count array)
+        """
+        vocabulary = self.vocabulary
+        offset = self._negation_offset
+        indices = []
+        indptr = [0]
+        token_counts = np.empty(len(token_lists), dtype=np.float64)
+
+        for row, tokens in enumerate(token_lists):
+            negated_until = -1
+            for position, token in enumerate(tokens):
+                if token in NEGATIONS:
+                    negated_until = position + NEGATION_SCOPE
+                    continue
+                column = vocabulary.get(token)
+                if column is not None:
+                    indices.append(column + offset if position <= negated_until else column)
+            indptr.append(len(indices))
+            token_counts[row] = len(tokens)
+
+        data = np.ones(len(indices), dtype=np.float64)
+        matrix = sparse.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(token_lists), 2 * offset)
+        )
+        return matrix, token_counts
+
+    def score_tokens(self, token_lists):
+        """
+        Score a batch of token lists with one sparse matrix product
+
+        Args:
+            token_lists (list): Lists of lowercase tokens
+
+        Returns:
+            dict: Arrays 'compound', 'pos', 'neg', 'neu', 'polarity', 'subjectivity'
+        """
+        matrix, token_counts = self.build_matrix(token_lists)
+        totals = np.asarray(matrix @ self._weights)
+
+        valence = totals[:, _VALENCE]
+        hits = totals[:, _HITS]
+        positive = totals[:, _POSITIVE]
+        negative = totals[:, _NEGATIVE]
+        neutral = np.maximum(token_counts - hits, 0.0)
+
+        compound = valence / np.sqrt(valence * valence + NORMALIZATION_ALPHA)
+        mass = positive + negative + neutral
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pos = np.where(mass > 0, positive / mass, 0.0)
+            neg = np.where(mass > 0, negative / mass, 0.0)
+            neu = np.where(mass > 0, neutral / mass, 1.0)
+            polarity = np.where(hits > 0, valence / (MAX_VALENCE * hits), 0.0)
+            subjectivity = np.where(hits > 0, totals[:, _SUBJECTIVITY] / hits, 0.0)
+
+        return {
+            'compound': compound,
+            'pos': pos,
+            'neg': neg,
+            'neu': neu,
+            'polarity': np.clip(polarity, -1.0, 1.0),
+            'subjectivity': subjectivity
+        }
+
+    def score_batch(self, texts, preprocessed=False):
+        """
+        Score a batch of texts
+
+        Args:
+            texts (list): Input texts
+            preprocessed (bool): True when texts are already normalized by TextProcessor
+
+        Returns:
+            list: One dict per text with TextBlob-compatible 'polarity', 'subjectivity',
+                'sentiment' and VADER-compatible 'compound', 'pos', 'neg', 'neu'
+        """
+        if not preprocessed:
+            texts = default_normalizer.normalize_many(texts)
+        scores = self.score_tokens([text.split() if text else [] for text in texts])
+
+        results = []
+        for i in range(len(texts)):
+            polarity = float(scores['polarity'][i])
+            results.append({
+                'polarity': round(polarity, 4),
+                'subjectivity': round(float(scores['subjectivity'][i]), 4),
+                'sentiment': self._label(polarity),
+                'compound': round(float(scores['compound'][i]), 4),
+                'pos': round(float(scores['pos'][i]), 3),
+                'neg': round(float(scores['neg'][i]), 3),
+                'neu': round(float(scores['neu'][i]), 3)
+            })
+        return results
+
+    def score(self, text, preprocessed=False):
+        """Score a single text; see score_batch"""
+        return self.score_batch([text], preprocessed=preprocessed)[0]
+
+    @staticmethod
+    def vader_scores(result):
+        """Extract the fields returned by VADER's polarity_scores"""
+        return {key: result[key] for key in ('neg', 'neu', 'pos', 'compound')}
+
+    def _label(self, polarity):
+        if polarity > 0.1:
+            return 'positive'
+        if polarity < -0.1:
+            return 'negative'
+        return 'neutral'
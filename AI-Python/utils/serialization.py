@@ -0,0 +1,155 @@
+import json
+import numpy as np
+from flask import Response, request
+
+# Import optional fast encoders only when available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Envelope keys kept even when a field projection leaves them out
+ENVELOPE_KEYS = ('success', 'error', 'analysis_id')
+
+def _default(value):
+    """Convert values the encoders do not handle natively"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not serializable')
+
+def dumps_json(payload):
+    """Encode to JSON bytes with orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            payload,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+def dumps_ndjson(record):
+    """One newline-delimited JSON record for streaming responses"""
+    return dumps_json(record) + b'\n'
+
+def dumps_msgpack(payload):
+    return msgpack.packb(payload, default=_default, use_bin_type=True)
+
+def parse_fields(spec):
+    """
+    Parse a fields parameter into a projection tree
+
+    'emotion.primary_emotion,classification.category' becomes
+    {'emotion': {'primary_emotion': {}}, 'classification': {'category': {}}};
+    an empty subtree keeps the whole value.
+
+    Returns:
+        dict: Projection tree, or None when no fields were requested
+    """
+    if not spec:
+        return None
+    tree = {}
+    for path in spec.split(','):
+        parts = [part for part in path.strip().split('.') if part]
+        if not parts:
+            continue
+        node = tree
+        for i, part in enumerate(parts):
+            # A shorter path already selected this whole subtree
+            if part in node and not node[part]:
+                break
+            node = node.setdefault(part, {})
+            if i == len(parts) - 1:
+                node.clear()
+    return tree or None
+
+def project(value, tree):
+    """Keep only the selected fields; lists are projected element-wise"""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+def project_at(payload, root, tree):
+    """
+    Apply a projection below a dotted root path, leaving everything else untouched
+
+    Args:
+        payload: Response body
+        root (str): Path to the projected node, e.g. 'results.analysis'; lists on
+            the way are traversed element-wise
+        tree (dict): Projection from parse_fields
+
+    Returns:
+        Projected copy of the containers along the path
+    """
+    if not root:
+        projected = project(payload, tree)
+        if isinstance(payload, dict):
+            for key in ENVELOPE_KEYS:
+                if key in payload:
+                    projected.setdefault(key, payload[key])
+        return projected
+
+    head, _, rest = root.partition('.')
+    if isinstance(payload, list):
+        return [project_at(item, root, tree) for item in payload]
+    if not isinstance(payload, dict) or head not in payload:
+        return payload
+    result = dict(payload)
+    result[head] = project(payload[head], tree) if not rest else project_at(payload[head], rest, tree)
+    return result
+
+def negotiate():
+    """
+    Pick the response encoding from the Accept header
+
+    Returns:
+        tuple: (mimetype, encoder)
+    """
+    offered = [JSON_MIMETYPE] + (list(MSGPACK_MIMETYPES) if MSGPACK_AVAILABLE else [])
+    best = request.accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+    if best in MSGPACK_MIMETYPES:
+        return best, dumps_msgpack
+    return JSON_MIMETYPE, dumps_json
+
+def respond(payload, status=200, root=None):
+    """
+    Serialize a response with content negotiation and optional field selection
+
+    Clients choose the encoding with Accept (application/json or
+    application/msgpack) and may pass ?fields=a.b,c to receive only those
+    fields of the node at root.
+
+    Args:
+        payload (dict): Response body
+        status (int): HTTP status
+        root (str): Dotted path the fields parameter is relative to
+
+    Returns:
+        Response: Encoded Flask response
+    """
+    tree = parse_fields(request.args.get('fields'))
+    if tree:
+        payload = project_at(payload, root, tree)
+
+    mimetype, encoder = negotiate()
+    return Response(encoder(payload), status=status, mimetype=mimetype, headers={'Vary': 'Accept'})
@@ -0,0 +1,117 @@
+import logging
+import os
+
+from utils.memory_monitor import worker_memory_mb
+from utils.runtime_config import available_cpus
+
+logger = logging.getLogger(__name__)
+
+# gunicorn worker class per SERVER_MODE
+WORKER_CLASSES = {
+    'sync': 'sync',
+    # Threads share one copy of the models and keep connections alive for streaming
+    'gthread': 'gthread',
+    # Flask wrapped by asgi.py and served by uvicorn's event loop
+    'asgi': 'uvicorn.workers.UvicornWorker'
+}
+DEFAULT_SERVER_MODE = 'gthread'
+
+# Left for the master process, page cache and spikes
+MEMORY_RESERVE_MB = 128
+
+def available_memory_mb():
+    """Memory limit for this container: cgroup limit when set, else system available memory"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as handle:
+                value = handle.read().strip()
+            # cgroup v1 reports a huge number when unlimited
+            if value != 'max' and int(value) < 1 << 50:
+                return int(value) >> 20
+        except (OSError, ValueError):
+            continue
+    try:
+        import psutil
+        return psutil.virtual_memory().available >> 20
+    except ImportError:
+        pass
+    try:
+        return (os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')) >> 20
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def model_memory_mb():
+    """
+    Per-worker model footprint, from the memory monitor's component estimates
+
+    Counts the emotion transformer unless EMOTION_TIER=fallback; env
+    MODEL_MEMORY_MB overrides the estimate.
+    """
+    override = os.environ.get('MODEL_MEMORY_MB')
+    if override:
+        return int(override)
+    if os.environ.get('EMOTION_TIER', 'auto') == 'fallback':
+        return worker_memory_mb()
+    return worker_memory_mb(['emotion_transformer'])
+
+def resolve_server_config(mode=None, cpus=None, memory_mb=None):
+    """
+    Compute gunicorn settings from CPU count and model memory footprint
+
+    Workers are capped by CPUs (one per core, 2n+1 for sync workers that block
+    on I/O) and by how many model copies fit in memory. With preload_app the
+    models load once in the master and are shared copy-on-write until touched,
+    so the memory cap is conservative. Environment overrides: SERVER_MODE,
+    WEB_CONCURRENCY (workers), WORKER_THREADS, PRELOAD_APP, MAX_REQUESTS.
+
+    Args:
+        mode (str): 'sync', 'gthread' or 'asgi'
+        cpus (int): CPUs available; defaults to available_cpus()
+        memory_mb (int): Memory available; defaults to available_memory_mb()
+
+    Returns:
+        dict: gunicorn settings plus the inputs they were derived from
+    """
+    mode = mode or os.environ.get('SERVER_MODE', DEFAULT_SERVER_MODE)
+    if mode not in WORKER_CLASSES:
+        logger.warning(f"Unknown server mode '{mode}', using {DEFAULT_SERVER_MODE}")
+        mode = DEFAULT_SERVER_MODE
+
+    cpus = cpus or available_cpus()
+    memory_mb = memory_mb if memory_mb is not None else available_memory_mb()
+    footprint = model_memory_mb()
+
+    cpu_workers = 2 * cpus + 1 if mode == 'sync' else cpus
+    memory_workers = None
+    if memory_mb:
+        memory_workers = max(1, (memory_mb - MEMORY_RESERVE_MB) // footprint)
+
+    workers = os.environ.get('WEB_CONCURRENCY')
+    workers = int(workers) if workers else max(1, min(cpu_workers, memory_workers or cpu_workers))
+
+    threads = 1
+    if mode == 'gthread':
+        threads = int(os.environ.get('WORKER_THREADS', 4))
+
+    max_requests = int(os.environ.get('MAX_REQUESTS', 1000))
+
+    return {
+        'mode': mode,
+        'worker_class': WORKER_CLASSES[mode],
+        'wsgi_app': 'asgi:app' if mode == 'asgi' else 'app:app',
+        'workers': workers,
+        'threads': threads,
+        'preload_app': os.environ.get('PRELOAD_APP', '1') == '1',
+        # Recycle workers to bound slow memory growth; jitter avoids all restarting together
+        'max_requests': max_requests,
+        'max_requests_jitter': max(1, max_requests // 10) if max_requests else 0,
+        'timeout': int(os.environ.get('WORKER_TIMEOUT', 120)),
+        'keepalive': 5,
+        'inputs': {
+            'cpus': cpus,
+            'memory_mb': memory_mb,
+            'model_memory_mb': footprint,
+            'cpu_workers': cpu_workers,
+            'memory_workers': memory_workers
+        }
+    }
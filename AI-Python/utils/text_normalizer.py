@@ -0,0 +1,114 @@
+import re
+import string
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Patterns compiled once at import instead of going through re's per-call cache
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+WORD_PATTERN = re.compile(r'\b[a-z]+\b')
+
+class _LetterTable(dict):
+    """
+    str.translate mapping that lowercases, keeps ASCII letters, turns whitespace
+    into a space and deletes everything else.
+
+    Equivalent to ``re.sub(r'[^a-zA-Z\\s]', '', text.lower())`` with whitespace
+    normalized. Code points are resolved on first use and memoized, so the table
+    covers all of Unicode without being built up front.
+    """
+
+    def __init__(self):
+        super().__init__()
+        for char in string.ascii_lowercase:
+            self[ord(char)] = char
+        for char in string.ascii_uppercase:
+            self[ord(char)] = char.lower()
+
+    def __missing__(self, codepoint):
+        kept = []
+        for char in chr(codepoint).lower():
+            if char in string.ascii_lowercase:
+                kept.append(char)
+            elif char.isspace():
+                kept.append(' ')
+        value = ''.join(kept) or None
+        self[codepoint] = value
+        return value
+
+def _build_ascii_tables():
+    """bytes.translate table and delete set for the all-ASCII fast path"""
+    table = bytearray(range(256))
+    keep = set()
+    for byte in range(128):
+        char = chr(byte)
+        if char in string.ascii_letters:
+            table[byte] = ord(char.lower())
+            keep.add(byte)
+        elif char.isspace():
+            table[byte] = ord(' ')
+            keep.add(byte)
+    delete = bytes(byte for byte in range(256) if byte not in keep)
+    return bytes(table), delete
+
+ASCII_TABLE, ASCII_DELETE = _build_ascii_tables()
+
+class TextNormalizer:
+    def __init__(self):
+        """Initialize normalization tables"""
+        self._letter_table = _LetterTable()
+
+    def normalize(self, text):
+        """
+        Lowercase, strip non-letters and collapse whitespace
+
+        Two passes over the text: one translate and one split/join.
+
+        Args:
+            text (str): Input text
+
+        Returns:
+            str: Normalized text
+        """
+        if not text:
+            return ''
+        return ' '.join(self._strip(text).split())
+
+    def normalize_many(self, texts):
+        """
+        Normalize a batch of texts
+
+        Args:
+            texts (list): Input texts
+
+        Returns:
+            list: Normalized texts in input order
+        """
+        strip = self._strip
+        return [' '.join(strip(text).split()) if text else '' for text in texts]
+
+    def _strip(self, text):
+        """Lowercase and drop non-letters; bytes.translate when the text is pure ASCII"""
+        if text.isascii():
+            return text.encode('ascii').translate(ASCII_TABLE, ASCII_DELETE).decode('ascii')
+        return text.translate(self._letter_table)
+
+    def strip_markup(self, text):
+        """Remove HTML tags, URLs and email addresses, then collapse whitespace"""
+        if not text:
+            return ''
+        text = HTML_TAG_PATTERN.sub('', text)
+        text = URL_PATTERN.sub('', text)
+        text = EMAIL_PATTERN.sub('', text)
+        return ' '.join(text.split())
+
+    def words(self, text):
+        """Return lowercase alphabetic word tokens"""
+        if not text:
+            return []
+        return WORD_PATTERN.findall(text.lower())
+
+# Shared default instance; the table is memoized so sharing it keeps it warm
+default_normalizer = TextNormalizer()
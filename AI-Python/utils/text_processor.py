@@ -1,15 +1,21 @@
-import re
 from collections import Counter
 import logging
 
+from utils.text_normalizer import default_normalizer
+from utils.sentiment_engine import SentimentEngine
+
 logger = logging.getLogger(__name__)
 
 # Fallback stopwords if NLTK is not available
 FALLBACK_STOPWORDS = set(['i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're", "you've", "you'll", "you'd", 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she', "she's", 'her', 'hers', 'herself', 'it', "it's", 'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', "that'll", 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through', 'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then', 'once'])
 
 class TextProcessor:
+    # Bump when preprocessing, keyword or sentiment output changes
+    VERSION = '1.1.0'
+
     def __init__(self):
         """Initialize text processing components"""
+        self.normalizer = default_normalizer
         try:
             # Try to use NLTK if available
             try:
@@ -23,15 +29,8 @@ class TextProcessor:
                 self.stop_words = FALLBACK_STOPWORDS
                 self.use_nltk = False
                 
-            # Try to import TextBlob
-            try:
-                from textblob import TextBlob
-                self.TextBlob = TextBlob
-                self.use_textblob = True
-            except ImportError:
-                logger.warning("TextBlob not available, using basic sentiment")
-                self.TextBlob = None
-                self.use_textblob = False
+            # Lexicon sentiment engine shared with the emotion analyzers
+            self.sentiment_engine = SentimentEngine()
             
             logger.info("Text processor initialized successfully")
             
@@ -40,7 +39,7 @@ class TextProcessor:
             # Don't raise, continue with fallback mode
             self.stop_words = FALLBACK_STOPWORDS
             self.use_nltk = False
-            self.use_textblob = False
+            self.sentiment_engine = None
 
     def preprocess(self, text):
         """
@@ -56,80 +55,72 @@ class TextProcessor:
             if not text:
                 return ""
             
-            # Convert to lowercase
-            text = text.lower()
-            
-            # Remove special characters and numbers
-            text = re.sub(r'[^a-zA-Z\s]', '', text)
-            
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            return text
+            # Lowercase, drop non-letters and collapse whitespace in one translate pass
+            return self.normalizer.normalize(text)
             
         except Exception as e:
             logger.error(f"Text preprocessing failed: {str(e)}")
             return text
 
-    def analyze_sentiment(self, text):
+    def preprocess_many(self, texts):
         """
-        Analyze sentiment of text using TextBlob or fallback
+        Preprocess a batch of texts
         
         Args:
-            text (str): Input text to analyze
+            texts (list): Input texts to preprocess
             
         Returns:
-            dict: Sentiment analysis results
+            list: Preprocessed texts in input order
         """
         try:
-            if not text:
-                return {
-                    'polarity': 0.0,
-                    'subjectivity': 0.0,
-                    'sentiment': 'neutral'
-                }
+            return self.normalizer.normalize_many(texts)
             
-            if self.use_textblob and self.TextBlob:
-                blob = self.TextBlob(text)
-                polarity = blob.sentiment.polarity
-                subjectivity = blob.sentiment.subjectivity
-            else:
-                # Simple fallback sentiment analysis
-                positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'happy', 'love', 'best', 'perfect', 'fantastic']
-                negative_words = ['bad', 'terrible', 'awful', 'hate', 'worst', 'horrible', 'sad', 'angry', 'disappointed', 'poor']
-                
-                text_lower = text.lower()
-                pos_count = sum(1 for word in positive_words if word in text_lower)
-                neg_count = sum(1 for word in negative_words if word in text_lower)
-                
-                total = pos_count + neg_count
-                if total > 0:
-                    polarity = (pos_count - neg_count) / total
-                else:
-                    polarity = 0.0
-                subjectivity = min(total / 10.0, 1.0)  # Rough estimate
+        except Exception as e:
+            logger.error(f"Batch text preprocessing failed: {str(e)}")
+            return [self.preprocess(text) for text in texts]
+
+    def analyze_sentiment(self, text):
+        """
+        Analyze sentiment of text using the lexicon sentiment engine
+        
+        Args:
+            text (str): Preprocessed text to analyze
             
-            # Determine sentiment category
-            if polarity > 0.1:
-                sentiment = 'positive'
-            elif polarity < -0.1:
-                sentiment = 'negative'
-            else:
-                sentiment = 'neutral'
+        Returns:
+            dict: Sentiment analysis results with TextBlob-style polarity/subjectivity
+                and VADER-style compound/pos/neg/neu scores
+        """
+        return self.analyze_sentiment_batch([text])[0]
+
+    def analyze_sentiment_batch(self, texts):
+        """
+        Analyze sentiment for multiple preprocessed texts in one pass
+        
+        Args:
+            texts (list): Preprocessed texts to analyze
             
-            return {
-                'polarity': float(polarity),
-                'subjectivity': float(subjectivity),
-                'sentiment': sentiment
-            }
+        Returns:
+            list: Sentiment analysis results in input order
+        """
+        try:
+            if self.sentiment_engine is None:
+                raise RuntimeError('Sentiment engine not initialized')
+            return self.sentiment_engine.score_batch(texts, preprocessed=True)
             
         except Exception as e:
             logger.error(f"Sentiment analysis failed: {str(e)}")
-            return {
-                'polarity': 0.0,
-                'subjectivity': 0.0,
-                'sentiment': 'neutral'
-            }
+            return [
+                {
+                    'polarity': 0.0,
+                    'subjectivity': 0.0,
+                    'sentiment': 'neutral',
+                    'compound': 0.0,
+                    'pos': 0.0,
+                    'neg': 0.0,
+                    'neu': 1.0
+                }
+                for _ in texts
+            ]
 
     def extract_keywords(self, text, top_k=10):
         """
@@ -147,9 +138,8 @@ class TextProcessor:
                 return []
             
             # Simple tokenization fallback
-            text_lower = text.lower()
-            words = re.findall(r'\b[a-z]+\b', text_lower)
-            words = [word for word in words if word.isalpha() and word not in self.stop_words and len(word) > 2]
+            words = self.normalizer.words(text)
+            words = [word for word in words if word not in self.stop_words and len(word) > 2]
             
             # Count word frequencies
             word_freq = Counter(words)
@@ -218,19 +208,8 @@ class TextProcessor:
             if not text:
                 return ""
             
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', '', text)
-            
-            # Remove URLs
-            text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-            
-            # Remove email addresses
-            text = re.sub(r'\S+@\S+', '', text)
-            
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            return text
+            # Remove HTML tags, URLs and email addresses, then extra whitespace
+            return self.normalizer.strip_markup(text)
             
         except Exception as e:
             logger.error(f"Text cleaning failed: {str(e)}")
@@ -251,8 +230,7 @@ class TextProcessor:
                 return 0
             
             # Simple word counting
-            words = re.findall(r'\b[a-z]+\b', text.lower())
-            return len([word for word in words if word.isalpha()])
+            return len(self.normalizer.words(text))
             
         except Exception as e:
             logger.error(f"Word count failed: {str(e)}")